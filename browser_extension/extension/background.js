@@ -6,7 +6,40 @@ chrome.runtime.onInstalled.addListener(() => {
     // console.log("GSV Installed"); 
 });
 
+// Native engine (local_designing/src/native_host.py): batches bypass the download manager
+const _NH = 'sora_video_downloader.engine';
+let _port = null;
+
+function _native() {
+    if (_port) return _port;
+    _port = chrome.runtime.connectNative(_NH);
+    _port.onMessage.addListener((ev) => {
+        chrome.runtime.sendMessage({ action: "native_event", event: ev }).catch(() => {});
+    });
+    _port.onDisconnect.addListener(() => {
+        const _e = chrome.runtime.lastError;
+        chrome.runtime.sendMessage({ action: "native_event", event: { type: 'disconnected', error: _e && _e.message } }).catch(() => {});
+        _port = null;
+    });
+    return _port;
+}
+
 chrome.runtime.onMessage.addListener((req, sender, sendResponse) => {
+    if (req.action === "download_batch") {
+        try {
+            const _id = 'b' + Date.now();
+            _native().postMessage({ type: 'download', id: _id, urls: req.urls });
+            sendResponse({ success: true, id: _id });
+        } catch (e) {
+            sendResponse({ success: false, native: false });
+        }
+        return;
+    }
+    if (req.action === "cancel_batch") {
+        if (_port) _port.postMessage({ type: 'cancel', id: req.id });
+        sendResponse({ success: !!_port });
+        return;
+    }
     if (req.action === "download_video") {
         (async () => {
             try {
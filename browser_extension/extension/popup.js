@@ -13,9 +13,34 @@ document.addEventListener('DOMContentLoaded', async () => {
         _i.value = _tab.url;
     }
 
+    // Batch progress from the native engine, relayed by background.js
+    let _batch = null;
+    chrome.runtime.onMessage.addListener((req) => {
+        if (req.action !== 'native_event' || !_batch) return;
+        const ev = req.event;
+        if (ev.type === 'disconnected') { _stat('Engine not installed (sora-native-host install)', 'error'); _batch = null; return; }
+        if (ev.id !== _batch.id) return;
+        if (ev.type === 'done') _batch.done++;
+        if (ev.type === 'failed') _batch.failed++;
+        if (ev.type === 'progress' && ev.total) _batch.pct = Math.round(ev.downloaded * 100 / ev.total);
+        if (ev.type === 'finished') { _stat(`Done: ${ev.downloaded} saved, ${ev.failed} failed`, ev.failed ? 'error' : 'success'); _batch = null; return; }
+        _stat(`${_batch.done}/${_batch.count} saved` + (_batch.failed ? `, ${_batch.failed} failed` : '') + ` (${_batch.pct || 0}%)`, 'info');
+    });
+
     _b.addEventListener('click', async () => {
         const _v = _i.value.trim();
         if (!_v) { _stat('Feed me a URL', 'error'); return; }
+
+        // Several links: hand the whole batch to the local engine
+        // (a text input drops pasted newlines, so split before each scheme too)
+        const _all = _v.split(/\s+|(?=https?:\/\/)/).filter((u) => u.indexOf('sora') > -1);
+        if (_all.length > 1) {
+            chrome.runtime.sendMessage({ action: 'download_batch', urls: _all }, (r) => {
+                if (r && r.success) { _batch = { id: r.id, count: _all.length, done: 0, failed: 0 }; _stat(`Sent ${_all.length} videos to the engine`, 'info'); }
+                else _stat('Engine not available', 'error');
+            });
+            return;
+        }
         if (_v.indexOf('sora') === -1) { _stat('Invalid Link', 'error'); return; }
 
         _load(true);
@@ -0,0 +1,256 @@
+"""
+Benchmark: the Playwright/Camoufox resolution path, offline.
+
+Serves tests/fixture_site.py (an SPA imitation of a Sora share page that
+loads its /MP4/ video late, among decoy assets and a beaconing tracker) and
+runs SoraPlaywrightDownloader against it end to end, with browserless
+resolution off so the browser always does the work.
+
+Per resolution it reports:
+  capture  time until the video URL was intercepted
+  ttfb     time until the first byte of the actual download
+  total    time until the file was on disk
+  rss      peak RSS of the browser processes (Linux)
+  page KB  bytes the browser pulled from the site (assets, trackers, video)
+
+Modes: "cold" launches a browser per video (download()), "pooled" reuses one
+browser and opens a page per video (browser() + resolve()), "daemon" uses a
+running sora-browser-daemon.
+
+Save medians with --json and compare a later run against them with
+--baseline; a metric worse than --max-regression fails the run, so CI can
+guard waiting, blocking and pooling changes.
+
+Requires: pip install camoufox playwright (or playwright install firefox)
+
+Usage:
+    python scripts/benchmark_browser.py --runs 5 --mode cold pooled --json baseline.json
+    python scripts/benchmark_browser.py --runs 5 --baseline baseline.json --max-regression 0.25
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from fixture_site import BENCH_HEADER, FixtureSite
+from src.browser_daemon import DEFAULT_DAEMON_DIR
+from src.page_resolver import classify_video_url
+from src.sora_playwright_downloader import SoraPlaywrightDownloader
+
+METRICS = ('capture_s', 'ttfb_s', 'total_s', 'rss_mb', 'page_kb')
+
+
+class InstrumentedDownloader(SoraPlaywrightDownloader):
+    """Records when the video URL is intercepted and tags its own requests."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.headers[BENCH_HEADER] = '1'
+        self.captured_at = None
+
+    def _classify_video_url(self, url):
+        kind = classify_video_url(url)
+        if kind == "cdn" and self.captured_at is None:
+            self.captured_at = time.perf_counter()
+        return kind
+
+
+def _children():
+    """Parent pid -> child pids, from /proc (empty elsewhere)."""
+    children = {}
+    try:
+        pids = [int(p) for p in os.listdir('/proc') if p.isdigit()]
+    except OSError:
+        return children
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                # The command name may contain spaces; fields resume after ')'
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(pid)
+    return children
+
+
+def descendants_rss(root=None):
+    """Summed RSS in bytes of all descendants of `root` (default: this process)."""
+    children = _children()
+    stack = list(children.get(root or os.getpid(), []))
+    total = 0
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            pass
+    return total
+
+
+class RssSampler:
+    """Peak descendant RSS, sampled in the background."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, descendants_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def measure(site, downloader, resolve_and_download, post_id):
+    """Run one resolution + download and collect its metrics."""
+    downloader.captured_at = None
+    start = time.perf_counter()
+    with RssSampler() as rss:
+        resolve_and_download(site.share_url(post_id))
+    end = time.perf_counter()
+
+    traffic = site.summary(since=start)
+    elapsed = lambda t: t - start if t is not None else None
+    return {
+        'capture_s': elapsed(downloader.captured_at),
+        'ttfb_s': elapsed(traffic['transfer_first_byte']),
+        'total_s': end - start,
+        'rss_mb': rss.peak / (1024 * 1024) if rss.peak else None,
+        'page_kb': traffic['browser_bytes'] / 1024,
+        'requests': traffic['requests'],
+        'trackers': traffic['tracker_requests'],
+    }
+
+
+def run_mode(mode, site, runs, output_dir, headless):
+    """Metrics for each run of one mode."""
+    downloader = InstrumentedDownloader(
+        headless=headless, browserless=False,
+        daemon_dir=DEFAULT_DAEMON_DIR if mode == 'daemon' else None
+    )
+    if mode == 'daemon' and not downloader.warm_daemon():
+        raise SystemExit("❌ --mode daemon needs a running daemon: sora-browser-daemon start")
+
+    def output(url):
+        return os.path.join(output_dir, f"{mode}_{url.rsplit('/', 1)[1]}.mp4")
+
+    post_ids = [f"s_{mode[:4].encode().hex()}{i:08x}" for i in range(runs)]
+    if mode != 'pooled':
+        return [measure(site, downloader, lambda url: downloader.download(url, output(url)), post_id)
+                for post_id in post_ids]
+
+    results = []
+    # Launch cost is paid once, outside the measured resolutions
+    with downloader.browser() as new_page:
+        for post_id in post_ids:
+            def resolve_and_download(url):
+                page = new_page()
+                try:
+                    video_url, _ = downloader.resolve(page, url)
+                finally:
+                    page.close()
+                downloader._download_video(video_url, output(url))
+            results.append(measure(site, downloader, resolve_and_download, post_id))
+    return results
+
+
+def medians(rows):
+    summary = {}
+    for metric in METRICS:
+        values = [row[metric] for row in rows if row[metric] is not None]
+        summary[metric] = statistics.median(values) if values else None
+    return summary
+
+
+def regressions(current, baseline, tolerance):
+    """(mode, metric, baseline, current) for every metric worse than allowed."""
+    found = []
+    for mode, metrics in current.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(mode, {}).get(metric)
+            if value is not None and reference and value > reference * (1 + tolerance):
+                found.append((mode, metric, reference, value))
+    return found
+
+
+def _fmt(value, digits=2):
+    return f"{value:.{digits}f}" if value is not None else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the browser resolution path')
+    parser.add_argument('--runs', type=int, default=5, help='Resolutions per mode')
+    parser.add_argument('--mode', nargs='+', choices=['cold', 'pooled', 'daemon'], default=['cold', 'pooled'])
+    parser.add_argument('--media-delay', type=float, default=0.5,
+                        help='Seconds the fixture app waits before loading the video')
+    parser.add_argument('--video-mb', type=float, default=2, help='Size of the fixture video')
+    parser.add_argument('--visible', action='store_true', help='Show the browser window')
+    parser.add_argument('--json', help='Write per-mode medians to this file')
+    parser.add_argument('--baseline', help='Medians from an earlier --json run to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Allowed slowdown/growth over the baseline (default: 0.25 = 25%%)')
+    args = parser.parse_args()
+
+    results = {}
+    with FixtureSite(media_delay=args.media_delay, video_bytes=int(args.video_mb * 1024 * 1024)) as site, \
+            tempfile.TemporaryDirectory() as output_dir:
+        for mode in args.mode:
+            rows = run_mode(mode, site, args.runs, output_dir, not args.visible)
+            results[mode] = medians(rows)
+
+            print(f"\n{mode.upper()}")
+            print(f"{'run':>3} | {'capture s':>9} | {'ttfb s':>7} | {'total s':>7} | {'rss MB':>7} | "
+                  f"{'page KB':>8} | {'reqs':>4} | {'trackers':>8}")
+            print("-" * 76)
+            for i, row in enumerate(rows, 1):
+                print(f"{i:>3} | {_fmt(row['capture_s']):>9} | {_fmt(row['ttfb_s']):>7} | "
+                      f"{_fmt(row['total_s']):>7} | {_fmt(row['rss_mb'], 0):>7} | {_fmt(row['page_kb'], 0):>8} | "
+                      f"{row['requests']:>4} | {row['trackers']:>8}")
+
+    print("\n" + "=" * 76)
+    print("BROWSER PATH - MEDIANS")
+    print("=" * 76)
+    print(f"{'mode':<8} | {'capture s':>9} | {'ttfb s':>7} | {'total s':>7} | {'rss MB':>7} | {'page KB':>8}")
+    print("-" * 76)
+    for mode, row in results.items():
+        print(f"{mode:<8} | {_fmt(row['capture_s']):>9} | {_fmt(row['ttfb_s']):>7} | {_fmt(row['total_s']):>7} | "
+              f"{_fmt(row['rss_mb'], 0):>7} | {_fmt(row['page_kb'], 0):>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        worse = regressions(results, baseline, args.max_regression)
+        for mode, metric, reference, value in worse:
+            print(f"❌ {mode} {metric}: {value:.2f} vs baseline {reference:.2f}")
+        if worse:
+            sys.exit(1)
+        print(f"✅ Within {args.max_regression:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,7 @@ import statistics
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.sora_downloader import SoraVideoDownloader
-
-def clean_url(line):
-    # Remove whitespace, trailing commas, trailing dots
-    return line.strip().rstrip(',').rstrip('.')
+from src.url_ingest import iter_urls
 
 def main():
     urls_file = 'test_urls.txt'
@@ -17,10 +14,8 @@ def main():
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         
-    with open(urls_file, 'r') as f:
-        urls = [clean_url(line) for line in f if line.strip()]
-        
-    print(f"Found {len(urls)} videos to download.")
+    # Streamed, canonicalized and de-duplicated; never held in memory as a list
+    urls = (item.url for item in iter_urls(urls_file))
     
     downloader = SoraVideoDownloader()
     times = []
@@ -30,13 +25,10 @@ def main():
     print("-" * 60)
     
     for i, url in enumerate(urls, 1):
-        if not url.startswith('http'):
-            continue
-            
         start_time = time.time()
         try:
             # First extract info to get title for filename
-            print(f"[{i}/{len(urls)}] Processing...", end='\r')
+            print(f"[{i}] Processing...", end='\r')
             video_info = downloader.extract_video_info(url)
             
             # Construct filename in download_vids folder
@@ -0,0 +1,178 @@
+"""
+Benchmark: HTTP/2 multiplexing vs the HTTP/1.1 requests pool for small,
+latency-bound API calls (the shape of api-proxy / thumbnail-proxy traffic).
+
+Starts two local servers that answer a small JSON document after a fixed
+delay - an HTTP/1.1 threaded server and a cleartext HTTP/2 (h2c) server -
+then fires the same number of requests at each from a thread pool.
+
+Requires: pip install "httpx[http2]"
+
+Usage:
+    python scripts/benchmark_http2.py --requests 2000 --concurrency 200 --delay-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+import h2.settings
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.http2_transport import Http2Transport
+
+BODY = json.dumps({'post_id': 's_693b10946d588191b354320369fbf4e3', 'title': 'benchmark'}).encode()
+
+
+class H1Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    delay = 0.02
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class H2Protocol(asyncio.Protocol):
+    """Minimal h2c server: answers every stream with BODY after a delay."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False)
+        )
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.conn.initiate_connection()
+        self.conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 1000})
+        transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        try:
+            events = self.conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self.transport.close()
+            return
+        loop = asyncio.get_running_loop()
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                loop.call_later(self.delay, self.respond, event.stream_id)
+        self.transport.write(self.conn.data_to_send())
+
+    def respond(self, stream_id):
+        if self.transport.is_closing():
+            return
+        self.conn.send_headers(stream_id, [
+            (':status', '200'),
+            ('content-type', 'application/json'),
+            ('content-length', str(len(BODY))),
+        ])
+        self.conn.send_data(stream_id, BODY, end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+def start_h1(delay):
+    H1Handler.delay = delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), H1Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/api-proxy/x"
+
+
+def start_h2(delay):
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    holder = {}
+
+    async def serve():
+        server = await loop.create_server(lambda: H2Protocol(delay), '127.0.0.1', 0)
+        holder['port'] = server.sockets[0].getsockname()[1]
+        ready.set()
+        await server.serve_forever()
+
+    threading.Thread(target=lambda: loop.run_until_complete(serve()), daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{holder['port']}/api-proxy/x"
+
+
+def run(get, total, concurrency):
+    latencies = []
+
+    def one(_):
+        start = time.perf_counter()
+        response = get()
+        response.raise_for_status()
+        response.json()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP/2 vs HTTP/1.1 request rate for small API calls')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--delay-ms', type=float, default=20, help='Simulated server latency')
+    parser.add_argument('--h1-pool', type=int, default=None,
+                        help='HTTP/1.1 connection pool size (default: one per worker)')
+    args = parser.parse_args()
+
+    delay = args.delay_ms / 1000
+    h1_url = start_h1(delay)
+    h2_url = start_h2(delay)
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=args.h1_pool or args.concurrency, pool_block=True)
+    session.mount('http://', adapter)
+    h1 = run(lambda: session.get(h1_url, timeout=30), args.requests, args.concurrency)
+
+    transport = Http2Transport(max_connections=1, prior_knowledge=True)
+    h2 = run(lambda: transport.get(h2_url, timeout=30), args.requests, args.concurrency)
+    transport.close()
+
+    print("=" * 60)
+    print("HTTP/2 vs HTTP/1.1 - SMALL REQUEST BENCHMARK")
+    print("=" * 60)
+    print(f"Requests: {args.requests}  Concurrency: {args.concurrency}  Server delay: {args.delay_ms} ms")
+    print(f"{'Transport':<28} | {'req/s':>8} | {'p50 ms':>7} | {'p99 ms':>7}")
+    print("-" * 60)
+    h1_label = f"HTTP/1.1 ({args.h1_pool or args.concurrency} conns)"
+    print(f"{h1_label:<28} | {h1['rps']:8.0f} | {h1['p50_ms']:7.1f} | {h1['p99_ms']:7.1f}")
+    print(f"{'HTTP/2 (1 conn)':<28} | {h2['rps']:8.0f} | {h2['p50_ms']:7.1f} | {h2['p99_ms']:7.1f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
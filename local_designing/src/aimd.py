@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+AIMD Concurrency - Find the right number of requests in flight at runtime
+
+A fixed worker count is either too low (bandwidth left unused) or too high
+(429s from the worker, per-connection throttling). An AimdController grows
+its limit additively while completions come back clean and aggregate
+throughput keeps improving, and cuts it multiplicatively on congestion:
+throttling/5xx/timeouts, or latency inflating without a throughput gain.
+
+Waiting requests are admitted lowest priority value first (FIFO by
+default), so a scheduler's ordering survives the wait for a free slot.
+
+Decisions are made once per window of roughly `limit` completions (one
+"round trip" of the pipeline). Congestion signals from requests started
+before the last cut are ignored, so one burst of 429s causes one cut.
+
+Date: 2026-10-19
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from .endpoints import RETRYABLE_STATUS
+except ImportError:
+    from endpoints import RETRYABLE_STATUS
+
+
+def is_congestion(error):
+    """
+    True if an exception means "slow down" rather than "this item is bad".
+
+    HTTP errors count for 429/5xx; other network errors (timeouts, resets)
+    always count.
+    """
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return response.status_code in RETRYABLE_STATUS
+    return isinstance(error, OSError)
+
+
+class Slot:
+    """One admitted request; report what it transferred before leaving."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.nbytes = 0
+
+    def done(self, nbytes: int = 0):
+        self.nbytes = nbytes
+
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight work.
+
+    Example:
+        metadata = AimdController('metadata', initial=2, maximum=32)
+        with metadata.slot() as slot:
+            info = downloader.extract_video_info(url)
+    """
+
+    def __init__(self, name: str, initial: int = 2, minimum: int = 1, maximum: int = 32,
+                 increase: float = 1.0, decrease: float = 0.5, latency_tolerance: float = 2.0,
+                 min_window: int = 3):
+        """
+        Args:
+            name: Label for reports (e.g. "metadata", "transfer")
+            initial: Starting limit
+            minimum: Floor the limit never drops below
+            maximum: Ceiling the limit never grows above
+            increase: Added to the limit after a clean, saturated window
+            decrease: Factor applied to the limit on congestion
+            latency_tolerance: Median latency above this multiple of the
+                baseline (lowest recent median) counts as inflation
+            min_window: Fewest completions per decision
+        """
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError("AIMD limits need 1 <= minimum <= initial <= maximum")
+        if not 0 < decrease < 1:
+            raise ValueError("AIMD decrease must be between 0 and 1")
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.min_window = min_window
+
+        self.in_flight = 0
+        self.completed = 0
+        self.congestion_events = 0
+        self.increases = 0
+        self.decreases = 0
+        self.peak_limit = self.limit
+        self.base_latency = None
+        self._last_throughput = None
+        self._last_cut = 0.0
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._arrivals = itertools.count()
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window_start = time.monotonic()
+        self._latencies = []
+        self._bytes = 0
+        self._congested = False
+        self._saturated = self.in_flight >= int(self.limit)
+
+    def acquire(self, priority: float = None):
+        """
+        Wait for room under the limit and return a Slot.
+
+        Args:
+            priority: Lower values are admitted first (default: arrival order)
+        """
+        with self._cond:
+            arrival = next(self._arrivals)
+            ticket = (arrival if priority is None else priority, arrival)
+            heapq.heappush(self._waiting, ticket)
+            while self._waiting[0] != ticket or self.in_flight >= int(self.limit):
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            # The next waiter may fit too
+            self._cond.notify_all()
+            self.in_flight += 1
+            if self.in_flight >= int(self.limit):
+                self._saturated = True
+        return Slot()
+
+    def release(self, slot, error=None):
+        """
+        Return a slot, feeding its outcome into the controller.
+
+        Args:
+            slot: From acquire()
+            error: The exception the request raised, if any; only congestion
+                errors (see is_congestion) influence the limit
+        """
+        latency = time.monotonic() - slot.started
+        with self._cond:
+            self.in_flight -= 1
+            if error is None:
+                self.completed += 1
+                self._latencies.append(latency)
+                self._bytes += slot.nbytes
+            elif is_congestion(error) and slot.started >= self._last_cut:
+                self.congestion_events += 1
+                self._congested = True
+            if self._congested or len(self._latencies) >= max(self.min_window, int(self.limit)):
+                self._adjust()
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: float = None):
+        """acquire/release around a block; exceptions are classified and re-raised."""
+        slot = self.acquire(priority)
+        try:
+            yield slot
+        except Exception as e:
+            self.release(slot, e)
+            raise
+        else:
+            self.release(slot)
+
+    def _cut(self):
+        self.limit = max(float(self.minimum), self.limit * self.decrease)
+        self.decreases += 1
+        self._last_cut = time.monotonic()
+
+    def _adjust(self):
+        # Called with the lock held at the end of a window
+        if self._congested:
+            self._cut()
+            self._last_throughput = None
+            self._reset_window()
+            return
+
+        elapsed = max(time.monotonic() - self._window_start, 1e-6)
+        # Bytes/s when the stage moves data, completions/s otherwise
+        throughput = (self._bytes or len(self._latencies)) / elapsed
+        latencies = sorted(self._latencies)
+        median = latencies[len(latencies) // 2]
+
+        # The baseline slowly forgets, so it can follow a service that got slower
+        if self.base_latency is None:
+            self.base_latency = median
+        else:
+            self.base_latency = min(median, self.base_latency * 1.05)
+
+        inflated = median > self.base_latency * self.latency_tolerance
+        improved = self._last_throughput is None or throughput > self._last_throughput * 1.05
+        if inflated and not improved:
+            self._cut()
+        elif self._saturated and self.limit < self.maximum:
+            # Only grow when the limit was what held work back
+            self.limit = min(float(self.maximum), self.limit + self.increase)
+            self.increases += 1
+            self.peak_limit = max(self.peak_limit, self.limit)
+
+        self._last_throughput = throughput
+        self._reset_window()
+
+    def report(self):
+        """
+        Controller state for summaries.
+
+        Returns:
+            dict: name, limit, peak_limit, in_flight, completed,
+                congestion_events, increases, decreases, base_latency_ms
+        """
+        with self._cond:
+            return {
+                'name': self.name,
+                'limit': int(self.limit),
+                'peak_limit': int(self.peak_limit),
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'congestion_events': self.congestion_events,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'base_latency_ms': self.base_latency * 1000 if self.base_latency is not None else None,
+            }
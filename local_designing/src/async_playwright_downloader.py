@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Sora Video Downloader (Async Playwright/Camoufox Edition)
+Resolves many Sora pages concurrently inside a single browser.
+
+Each resolution gets its own page, context and capture state, so one
+downloader instance can be shared by any number of coroutines. A semaphore
+bounds the number of open pages.
+
+Date: 2026-10-19
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from contextlib import AsyncExitStack
+
+try:
+    from .browser_session import DEFAULT_SESSION_DIR, looks_like_challenge
+    from .media_select import MediaPolicy
+    from .proxy_pool import ProxyPool, add_proxy_arguments, print_report, proxies_from_args
+    from .sora_playwright_downloader import (
+        CAMOUFOX_AVAILABLE, PAGE_SNAPSHOT_SCRIPT, PLAYWRIGHT_AVAILABLE, SNAPSHOT_TIMEOUT_MS,
+        SoraPlaywrightDownloader,
+    )
+except ImportError:
+    from browser_session import DEFAULT_SESSION_DIR, looks_like_challenge
+    from media_select import MediaPolicy
+    from proxy_pool import ProxyPool, add_proxy_arguments, print_report, proxies_from_args
+    from sora_playwright_downloader import (
+        CAMOUFOX_AVAILABLE, PAGE_SNAPSHOT_SCRIPT, PLAYWRIGHT_AVAILABLE, SNAPSHOT_TIMEOUT_MS,
+        SoraPlaywrightDownloader,
+    )
+
+
+class _Capture:
+    """
+    Video URLs captured for one page.
+    """
+
+    def __init__(self):
+        self.video_url = None
+        self.video_urls = []
+
+
+class AsyncSoraPlaywrightDownloader(SoraPlaywrightDownloader):
+    """
+    Async counterpart of SoraPlaywrightDownloader.
+
+    Example:
+        async with AsyncSoraPlaywrightDownloader(max_pages=8) as downloader:
+            results = await downloader.download_many(urls, "download_vids")
+    """
+
+    def __init__(self, proxy: str = None, headless: bool = True, timeout: int = 60,
+                 max_pages: int = 8, session_dir: str = None, media_policy='best'):
+        """
+        Initialize the downloader.
+
+        Args:
+            proxy: Optional proxy URL, list of URLs or ProxyPool; the browser
+                uses one proxy, video transfers rotate through all of them
+            headless: Run in headless mode
+            timeout: Page load timeout in seconds
+            max_pages: Maximum number of pages open at once
+            session_dir: Directory with saved cookies/storage shared by all pages
+            media_policy: Which captured rendition to download (see media_select.py)
+        """
+        super().__init__(proxy=proxy, headless=headless, timeout=timeout, session_dir=session_dir,
+                         media_policy=media_policy)
+        self.max_pages = max_pages
+        # Created in start(): before Python 3.10 they bind to the event loop
+        # current at construction, not the one asyncio.run() starts later
+        self._pages = None
+        self._start_lock = None
+        self._stack = None
+        self._browser = None
+        self._uses_camoufox = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """
+        Launch the shared browser (idempotent, safe to race).
+        """
+        if self._start_lock is None:
+            # No await since the check, so concurrent callers cannot both create them
+            self._start_lock = asyncio.Lock()
+            self._pages = asyncio.Semaphore(self.max_pages)
+        async with self._start_lock:
+            if self._browser is not None:
+                return
+
+            stack = AsyncExitStack()
+            launch_proxy = {}
+            if self.proxy_pool:
+                # One egress proxy for this browser's lifetime
+                lease = self.proxy_pool.acquire()
+                self._browser_proxy = lease
+                stack.callback(lease.release)
+                if lease.playwright:
+                    launch_proxy['proxy'] = lease.playwright
+            if CAMOUFOX_AVAILABLE:
+                from camoufox.async_api import AsyncCamoufox
+
+                print("🦊 Using Camoufox (anti-detect mode, async)...")
+                headless_mode = "virtual" if self.headless else False
+                self._browser = await stack.enter_async_context(
+                    AsyncCamoufox(headless=headless_mode, **launch_proxy)
+                )
+                self._uses_camoufox = True
+            elif PLAYWRIGHT_AVAILABLE:
+                from playwright.async_api import async_playwright
+
+                print("⚠️ Camoufox not installed, using standard Playwright (may get blocked)")
+                p = await stack.enter_async_context(async_playwright())
+                self._browser = await p.firefox.launch(
+                    headless=self.headless,
+                    args=['--disable-blink-features=AutomationControlled'],
+                    **launch_proxy
+                )
+                stack.push_async_callback(self._browser.close)
+            else:
+                raise RuntimeError(
+                    "Neither Camoufox nor Playwright is installed!\n"
+                    "Install with: pip install camoufox playwright && camoufox fetch"
+                )
+            self._stack = stack
+
+    async def close(self):
+        if self._stack is not None:
+            await self._stack.aclose()
+        self._stack = None
+        self._browser_proxy = None
+        self._browser = None
+
+    async def _new_context(self):
+        if self._uses_camoufox:
+            return await self._browser.new_context(**self._context_options())
+
+        context = await self._browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent=self.headers['User-Agent'],
+            locale='en-US',
+            **self._context_options(self.headers['User-Agent'])
+        )
+        # Hide webdriver
+        await context.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+        """)
+        return context
+
+    async def _setup_request_interception(self, page, capture):
+        """
+        Capture CDN video URLs into this page's own capture state.
+        """
+        async def handle_request(route, request):
+            url = request.url
+            kind = self._classify_video_url(url)
+
+            if kind and url not in capture.video_urls:
+                capture.video_urls.append(url)
+            if kind == "cdn":
+                print(f"📹 Captured video URL: {url[:80]}...")
+                capture.video_url = url
+            elif kind == "alt" and not capture.video_url:
+                print(f"📹 Captured video URL (alt): {url[:80]}...")
+                capture.video_url = url
+
+            await route.continue_()
+
+        await page.route("**/*", handle_request)
+
+    async def _page_snapshot(self, page) -> dict:
+        """
+        Collect all DOM fallbacks in one evaluation with a hard deadline.
+        """
+        try:
+            handle = await page.wait_for_function(PAGE_SNAPSHOT_SCRIPT, arg=self._snapshot_args(),
+                                                  timeout=SNAPSHOT_TIMEOUT_MS)
+            return await handle.json_value()
+        except Exception as e:
+            print(f"⚠️ DOM snapshot failed: {e}")
+            return {}
+
+    async def _after_resolution(self, page, context, found: bool):
+        """
+        Save the shared session after a success; drop it on a challenge page
+        (which also counts against the browser's proxy).
+        """
+        if not self.session and not self._browser_proxy:
+            return
+        try:
+            challenged = looks_like_challenge(await page.title(), page.url)
+            if self._browser_proxy:
+                if challenged:
+                    self._browser_proxy.failure("Cloudflare challenge")
+                elif found:
+                    self._browser_proxy.success()
+            if not self.session:
+                return
+            if challenged:
+                self.session.invalidate("Cloudflare challenge on page")
+            elif found:
+                user_agent = await page.evaluate("() => navigator.userAgent")
+                self.session.save_state(await context.storage_state(), user_agent)
+        except Exception as e:
+            print(f"⚠️ Could not update browser session: {e}")
+
+    async def resolve(self, sora_url: str):
+        """
+        Resolve a Sora share URL to its CDN video URL and title.
+
+        Returns:
+            Tuple of (video_url, title)
+        """
+        if 'sora' not in sora_url.lower():
+            raise ValueError("URL must be a Sora share link")
+
+        resolved = await asyncio.to_thread(self.resolve_without_browser, sora_url)
+        if resolved:
+            return resolved
+
+        await self.start()
+
+        async with self._pages:
+            context = await self._new_context()
+            try:
+                page = await context.new_page()
+                page.set_default_timeout(self.timeout)
+
+                capture = _Capture()
+                await self._setup_request_interception(page, capture)
+
+                print(f"🌐 Navigating to: {sora_url}")
+                try:
+                    await page.goto(sora_url, wait_until="networkidle")
+                except Exception as e:
+                    print(f"⚠️ Navigation warning: {e}")
+
+                # Wait for video to potentially load
+                await page.wait_for_timeout(3000)
+
+                snapshot = await self._page_snapshot(page)
+                post_id = self._post_id(sora_url)
+                anchors = self._post_videos_from_snapshot(snapshot, post_id)
+                candidates = capture.video_urls + self._videos_from_snapshot(snapshot) + anchors
+                capture.video_url = await asyncio.to_thread(self._choose_media, candidates,
+                                                            anchors, post_id)
+
+                await self._after_resolution(page, context, bool(capture.video_url))
+
+                if not capture.video_url:
+                    raise ValueError(f"❌ Could not find video URL on page: {sora_url}")
+
+                return capture.video_url, self._title_from_snapshot(snapshot)
+            finally:
+                await context.close()
+
+    async def download(self, sora_url: str, output_path: str = None) -> str:
+        """
+        Resolve and download one video. The transfer runs in a worker thread.
+        """
+        video_url, title = await self.resolve(sora_url)
+
+        if not output_path:
+            output_path = self.claim_output_path('', title, sora_url)
+
+        return await asyncio.to_thread(self._download_video, video_url, output_path)
+
+    async def download_many(self, sora_urls, output_dir: str = "."):
+        """
+        Download many videos concurrently. Each output name is claimed before
+        its transfer starts, so same-title and untitled posts get distinct
+        files (see claim_output_path).
+
+        Returns:
+            List with an output path or the raised exception for each URL
+        """
+        async def one(sora_url):
+            video_url, title = await self.resolve(sora_url)
+            output_path = self.claim_output_path(output_dir, title, sora_url)
+            return await asyncio.to_thread(self._download_video, video_url, output_path)
+
+        os.makedirs(output_dir, exist_ok=True)
+        return await asyncio.gather(*(one(url) for url in sora_urls), return_exceptions=True)
+
+
+async def _run(args):
+    with open(args.urls_file, 'r') as f:
+        urls = [line.strip() for line in f if line.strip()]
+
+    proxies = proxies_from_args(args)
+    proxy_pool = ProxyPool(proxies, strategy=args.proxy_strategy) if proxies else None
+
+    start = time.time()
+    async with AsyncSoraPlaywrightDownloader(
+        proxy=proxy_pool, headless=not args.visible, timeout=args.timeout, max_pages=args.max_pages,
+        session_dir=None if args.no_session else args.session_dir, media_policy=args.media
+    ) as downloader:
+        results = await downloader.download_many(urls, args.output_dir)
+
+    failures = 0
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            failures += 1
+            print(f"❌ {url}: {result}")
+        else:
+            print(f"✅ {result}")
+
+    print(f"⏱️ {len(urls) - failures}/{len(urls)} downloaded in {time.time() - start:.2f}s")
+    if proxy_pool:
+        print_report(proxy_pool)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Download many Sora videos concurrently with one async browser',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python async_playwright_downloader.py urls.txt
+  python async_playwright_downloader.py urls.txt --max-pages 16 -d download_vids
+        """
+    )
+
+    parser.add_argument('urls_file', help='File with one Sora share URL per line')
+    parser.add_argument('-d', '--output-dir', default='download_vids', help='Output directory')
+    parser.add_argument('--max-pages', type=int, default=8, help='Maximum concurrently open pages')
+    parser.add_argument('--visible', action='store_true', help='Show browser window')
+    parser.add_argument('--timeout', type=int, default=60, help='Page load timeout in seconds')
+    parser.add_argument('--session-dir', default=DEFAULT_SESSION_DIR,
+                        help='Where cookies and local storage persist between runs')
+    parser.add_argument('--no-session', action='store_true', help='Start every page from a blank profile')
+    parser.add_argument('--media', default='best', type=MediaPolicy.parse, metavar='POLICY',
+                        help='Rendition to download: best, smallest, or bitrate:N (Mbit/s cap)')
+    add_proxy_arguments(parser)
+
+    args = parser.parse_args()
+
+    try:
+        failures = asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        print("\n⚠️ Cancelled by user")
+        sys.exit(1)
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Batch Download - Many videos through SoraVideoDownloader with adaptive concurrency
+
+Each URL goes through two stages: metadata (api-proxy) and transfer
+(download-proxy). Each stage has its own AIMD controller (see aimd.py), so
+cheap metadata calls can run wide while transfers settle at whatever the
+link and the worker tolerate. Items that hit congestion (429/5xx/timeouts)
+are retried after the controller has backed off.
+
+The batch can be ordered by expected size first (see scheduling.py), and
+both controllers admit waiting items in that order.
+
+Finished files can be handed to post-download hooks running in a process
+pool (see post_process.py); a full hook queue pauses new transfers.
+
+Date: 2026-10-19
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    from .aimd import AimdController, is_congestion
+    from .disk_io import FsyncPolicy, unique_path
+    from .mp4_probe import bounded_map
+    from .post_process import add_hook_arguments, post_processor_from_args
+    from .post_process import print_report as print_hook_report
+    from .profiling import add_profile_arguments, profile_from_args
+    from .proxy_pool import ProxyPool, add_proxy_arguments, print_report, proxies_from_args
+    from .scheduling import ORDER_POLICIES, SizeCache, makespan_lower_bound, order_by_size
+    from .sora_downloader import SoraVideoDownloader
+    from .url_ingest import extract_post_id
+except ImportError:
+    from aimd import AimdController, is_congestion
+    from disk_io import FsyncPolicy, unique_path
+    from mp4_probe import bounded_map
+    from post_process import add_hook_arguments, post_processor_from_args
+    from post_process import print_report as print_hook_report
+    from profiling import add_profile_arguments, profile_from_args
+    from proxy_pool import ProxyPool, add_proxy_arguments, print_report, proxies_from_args
+    from scheduling import ORDER_POLICIES, SizeCache, makespan_lower_bound, order_by_size
+    from sora_downloader import SoraVideoDownloader
+    from url_ingest import extract_post_id
+
+
+DOWNLOAD_INDEX_FILENAME = ".downloads.json"
+
+
+class DeadlineExceeded(Exception):
+    """The batch deadline passed before this item was started."""
+
+
+class DownloadIndex:
+    """
+    Which post each finished file belongs to, kept next to the downloads,
+    and which names downloads in progress have claimed.
+
+    File names come from titles, so a name alone does not tell two posts
+    with the same title apart; resuming goes by post ID through this index.
+    Batches writing to the same directory at the same time must share one
+    instance so their claims see each other.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, DOWNLOAD_INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self.files = self._load()
+        self._owners = {name: post_id for post_id, name in self.files.items()}
+        self._claimed = {}
+        self._dropped = set()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return {k: v for k, v in json.load(f).items() if isinstance(v, str)}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def get(self, post_id):
+        """Path of the post's finished file, or None if it has none on disk."""
+        with self._lock:
+            name = self.files.get(post_id)
+        path = os.path.join(self.output_dir, name) if name else None
+        return path if path and os.path.exists(path) else None
+
+    def owner(self, path):
+        """Post ID recorded for a file, or None."""
+        with self._lock:
+            return self._owners.get(os.path.basename(path))
+
+    def claim(self, path, post_id, keep_unindexed: bool = False):
+        """
+        Reserve an output path for a post: `path`, or a sibling name (see
+        disk_io.unique_path) when another post claimed or owns it.
+
+        Args:
+            path: Preferred path in output_dir
+            post_id: Post the file is for
+            keep_unindexed: Also treat files the index does not know as taken
+
+        Returns:
+            str: The claimed path
+        """
+        def taken(candidate):
+            name = os.path.basename(candidate)
+            owner = self._claimed.get(name) or self._owners.get(name)
+            if owner is not None:
+                return owner != post_id
+            # A file from before the index may be another post's
+            return keep_unindexed and os.path.exists(candidate)
+
+        with self._lock:
+            path = unique_path(path, post_id, taken)
+            self._claimed[os.path.basename(path)] = post_id
+        return path
+
+    def set(self, post_id, path):
+        if post_id:
+            name = os.path.basename(path)
+            with self._lock:
+                self._owners.pop(self.files.get(post_id), None)
+                previous = self._owners.get(name)
+                if previous is not None and previous != post_id:
+                    # That post's file was overwritten
+                    self.files.pop(previous, None)
+                    self._dropped.add(previous)
+                self.files[post_id] = name
+                self._owners[name] = post_id
+                self._dropped.discard(post_id)
+
+    def save(self):
+        if not self.files:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            # Keep entries that other processes saved meanwhile
+            files = {k: v for k, v in self._load().items() if k not in self._dropped}
+            files.update(self.files)
+            with open(tmp_path, 'w') as f:
+                json.dump(files, f)
+            os.replace(tmp_path, self.path)
+
+
+class BatchDownloader:
+    """
+    Download many share URLs with separately adapting stage limits.
+
+    Example:
+        batch = BatchDownloader(SoraVideoDownloader(), "download_vids")
+        for url, path, error in batch.run(urls):
+            ...
+    """
+
+    def __init__(self, downloader: SoraVideoDownloader = None, output_dir: str = "download_vids",
+                 metadata: AimdController = None, transfer: AimdController = None,
+                 max_attempts: int = 3, retry_delay: float = 0.2, order: str = 'input',
+                 size_cache: SizeCache = None, deadline: float = None, probe_workers: int = 16,
+                 skip_existing: bool = False, post_processor=None, index: DownloadIndex = None):
+        """
+        Args:
+            downloader: Configured SoraVideoDownloader (endpoints, proxies...)
+            output_dir: Directory for the videos
+            metadata: Controller for api-proxy calls (default: 4 growing to 32)
+            transfer: Controller for video transfers (default: 2 growing to 16)
+            max_attempts: Tries per stage when the failure is congestion
+            retry_delay: First backoff before a retry; doubles per attempt
+            order: Scheduling policy, one of scheduling.ORDER_POLICIES
+            size_cache: Expected sizes from earlier runs (updated as videos finish)
+            deadline: Seconds after which items not yet started are skipped
+            probe_workers: Concurrent size probes for videos not in the cache
+            skip_existing: Keep videos already in output_dir instead of
+                downloading them again. Finished files are renamed into
+                place, so an existing file is complete; which post it
+                belongs to comes from the DownloadIndex, not its name.
+            post_processor: post_process.PostProcessor receiving every newly
+                downloaded file once its transfer slot is released
+            index: DownloadIndex of output_dir, to share with other batches
+                writing there at the same time (default: a new one)
+        """
+        if order not in ORDER_POLICIES:
+            raise ValueError(f"Unknown order policy: {order}")
+        self.downloader = downloader or SoraVideoDownloader()
+        self.output_dir = output_dir
+        self.metadata = metadata or AimdController('metadata', initial=4, maximum=32)
+        self.transfer = transfer or AimdController('transfer', initial=2, maximum=16)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.order = order
+        self.size_cache = size_cache
+        self.deadline = deadline
+        self.probe_workers = probe_workers
+        self.skip_existing = skip_existing
+        self.index = index or DownloadIndex(output_dir)
+        self.post_processor = post_processor
+        self.sizes = {}
+        self.durations = []
+        self.started = None
+        self.finished = None
+        self._priorities = {}
+        self._lock = threading.Lock()
+
+    def _with_retries(self, controller, work, priority=None):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                with controller.slot(priority) as slot:
+                    return work(slot)
+            except Exception as e:
+                if attempt == self.max_attempts or not is_congestion(e):
+                    raise
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    def _fetch_metadata(self, url):
+        return self._with_retries(self.metadata, lambda slot: self.downloader.extract_video_info(url),
+                                  self._priorities.get(url))
+
+    def _claim_path(self, video_info):
+        """
+        Output path for a post, unique within the directory: a name another
+        post claimed or owns gets the post ID appended (then a counter).
+        """
+        path = os.path.join(self.output_dir, self.downloader._output_name(video_info))
+        return self.index.claim(path, video_info.get('post_id'), keep_unindexed=self.skip_existing)
+
+    def _download(self, url, video_info):
+        if self.skip_existing:
+            existing = self.index.get(video_info.get('post_id'))
+            if existing:
+                return existing
+        output_path = self._claim_path(video_info)
+
+        def work(slot):
+            path = self.downloader.download_video(url, output_path, video_info=video_info)
+            slot.done(os.path.getsize(path))
+            with self._lock:
+                self.durations.append(time.monotonic() - slot.started)
+            return path
+
+        path = self._with_retries(self.transfer, work, self._priorities.get(url))
+        self.index.set(video_info.get('post_id'), path)
+        if self.size_cache is not None:
+            self.size_cache.set(video_info.get('post_id'), os.path.getsize(path))
+        if self.post_processor is not None:
+            # Blocks while the hook queue is full, holding back the next transfer
+            self.post_processor.submit(path)
+        return path
+
+    def download_one(self, url):
+        """Both stages for one URL; returns the output path."""
+        if self.deadline is not None and self.started is not None \
+                and time.monotonic() - self.started > self.deadline:
+            raise DeadlineExceeded(f"not started within the {self.deadline:g}s deadline")
+        return self._download(url, self._fetch_metadata(url))
+
+    def _probe(self, url):
+        return self.downloader.probe_size(url)
+
+    def plan(self, urls):
+        """
+        Order URLs by the scheduling policy, learning sizes first if needed.
+
+        Sizes come from the size cache, then from parallel Range probes for
+        the rest. With the "input" policy nothing is probed and the input is
+        consumed lazily.
+
+        Returns:
+            iterable: The URLs in scheduling order
+        """
+        if self.order == 'input':
+            return urls
+
+        urls = list(urls)
+        missing = []
+        for url in urls:
+            size = self.size_cache.get(extract_post_id(url)) if self.size_cache is not None else None
+            if size:
+                self.sizes[url] = size
+            else:
+                missing.append(url)
+        for url, size, _ in bounded_map(self._probe, missing, self.probe_workers):
+            if size:
+                self.sizes[url] = size
+                if self.size_cache is not None:
+                    self.size_cache.set(extract_post_id(url), size)
+
+        ordered = order_by_size(((url, self.sizes.get(url)) for url in urls), self.order)
+        self._priorities = {url: i for i, url in enumerate(ordered)}
+        return ordered
+
+    def run(self, urls):
+        """
+        Download every URL; results stream back in completion order.
+
+        Threads are sized for both stages at their maximum; the controllers
+        decide how many of them actually do network work.
+
+        Yields:
+            tuple: (url, output path or None, exception or None)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        urls = self.plan(urls)
+        self.started = time.monotonic()
+        workers = self.metadata.maximum + self.transfer.maximum
+        try:
+            yield from bounded_map(self.download_one, urls, workers)
+        finally:
+            self.finished = time.monotonic()
+            self.index.save()
+            if self.size_cache is not None:
+                self.size_cache.save()
+
+    def report(self):
+        """Controller reports for both stages."""
+        return [self.metadata.report(), self.transfer.report()]
+
+    def schedule_report(self):
+        """
+        Achieved makespan against the best any order could have done.
+
+        Transfers are the bottleneck stage, so the lower bound uses the
+        measured transfer durations and the peak transfer limit as the
+        number of workers.
+
+        Returns:
+            dict: order, items, sized (sizes known before starting),
+                makespan, lower_bound, ratio
+        """
+        with self._lock:
+            durations = list(self.durations)
+        makespan = (self.finished or time.monotonic()) - self.started if self.started else 0.0
+        bound = makespan_lower_bound(durations, self.transfer.report()['peak_limit'])
+        return {
+            'order': self.order,
+            'items': len(durations),
+            'sized': len(self.sizes),
+            'makespan': makespan,
+            'lower_bound': bound,
+            'ratio': makespan / bound if bound else None,
+        }
+
+
+def print_controllers(batch):
+    """Print the final state of both stage controllers."""
+    print(f"\n{'Stage':<10} | {'limit':>5} | {'peak':>5} | {'done':>6} | {'+/-':>7} | {'congested':>9} | {'base ms':>8}")
+    print("-" * 72)
+    for row in batch.report():
+        base = f"{row['base_latency_ms']:.0f}" if row['base_latency_ms'] is not None else '-'
+        steps = f"{row['increases']}/{row['decreases']}"
+        print(f"{row['name']:<10} | {row['limit']:>5} | {row['peak_limit']:>5} | {row['completed']:>6} | "
+              f"{steps:>7} | {row['congestion_events']:>9} | {base:>8}")
+
+
+def print_schedule(batch):
+    """Print achieved makespan next to its lower bound."""
+    row = batch.schedule_report()
+    ratio = f" ({row['ratio']:.2f}x)" if row['ratio'] else ""
+    print(f"\n📐 Order {row['order']}: makespan {row['makespan']:.2f}s, "
+          f"lower bound {row['lower_bound']:.2f}s{ratio}; {row['sized']} sizes known up front")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Download many Sora videos, adapting concurrency to what the service allows',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python batch_download.py urls.txt
+  cat urls.txt | python batch_download.py - -d download_vids --max-transfers 8
+  python batch_download.py urls.txt --order longest-first
+  python batch_download.py urls.txt --order shortest-first --deadline 600
+  python batch_download.py urls.txt --hook faststart --hook sha256
+  python batch_download.py urls.txt --profile --profile-out batch
+        """
+    )
+
+    parser.add_argument('sources', nargs='*', default=['-'], help='Share URL files ("-" for stdin)')
+    parser.add_argument('-d', '--output-dir', default='download_vids', help='Output directory')
+    parser.add_argument('--max-metadata', type=int, default=32, help='Ceiling for concurrent API calls')
+    parser.add_argument('--max-transfers', type=int, default=16, help='Ceiling for concurrent downloads')
+    parser.add_argument('--attempts', type=int, default=3, help='Tries per stage on throttling/timeouts')
+    parser.add_argument('--faststart', action='store_true', help='Move the MP4 moov atom to the front')
+    parser.add_argument('--fsync', default='none', type=FsyncPolicy.parse, metavar='POLICY',
+                        help='Durability of finished files: none, file, or batch:N')
+    parser.add_argument('--order', choices=ORDER_POLICIES, default='input',
+                        help='Schedule by expected size: longest-first (shortest makespan), '
+                             'shortest-first (most done by a deadline) or interleave')
+    parser.add_argument('--deadline', type=float, metavar='SECONDS',
+                        help='Skip videos not started within this many seconds')
+    parser.add_argument('--skip-existing', action='store_true',
+                        help='Keep videos already in the output directory (resume a batch, by post ID)')
+    parser.add_argument('--no-size-cache', action='store_true',
+                        help='Probe every size instead of reusing sizes from earlier runs')
+    add_proxy_arguments(parser)
+    add_hook_arguments(parser)
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+    profile_from_args(args)
+
+    try:
+        from .url_ingest import iter_urls
+    except ImportError:
+        from url_ingest import iter_urls
+
+    try:
+        post_processor = post_processor_from_args(args)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    proxies = proxies_from_args(args)
+    proxy_pool = ProxyPool(proxies, strategy=args.proxy_strategy) if proxies else None
+    downloader = SoraVideoDownloader(fsync_policy=args.fsync, faststart=args.faststart, proxies=proxy_pool)
+    batch = BatchDownloader(
+        downloader, args.output_dir,
+        metadata=AimdController('metadata', initial=min(4, args.max_metadata), maximum=args.max_metadata),
+        transfer=AimdController('transfer', initial=min(2, args.max_transfers), maximum=args.max_transfers),
+        max_attempts=args.attempts, order=args.order, deadline=args.deadline,
+        skip_existing=args.skip_existing, post_processor=post_processor,
+        size_cache=None if args.no_size_cache else SizeCache(args.output_dir)
+    )
+
+    start = time.time()
+    done = failed = skipped = 0
+    try:
+        # Streamed, canonicalized and de-duplicated
+        urls = (item.url for item in iter_urls(args.sources))
+        for url, path, error in batch.run(urls):
+            if isinstance(error, DeadlineExceeded):
+                skipped += 1
+            elif error:
+                failed += 1
+                print(f"❌ {url}: {error}")
+            else:
+                done += 1
+                print(f"✅ {path}")
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted")
+    if post_processor:
+        post_processor.close()
+    downloader.fsync_policy.flush()
+
+    skipped_note = f", {skipped} skipped at the deadline" if skipped else ""
+    print(f"\n⏱️ {done} downloaded, {failed} failed{skipped_note} in {time.time() - start:.2f}s")
+    print_controllers(batch)
+    print_schedule(batch)
+    if proxy_pool:
+        print_report(proxy_pool)
+    if post_processor:
+        print_hook_report(post_processor)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
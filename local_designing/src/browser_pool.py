@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Browser Worker Pool - Parallel Playwright/Camoufox resolution
+
+The sync Playwright API cannot be shared across threads, so each worker is a
+separate process owning its own browser. Jobs are handed to idle workers over
+per-worker queues and results come back over per-worker pipes, so a worker
+dying mid-message can only break its own channel; a supervisor thread
+restarts workers that crash or hang and re-queues the job they were holding.
+
+Date: 2026-10-19
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait as wait_connections
+
+try:
+    from .browser_session import DEFAULT_SESSION_DIR
+    from .media_select import MediaPolicy
+    from .proxy_pool import ProxyPool, add_proxy_arguments, print_report, proxies_from_args
+except ImportError:
+    from browser_session import DEFAULT_SESSION_DIR
+    from media_select import MediaPolicy
+    from proxy_pool import ProxyPool, add_proxy_arguments, print_report, proxies_from_args
+
+# Rough resident size of one headless Firefox/Camoufox with a Sora page open
+DEFAULT_WORKER_MEMORY_MB = 600
+
+
+def available_memory() -> int:
+    """
+    Bytes that can be allocated without swapping, or None if unknown.
+
+    MemAvailable counts reclaimable page cache; free pages alone
+    (SC_AVPHYS_PAGES) undercount on any machine that has been reading files.
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_worker_count(memory_per_worker_mb: int = DEFAULT_WORKER_MEMORY_MB) -> int:
+    """
+    Size the pool by CPU cores and available RAM, whichever is tighter.
+    """
+    cpus = os.cpu_count() or 1
+    available = available_memory()
+    if available is None:
+        return cpus
+    by_memory = available // (memory_per_worker_mb * 1024 * 1024)
+    return max(1, min(cpus, by_memory))
+
+
+def _worker_main(worker_id, jobs, results, options):
+    """
+    Child process loop: own one browser, resolve jobs until told to stop.
+    """
+    try:
+        from .sora_playwright_downloader import SoraPlaywrightDownloader
+    except ImportError:
+        from sora_playwright_downloader import SoraPlaywrightDownloader
+
+    options = dict(options)
+    proxies = options.pop('proxies', None)
+    if proxies:
+        # Stats are per process; the offset spreads workers over the proxies
+        options['proxy'] = ProxyPool(proxies, strategy=options.pop('proxy_strategy'), offset=worker_id)
+    options.pop('proxy_strategy', None)
+    downloader = SoraPlaywrightDownloader(**options)
+
+    with downloader.browser() as new_page:
+        results.send(('ready', worker_id, None))
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+
+            job_id, sora_url = job
+            page = None
+            try:
+                resolved = downloader.resolve_without_browser(sora_url)
+                if resolved:
+                    video_url, title = resolved
+                else:
+                    page = new_page()
+                    video_url, title = downloader.resolve(page, sora_url)
+                results.send(('done', worker_id, (job_id, video_url, title, None)))
+            except Exception as e:
+                results.send(('done', worker_id, (job_id, None, None, str(e))))
+            finally:
+                if page is not None:
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+
+
+class _Worker:
+    def __init__(self, worker_id, process, jobs, results):
+        self.id = worker_id
+        self.process = process
+        self.jobs = jobs
+        self.results = results
+        self.ready = False
+        self.job = None
+        self.job_started = None
+
+
+class BrowserWorkerPool:
+    """
+    Pool of browser processes resolving Sora share URLs in parallel.
+
+    Example:
+        with BrowserWorkerPool(workers=4) as pool:
+            for video_url, title in pool.map(urls):
+                ...
+    """
+
+    # Consecutive workers dying before their browser came up; usually a missing install
+    MAX_STARTUP_FAILURES = 3
+
+    # Child process entry point: (worker_id, jobs, results, options)
+    worker_target = staticmethod(_worker_main)
+
+    def __init__(self, workers: int = None, headless: bool = True, timeout: int = 60,
+                 job_timeout: float = None, max_attempts: int = 2, session_dir: str = None,
+                 proxies=None, proxy_strategy: str = 'least-loaded', media_policy='best'):
+        """
+        Args:
+            workers: Number of browser processes (default: sized by CPU and RAM)
+            headless: Passed to each worker's SoraPlaywrightDownloader
+            timeout: Page load timeout in seconds, per worker
+            job_timeout: Seconds before a busy worker is considered hung
+                (default: twice the page timeout)
+            max_attempts: Times a job is tried before its future fails
+            session_dir: Saved browser session shared by all workers; pages
+                start from its cookies and refresh it after successes
+            proxies: Proxy URLs; each worker's browser uses one of them
+            proxy_strategy: How each worker picks its proxy (see ProxyPool)
+            media_policy: Which captured rendition each worker resolves to
+                (best, smallest or bitrate:N)
+        """
+        self.workers = workers or default_worker_count()
+        self.options = {'headless': headless, 'timeout': timeout, 'session_dir': session_dir,
+                        'proxies': list(proxies or []), 'proxy_strategy': proxy_strategy,
+                        'media_policy': str(MediaPolicy.parse(media_policy))}
+        self.job_timeout = job_timeout or timeout * 2
+        self.max_attempts = max_attempts
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._pending = deque()
+        self._futures = {}
+        self._attempts = {}
+        self._worker_ids = itertools.count()
+        self._job_ids = itertools.count()
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._supervisor = None
+        self.restarts = 0
+        self._startup_failures = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        for _ in range(self.workers):
+            self._spawn()
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+
+    def _spawn(self):
+        worker_id = next(self._worker_ids)
+        jobs = self._ctx.Queue()
+        results, child_results = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=self.worker_target,
+            args=(worker_id, jobs, child_results, self.options),
+            daemon=True,
+        )
+        process.start()
+        # Only the child writes; EOF then means the worker is gone
+        child_results.close()
+        self._workers[worker_id] = _Worker(worker_id, process, jobs, results)
+
+    def submit(self, sora_url: str) -> Future:
+        """
+        Queue a URL for resolution.
+
+        Returns:
+            Future resolving to a (video_url, title) tuple
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Pool is closed")
+            job_id = next(self._job_ids)
+            self._futures[job_id] = future
+            self._attempts[job_id] = 0
+            self._pending.append((job_id, sora_url))
+        return future
+
+    def map(self, sora_urls):
+        """
+        Resolve many URLs, yielding (video_url, title) in input order.
+        """
+        futures = [self.submit(url) for url in sora_urls]
+        for future in futures:
+            yield future.result()
+
+    def _finish(self, job_id, result=None, error=None):
+        future = self._futures.pop(job_id, None)
+        self._attempts.pop(job_id, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _retire(self, worker, reason):
+        """
+        Kill a crashed or hung worker, re-queue its job and start a replacement.
+        """
+        print(f"⚠️ Browser worker {worker.id} {reason}, restarting")
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(5)
+            if worker.process.is_alive():
+                worker.process.kill()
+        worker.results.close()
+        del self._workers[worker.id]
+
+        if worker.job is not None:
+            job_id, sora_url = worker.job
+            if self._attempts.get(job_id, 0) >= self.max_attempts:
+                self._finish(job_id, error=RuntimeError(f"Browser worker {reason}: {sora_url}"))
+            else:
+                self._pending.appendleft(worker.job)
+
+        self.restarts += 1
+        self._spawn()
+
+    def _abort(self, worker):
+        """
+        Give up when browsers cannot be launched at all: fail every queued job.
+        """
+        print(f"❌ Browser workers keep failing to start (exit code {worker.process.exitcode})")
+        error = RuntimeError(
+            "Browser workers failed to start. Install with: "
+            "pip install camoufox playwright && camoufox fetch"
+        )
+        for job_id in list(self._futures):
+            self._finish(job_id, error=error)
+        self._pending.clear()
+        self._closed = True
+
+    def _receive(self, timeout):
+        """Messages from every worker with one waiting, or [] after `timeout`."""
+        channels = {worker.results: worker for worker in list(self._workers.values())}
+        messages = []
+        for results in wait_connections(list(channels), timeout):
+            try:
+                messages.append(results.recv())
+            except (EOFError, OSError):
+                # The worker died; the liveness check below restarts it
+                pass
+        return messages
+
+    def _supervise(self):
+        while True:
+            messages = self._receive(timeout=0.5)
+
+            with self._lock:
+                for kind, worker_id, payload in messages:
+                    worker = self._workers.get(worker_id)
+                    if kind == 'ready' and worker:
+                        worker.ready = True
+                        self._startup_failures = 0
+                    elif kind == 'done':
+                        job_id, video_url, title, error = payload
+                        if worker and worker.job and worker.job[0] == job_id:
+                            worker.job = None
+                        if error:
+                            self._finish(job_id, error=ValueError(error))
+                        else:
+                            self._finish(job_id, result=(video_url, title))
+
+                now = time.monotonic()
+                for worker in list(self._workers.values()):
+                    if not worker.process.is_alive():
+                        if not worker.ready:
+                            self._startup_failures += 1
+                        if self._startup_failures >= self.MAX_STARTUP_FAILURES:
+                            self._abort(worker)
+                            return
+                        self._retire(worker, "crashed")
+                    elif worker.job and now - worker.job_started > self.job_timeout:
+                        self._retire(worker, "hung")
+
+                idle = [w for w in self._workers.values() if w.ready and w.job is None]
+                while idle and self._pending:
+                    job = self._pending.popleft()
+                    if job[0] not in self._futures:
+                        continue
+                    worker = idle.pop()
+                    worker.job = job
+                    worker.job_started = time.monotonic()
+                    self._attempts[job[0]] += 1
+                    worker.jobs.put(job)
+
+                if self._closed and not self._futures:
+                    return
+
+    def close(self, wait: bool = True):
+        """
+        Stop accepting jobs, optionally wait for queued ones, and shut workers down.
+        """
+        with self._lock:
+            self._closed = True
+            if not wait:
+                for job_id, _ in self._pending:
+                    self._finish(job_id, error=RuntimeError("Pool closed"))
+                self._pending.clear()
+
+        if self._supervisor:
+            self._supervisor.join()
+
+        for worker in self._workers.values():
+            worker.jobs.put(None)
+        for worker in self._workers.values():
+            worker.process.join(10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Resolve (and optionally download) many Sora URLs with a pool of browsers',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python browser_pool.py urls.txt
+  python browser_pool.py urls.txt --workers 4 --download-dir download_vids
+        """
+    )
+
+    parser.add_argument('urls_file', help='File with one Sora share URL per line')
+    parser.add_argument('--workers', type=int, help='Browser processes (default: by CPU/RAM)')
+    parser.add_argument('--timeout', type=int, default=60, help='Page load timeout in seconds')
+    parser.add_argument('--download-dir', help='Download resolved videos into this directory')
+    parser.add_argument('--session-dir', default=DEFAULT_SESSION_DIR,
+                        help='Where cookies and local storage persist between runs')
+    parser.add_argument('--no-session', action='store_true', help='Start every page from a blank profile')
+    parser.add_argument('--media', default='best', type=MediaPolicy.parse, metavar='POLICY',
+                        help='Rendition to download: best, smallest, or bitrate:N (Mbit/s cap)')
+    add_proxy_arguments(parser)
+
+    args = parser.parse_args()
+
+    with open(args.urls_file, 'r') as f:
+        urls = [line.strip() for line in f if line.strip()]
+
+    proxies = proxies_from_args(args)
+    proxy_pool = ProxyPool(proxies, strategy=args.proxy_strategy) if proxies else None
+
+    downloader = None
+    if args.download_dir:
+        try:
+            from .sora_playwright_downloader import SoraPlaywrightDownloader
+        except ImportError:
+            from sora_playwright_downloader import SoraPlaywrightDownloader
+        downloader = SoraPlaywrightDownloader(proxy=proxy_pool)
+        os.makedirs(args.download_dir, exist_ok=True)
+
+    start = time.time()
+    session_dir = None if args.no_session else args.session_dir
+    with BrowserWorkerPool(workers=args.workers, timeout=args.timeout, session_dir=session_dir,
+                           proxies=proxies, proxy_strategy=args.proxy_strategy,
+                           media_policy=args.media) as pool:
+        print(f"🧩 Resolving {len(urls)} URLs with {pool.workers} browser workers")
+        futures = [(url, pool.submit(url)) for url in urls]
+        for url, future in futures:
+            try:
+                video_url, title = future.result()
+            except Exception as e:
+                print(f"❌ {url}: {e}")
+                continue
+            print(f"✅ {url} -> {title or 'untitled'}")
+            if downloader:
+                output_path = downloader.claim_output_path(args.download_dir, title, url)
+                downloader._download_video(video_url, output_path)
+
+    print(f"⏱️ Done in {time.time() - start:.2f}s ({pool.restarts} worker restarts)")
+    if proxy_pool and downloader:
+        print_report(proxy_pool)
+
+
+if __name__ == "__main__":
+    main()
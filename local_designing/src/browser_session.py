@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Browser Session - Reuse Cloudflare clearance and app state between runs
+
+A cold browser solves the Cloudflare challenge and loads the whole Sora app
+shell on every run. This keeps the state that makes later visits warm:
+
+    storage_state.json - cookies (cf_clearance, __cf_bm, ...) and localStorage
+                         in Playwright's format; loaded into every new context,
+                         so pooled and async pages share one clearance
+    profile/           - a persistent Firefox profile for single downloads,
+                         which additionally keeps the HTTP cache
+    profile.lock       - held by the run using the profile; Firefox refuses
+                         to open a profile twice, so concurrent runs fall
+                         back to storage_state.json
+
+Clearance cookies are bound to the User-Agent that earned them, so the UA
+is stored alongside and a mismatch makes the state stale. When a challenge
+page shows up anyway the saved state is deleted and the next run starts
+cold.
+
+Date: 2026-10-19
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_SESSION_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'sora-downloader', 'browser-session'
+)
+
+# Title / URL markers of Cloudflare interstitials
+CHALLENGE_TITLES = ('just a moment', 'attention required', 'checking your browser')
+CHALLENGE_URL_MARKERS = ('/cdn-cgi/challenge-platform', '__cf_chl_')
+
+
+def looks_like_challenge(title=None, url=None, html=None):
+    """
+    Whether a page is a Cloudflare challenge rather than Sora content.
+    """
+    if title and title.strip().lower().startswith(CHALLENGE_TITLES):
+        return True
+    if url and any(marker in url for marker in CHALLENGE_URL_MARKERS):
+        return True
+    if html and ('cf-turnstile' in html or 'challenge-form' in html or '_cf_chl_opt' in html):
+        return True
+    return False
+
+
+class BrowserSession:
+    """
+    Saved browser state in a profile directory.
+
+    Example:
+        session = BrowserSession()
+        context = browser.new_context(storage_state=session.storage_state(user_agent))
+        ...
+        session.save_state(context.storage_state(), user_agent)
+    """
+
+    STATE_FILENAME = 'storage_state.json'
+    META_FILENAME = 'session.json'
+
+    def __init__(self, directory: str = DEFAULT_SESSION_DIR, max_age: float = 12 * 3600,
+                 min_save_interval: float = 60):
+        """
+        Args:
+            directory: Profile directory (created on first save)
+            max_age: Seconds after which saved state is not reused
+            min_save_interval: Skip saves closer together than this (many pages
+                finishing at once would otherwise rewrite the file constantly)
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self.min_save_interval = min_save_interval
+        self.state_path = os.path.join(directory, self.STATE_FILENAME)
+        self.meta_path = os.path.join(directory, self.META_FILENAME)
+        self.profile_dir = os.path.join(directory, 'profile')
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    def _meta(self):
+        try:
+            with open(self.meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def storage_state(self, user_agent: str = None):
+        """
+        Path of reusable saved state, or None if there is none or it is stale.
+        """
+        try:
+            age = time.time() - os.path.getmtime(self.state_path)
+        except OSError:
+            return None
+        if age > self.max_age:
+            return None
+
+        meta = self._meta()
+        if user_agent and meta.get('user_agent') and meta['user_agent'] != user_agent:
+            return None
+
+        now = time.time()
+        for cookie in self.cookies():
+            expires = cookie.get('expires', -1)
+            if cookie.get('name') == 'cf_clearance' and 0 < expires < now:
+                return None
+        return self.state_path
+
+    def cookies(self, domain: str = None):
+        """
+        Saved cookies (Playwright dicts), optionally only those for a domain.
+        """
+        try:
+            with open(self.state_path, 'r') as f:
+                cookies = json.load(f).get('cookies', [])
+        except (OSError, ValueError):
+            return []
+        if domain:
+            cookies = [c for c in cookies if domain.endswith(c.get('domain', '').lstrip('.'))]
+        return cookies
+
+    @contextmanager
+    def profile_lock(self):
+        """
+        Try to take the persistent profile for the duration of the block.
+
+        Yields:
+            bool: True if this run may open the profile, False if another
+            run holds it (without flock the profile is always used)
+        """
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(self.profile_dir + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            yield True
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    @property
+    def user_agent(self):
+        """User-Agent the saved clearance was obtained with."""
+        return self._meta().get('user_agent')
+
+    def _write_json(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.session.', suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def save_state(self, state, user_agent: str = None, force: bool = False):
+        """
+        Store a context's storage state (from context.storage_state()).
+
+        Returns:
+            bool: True if written, False if skipped by the save interval
+        """
+        with self._lock:
+            if not force and time.time() - self._last_save < self.min_save_interval:
+                return False
+            self._last_save = time.time()
+            os.makedirs(self.directory, exist_ok=True)
+            self._write_json(self.state_path, state)
+            self._write_json(self.meta_path, {'user_agent': user_agent, 'saved_at': time.time()})
+        return True
+
+    def invalidate(self, reason: str = None):
+        """
+        Forget saved state (e.g. a challenge reappeared despite it).
+        """
+        with self._lock:
+            for path in (self.state_path, self.meta_path):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            self._last_save = 0.0
+        if reason:
+            print(f"🔄 Browser session reset: {reason}")
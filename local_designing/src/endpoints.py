@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+API Endpoints - Failover across equivalent worker deployments
+
+The api-proxy / download-proxy / thumbnail-proxy routes can be served by
+several equivalent hosts (public mirrors, a self-hosted worker). Each
+endpoint keeps a latency histogram fed by real requests and by an optional
+background health prober; requests go to the fastest healthy endpoint and
+fail over to the next one on connection errors, timeouts and 5xx/429.
+
+Endpoints come from `--endpoint` (repeatable) or the comma-separated
+SORA_API_ENDPOINTS environment variable; the first one is preferred until
+latency data says otherwise.
+
+Date: 2026-10-19
+"""
+
+import bisect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_API_BASE = "https://api.soracdn.workers.dev"
+
+# Log-spaced bucket upper bounds in seconds: 1 ms .. ~46 s
+BUCKET_BOUNDS = [0.001 * 2 ** (i / 2) for i in range(32)]
+
+# Status codes that mean "this endpoint is unwell", not "this request is bad"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def endpoints_from_env(default=DEFAULT_API_BASE):
+    """
+    Endpoint list from SORA_API_ENDPOINTS, or just the default.
+    """
+    value = os.environ.get('SORA_API_ENDPOINTS', '')
+    bases = [b.strip() for b in value.split(',') if b.strip()]
+    return bases or [default]
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-bucket histogram; old samples decay by halving.
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.max_samples = max_samples
+        self.total = 0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.total += 1
+        if self.total > self.max_samples:
+            self.counts = [c // 2 for c in self.counts]
+            self.total = sum(self.counts)
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket holding the p-th percentile (seconds), or None.
+        """
+        if not self.total:
+            return None
+        rank = p / 100 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else float('inf')
+        return float('inf')
+
+
+class Endpoint:
+    """One API base URL and its observed health."""
+
+    def __init__(self, base, index):
+        self.base = base.rstrip('/')
+        self.index = index
+        self.latency = LatencyHistogram()
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+
+    @property
+    def healthy(self):
+        return self.consecutive_failures < EndpointPool.FAILURE_THRESHOLD
+
+    def sort_key(self):
+        p50 = self.latency.percentile(50)
+        return (not self.healthy, p50 if p50 is not None else float('inf'), self.index)
+
+
+class EndpointPool:
+    """
+    Route API URLs to the fastest healthy endpoint.
+
+    Example:
+        pool = EndpointPool(["https://a.example", "https://b.example"])
+        pool.start_prober()
+        response = pool.request(f"{pool.base}/api-proxy/...", session.get)
+    """
+
+    # Consecutive failures before an endpoint is only used as a last resort
+    FAILURE_THRESHOLD = 3
+
+    def __init__(self, bases=None, probe_interval: float = 30, probe_timeout: float = 10):
+        """
+        Args:
+            bases: Equivalent API base URLs, in order of preference
+            probe_interval: Seconds between background health probes
+            probe_timeout: Timeout of each probe request
+        """
+        bases = list(dict.fromkeys(b.rstrip('/') for b in (bases or [DEFAULT_API_BASE])))
+        self.endpoints = [Endpoint(base, i) for i, base in enumerate(bases)]
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._prober = None
+
+    @property
+    def base(self):
+        """Base URL of the currently preferred endpoint."""
+        return self.ordered()[0].base
+
+    def ordered(self):
+        """Endpoints in the order they should be tried."""
+        with self._lock:
+            return sorted(self.endpoints, key=Endpoint.sort_key)
+
+    def _split(self, url):
+        for endpoint in self.endpoints:
+            if url == endpoint.base or url.startswith(endpoint.base + '/') or url.startswith(endpoint.base + '?'):
+                return url[len(endpoint.base):]
+        return None
+
+    def record_success(self, endpoint, seconds):
+        with self._lock:
+            endpoint.latency.record(seconds)
+            endpoint.successes += 1
+            endpoint.consecutive_failures = 0
+
+    def record_failure(self, endpoint, error):
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            endpoint.last_error = str(error)
+
+    def request(self, url, send):
+        """
+        Send a request, failing over between endpoints.
+
+        Args:
+            url: URL under any configured endpoint (other URLs are sent as-is)
+            send: Callable(url) -> requests-style response
+
+        Returns:
+            The first response that is not a connection error or 5xx/429
+            (the last endpoint's response is returned even if it is one)
+        """
+        path = self._split(url)
+        if path is None:
+            return send(url)
+
+        endpoints = self.ordered()
+        last_error = None
+        for i, endpoint in enumerate(endpoints):
+            start = time.perf_counter()
+            try:
+                response = send(endpoint.base + path)
+            except OSError as e:  # requests exceptions derive from IOError
+                self.record_failure(endpoint, e)
+                last_error = e
+                continue
+            if response.status_code in RETRYABLE_STATUS:
+                self.record_failure(endpoint, f"HTTP {response.status_code}")
+                if i < len(endpoints) - 1:
+                    response.close()
+                    continue
+                return response
+            self.record_success(endpoint, time.perf_counter() - start)
+            return response
+        raise last_error
+
+    def probe_once(self, get):
+        """
+        Probe every endpoint concurrently.
+
+        Args:
+            get: Callable(url, timeout) -> response
+        """
+        def probe(endpoint):
+            start = time.perf_counter()
+            try:
+                response = get(endpoint.base, timeout=self.probe_timeout)
+                response.close()
+            except OSError as e:
+                self.record_failure(endpoint, e)
+                return
+            if response.status_code >= 500 or response.status_code == 429:
+                self.record_failure(endpoint, f"HTTP {response.status_code}")
+            else:
+                self.record_success(endpoint, time.perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=len(self.endpoints)) as pool:
+            list(pool.map(probe, self.endpoints))
+
+    def start_prober(self, get):
+        """Probe all endpoints every probe_interval seconds in a daemon thread."""
+        if self._prober is not None:
+            return
+
+        def run():
+            while not self._stop.is_set():
+                self.probe_once(get)
+                self._stop.wait(self.probe_interval)
+
+        self._prober = threading.Thread(target=run, name="endpoint-prober", daemon=True)
+        self._prober.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._prober is not None:
+            self._prober.join(timeout=self.probe_timeout + 1)
+            self._prober = None
+
+    def report(self):
+        """
+        Per-endpoint health summary.
+
+        Returns:
+            list: dicts with base, healthy, p50_ms, p99_ms, successes, failures, last_error
+        """
+        rows = []
+        for endpoint in self.ordered():
+            with self._lock:
+                p50 = endpoint.latency.percentile(50)
+                p99 = endpoint.latency.percentile(99)
+                rows.append({
+                    'base': endpoint.base,
+                    'healthy': endpoint.healthy and endpoint.successes > 0,
+                    'p50_ms': p50 * 1000 if p50 is not None else None,
+                    'p99_ms': p99 * 1000 if p99 is not None else None,
+                    'successes': endpoint.successes,
+                    'failures': endpoint.failures,
+                    'last_error': endpoint.last_error,
+                })
+        return rows
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Hedged Requests - Cut tail latency with a late duplicate
+
+A request that has not answered by a high percentile of recent latency
+(p95 by default) is probably stuck behind a slow worker instance. Sending a
+duplicate at that point and taking whichever answers first removes most of
+the tail, while only a few percent of requests are ever duplicated. A budget
+caps the extra load regardless of how slow the service gets.
+
+Latency is tracked separately per request kind (metadata, thumbnails, range
+probes). The losing attempt's response is closed as soon as it arrives so
+its connection is released.
+
+Date: 2026-10-19
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    from .endpoints import LatencyHistogram
+except ImportError:
+    from endpoints import LatencyHistogram
+
+
+class _Kind:
+    """Latency and counters for one kind of request."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+
+def _close(future):
+    """Release a losing attempt's response once it arrives."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), 'close', None)
+    if close:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+class Hedger:
+    """
+    Issue a duplicate of slow requests and keep the first answer.
+
+    Example:
+        hedger = Hedger(percentile=95, budget=0.05)
+        response = hedger.call(lambda: session.get(url, timeout=30), kind='api')
+    """
+
+    def __init__(self, percentile: float = 95, budget: float = 0.05, min_samples: int = 20,
+                 min_delay: float = 0.05, workers: int = 64):
+        """
+        Args:
+            percentile: Hedge once a request is slower than this percentile
+                of recent latency for its kind
+            budget: At most this fraction of requests get a duplicate
+            min_samples: Latency samples needed before hedging starts
+            min_delay: Never hedge earlier than this many seconds
+            workers: Threads running attempts (two per hedged request)
+        """
+        if not 0 < percentile < 100:
+            raise ValueError("Hedge percentile must be between 0 and 100")
+        if not 0 <= budget <= 1:
+            raise ValueError("Hedge budget must be between 0 and 1")
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._kinds = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hedge')
+
+    def _kind(self, kind):
+        if kind not in self._kinds:
+            self._kinds[kind] = _Kind()
+        return self._kinds[kind]
+
+    def delay(self, kind: str = 'api'):
+        """
+        Seconds to wait before hedging a request of this kind (None: don't).
+        """
+        with self._lock:
+            stats = self._kind(kind)
+            if stats.latency.total < self.min_samples:
+                return None
+            return max(self.min_delay, stats.latency.percentile(self.percentile))
+
+    def _attempt(self, send, kind):
+        started = time.time()
+        result = send()
+        with self._lock:
+            self._kind(kind).latency.record(time.time() - started)
+        return result
+
+    def _may_hedge(self, stats):
+        # Called with the lock held; counts this request against the budget
+        if stats.hedges + 1 > self.budget * stats.requests:
+            return False
+        stats.hedges += 1
+        return True
+
+    def call(self, send, kind: str = 'api'):
+        """
+        Run send() and, if it is slow, a duplicate of it; return the first result.
+
+        Exceptions are raised only if every attempt failed.
+
+        Args:
+            send: Zero-argument callable performing the request
+            kind: Latency class of the request (metadata, thumbnail, probe...)
+        """
+        delay = self.delay(kind)
+        with self._lock:
+            stats = self._kind(kind)
+            stats.requests += 1
+
+        primary = self._executor.submit(self._attempt, send, kind)
+        if delay is None:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        with self._lock:
+            if not self._may_hedge(stats):
+                hedge = None
+            else:
+                hedge = self._executor.submit(self._attempt, send, kind)
+        if hedge is None:
+            return primary.result()
+
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in pending:
+                    if not loser.cancel():
+                        loser.add_done_callback(_close)
+                # Another finished attempt in the same batch is a loser too
+                for other in done - {future}:
+                    _close(other)
+                if future is hedge:
+                    with self._lock:
+                        stats.hedge_wins += 1
+                return future.result()
+        raise error
+
+    def report(self):
+        """
+        Per-kind hedging statistics.
+
+        Returns:
+            list: dicts with kind, requests, hedges, hedge_rate, hedge_wins,
+                win_rate and delay_ms (current hedge threshold)
+        """
+        with self._lock:
+            kinds = dict(self._kinds)
+        rows = []
+        for kind, stats in kinds.items():
+            delay = self.delay(kind)
+            rows.append({
+                'kind': kind,
+                'requests': stats.requests,
+                'hedges': stats.hedges,
+                'hedge_rate': stats.hedges / stats.requests if stats.requests else None,
+                'hedge_wins': stats.hedge_wins,
+                'win_rate': stats.hedge_wins / stats.hedges if stats.hedges else None,
+                'delay_ms': delay * 1000 if delay is not None else None,
+            })
+        return rows
+
+
+def add_hedge_arguments(parser):
+    """
+    Add --hedge and --hedge-budget to a CLI.
+    """
+    parser.add_argument('--hedge', type=float, nargs='?', const=95, metavar='PERCENTILE',
+                        help='Duplicate API requests slower than this latency percentile '
+                             '(default when given: 95) and keep the first answer')
+    parser.add_argument('--hedge-budget', type=float, default=0.05, metavar='FRACTION',
+                        help='Most requests that may be duplicated (default: 0.05)')
+
+
+def hedger_from_args(args):
+    """A Hedger from add_hedge_arguments options, or None when hedging is off."""
+    if args.hedge is None:
+        return None
+    return Hedger(percentile=args.hedge, budget=args.hedge_budget)
+
+
+def print_report(hedger, file=None):
+    """Print hedge rate and win rate per request kind."""
+    rows = hedger.report()
+    if not rows:
+        return
+    print(f"\n{'Requests':<12} | {'count':>7} | {'hedged':>7} | {'won':>7} | {'after ms':>8}", file=file)
+    print("-" * 56, file=file)
+    for row in rows:
+        hedged = f"{row['hedge_rate']:.1%}" if row['hedge_rate'] is not None else '-'
+        won = f"{row['win_rate']:.0%}" if row['win_rate'] is not None else '-'
+        delay = f"{row['delay_ms']:.0f}" if row['delay_ms'] is not None else '-'
+        print(f"{row['kind']:<12} | {row['requests']:>7} | {hedged:>7} | {won:>7} | {delay:>8}", file=file)
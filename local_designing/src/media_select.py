@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Media Select - Pick one rendition among the videos a page requested
+
+A Sora page can load several MP4s for the same post: the master file,
+lower-bitrate renditions and previews. The browser captures all of them;
+each is probed in parallel with a 1-byte Range request (size and type) and
+one is picked by policy:
+
+  best        the largest video, i.e. the master (for archiving)
+  smallest    the smallest video (previews, saves bandwidth)
+  bitrate:N   the highest bitrate at or below N Mbit/s; this reads each
+              candidate's moov (see mp4_probe.py) for its duration
+
+Raw CDN videos always win over other Sora MP4s, as before.
+
+Feed and recommended posts autoplay on the same page, so when the caller
+knows the requested post (its ID, or videos named by its meta tags, player
+or JSON entry) only that post's renditions are compared: those URLs and
+any sharing their asset path. If none of the captures can be tied to the
+post, the first CDN capture is used, as before probing existed.
+
+Date: 2026-10-19
+"""
+
+from urllib.parse import unquote, urlsplit
+
+try:
+    from .mp4_probe import ProbeError, bounded_map, probe_url
+    from .page_resolver import classify_video_url
+except ImportError:
+    from mp4_probe import ProbeError, bounded_map, probe_url
+    from page_resolver import classify_video_url
+
+
+class MediaPolicy:
+    """
+    How to choose between renditions of the same video.
+    """
+
+    MODES = ('best', 'smallest', 'bitrate')
+
+    def __init__(self, mode: str = 'best', max_mbps: float = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown media policy: {mode}")
+        if mode == 'bitrate' and not (max_mbps and max_mbps > 0):
+            raise ValueError("bitrate media policy needs a cap in Mbit/s")
+        self.mode = mode
+        self.max_mbps = max_mbps
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        Build a policy from "best", "smallest" or "bitrate:N" (or pass one through).
+        """
+        if isinstance(spec, cls):
+            return spec
+        spec = (spec or 'best').strip().lower()
+        if spec.startswith('bitrate'):
+            _, _, cap = spec.partition(':')
+            try:
+                return cls('bitrate', float(cap))
+            except ValueError:
+                raise ValueError(f"Invalid media policy: {spec} (expected bitrate:MBPS)")
+        return cls(spec)
+
+    def __str__(self):
+        return f"bitrate:{self.max_mbps:g}" if self.mode == 'bitrate' else self.mode
+
+    def choose(self, candidates):
+        """
+        Pick one of the successfully probed candidates (None if there are none).
+        """
+        usable = [c for c in candidates if c.usable]
+        if not usable:
+            return None
+        cdn = [c for c in usable if c.kind == "cdn"]
+        usable = cdn or usable
+
+        if self.mode == 'smallest':
+            return min(usable, key=lambda c: c.size)
+        if self.mode == 'bitrate':
+            cap = self.max_mbps * 1e6
+            rated = [c for c in usable if c.bitrate]
+            fitting = [c for c in rated if c.bitrate <= cap]
+            if fitting:
+                return max(fitting, key=lambda c: c.bitrate)
+            # Nothing fits (or nothing could be rated): take the lightest
+            return min(rated or usable, key=lambda c: c.bitrate or c.size)
+        return max(usable, key=lambda c: c.size)
+
+
+class Candidate:
+    """One captured video URL and what probing it revealed."""
+
+    def __init__(self, url):
+        self.url = url
+        self.kind = classify_video_url(url)
+        self.size = None
+        self.content_type = None
+        self.bitrate = None
+        self.error = None
+
+    @property
+    def usable(self):
+        if self.error or not self.size:
+            return False
+        # Servers that do not say are given the benefit of the doubt
+        return not self.content_type or self.content_type.startswith(('video/', 'application/octet-stream'))
+
+    def describe(self):
+        if self.error:
+            return f"error: {self.error}"
+        parts = [f"{self.size / (1024*1024):.1f} MB" if self.size else "size unknown"]
+        if self.bitrate:
+            parts.append(f"{self.bitrate / 1e6:.1f} Mbit/s")
+        if self.content_type:
+            parts.append(self.content_type)
+        return ", ".join(parts)
+
+
+def probe_candidate(get, url, with_bitrate: bool = False):
+    """
+    Size and type of one candidate, from a 1-byte Range request.
+
+    Args:
+        get: Callable (url, headers) -> requests-style streaming response
+        url: Candidate video URL
+        with_bitrate: Also read the moov for duration and bitrate
+
+    Returns:
+        Candidate: with `error` set if the probe failed
+    """
+    candidate = Candidate(url)
+    try:
+        if with_bitrate:
+            info = probe_url(get, url)
+            candidate.size = info['size']
+            candidate.bitrate = info['bitrate']
+            candidate.content_type = 'video/mp4'
+            return candidate
+
+        with get(url, {'Range': 'bytes=0-0'}) as response:
+            if response.status_code == 206:
+                total = response.headers.get('content-range', '').rpartition('/')[2]
+                candidate.size = int(total) if total.isdigit() else None
+            elif response.status_code == 200:
+                # Range ignored; the body is never read
+                candidate.size = int(response.headers.get('content-length') or 0) or None
+            else:
+                candidate.error = f"HTTP {response.status_code}"
+            content_type = response.headers.get('content-type')
+            candidate.content_type = content_type.split(';')[0].strip().lower() if content_type else None
+    except (OSError, ProbeError, ValueError) as e:
+        candidate.error = str(e)
+    return candidate
+
+
+def asset_key(url):
+    """
+    Host and directory of a video URL: renditions of one generation are
+    served from the same asset path and differ only in the file name.
+    """
+    parts = urlsplit(url)
+    return parts.netloc + unquote(parts.path).rpartition('/')[0]
+
+
+def post_renditions(urls, anchors=(), post_id=None):
+    """
+    The URLs that belong to one post: its known videos (`anchors`), URLs
+    sharing their asset path, and URLs containing the post ID.
+    """
+    keys = {asset_key(url) for url in anchors}
+    return [url for url in urls
+            if url in anchors or asset_key(url) in keys or (post_id and post_id in url)]
+
+
+def _first_capture(urls):
+    return next((u for u in urls if classify_video_url(u) == "cdn"), urls[0])
+
+
+def select_media(urls, get, policy='best', workers: int = 8, anchors=None, post_id=None):
+    """
+    Probe all candidate URLs in parallel and pick one by policy.
+
+    A single candidate is returned without probing. If every probe fails,
+    the first CDN URL (else the first URL) is used, as before probing existed.
+
+    Args:
+        urls: Candidate video URLs in capture order (duplicates ignored)
+        get: Callable (url, headers) -> requests-style streaming response
+        policy: MediaPolicy or its string form
+        workers: Concurrent probes
+        anchors: Videos known to be the requested post's; with `post_id`,
+            limits the comparison to that post's renditions
+        post_id: The requested post
+
+    Returns:
+        str: Chosen URL, or None if there were no candidates
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if len(urls) > 1 and (anchors or post_id):
+        renditions = post_renditions(urls, set(anchors or ()), post_id)
+        if not renditions:
+            print("⚠️ No captured video is tied to the post, using the first capture")
+            return _first_capture(urls)
+        if len(renditions) < len(urls):
+            print(f"🎯 Ignoring {len(urls) - len(renditions)} videos of other posts")
+        urls = renditions
+    if len(urls) <= 1:
+        return urls[0] if urls else None
+
+    policy = MediaPolicy.parse(policy)
+    probe = lambda url: probe_candidate(get, url, with_bitrate=policy.mode == 'bitrate')
+    by_url = {url: candidate for url, candidate, _ in bounded_map(probe, urls, workers)}
+    candidates = [by_url[url] for url in urls if url in by_url]
+
+    print(f"🎚️ {len(candidates)} video candidates (policy: {policy}):")
+    for candidate in candidates:
+        print(f"   {candidate.kind or 'other':<5} {candidate.describe()}  {candidate.url[:70]}...")
+
+    chosen = policy.choose(candidates)
+    if chosen is None:
+        print("⚠️ No candidate could be probed, using the first capture")
+        return _first_capture(urls)
+    return chosen.url
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Metadata Harvest - Catalogue data for many videos without downloading them
+
+Runs extract_video_info across a URL list of any size with adaptive
+concurrency (see aimd.py) and streams one flat record per post to JSONL or
+to Parquet part files (requires pyarrow). Memory stays constant in the
+number of URLs, apart from 16 bytes per harvested post for resuming.
+
+Output is checkpointed every --checkpoint-every records (JSONL is flushed
+and fsynced; Parquet writes a new part file). Running the same command
+again skips posts already in the output, so an interrupted harvest resumes
+where it stopped.
+
+The output is append-only. With --retry-errors a retried post gets a new
+row after its failed one, so a post can have several rows; the last one
+(in file order, and part order for Parquet) is current. Readers should keep
+the last row per post_id.
+
+Date: 2026-10-19
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+try:
+    from .aimd import AimdController, is_congestion
+    from .hedging import add_hedge_arguments, hedger_from_args, print_report as print_hedge_report
+    from .mp4_probe import bounded_map
+    from .proxy_pool import ProxyPool, add_proxy_arguments, print_report, proxies_from_args
+    from .url_ingest import CompactSeenSet, extract_post_id
+except ImportError:
+    from aimd import AimdController, is_congestion
+    from hedging import add_hedge_arguments, hedger_from_args, print_report as print_hedge_report
+    from mp4_probe import bounded_map
+    from proxy_pool import ProxyPool, add_proxy_arguments, print_report, proxies_from_args
+    from url_ingest import CompactSeenSet, extract_post_id
+
+FIELDS = ('post_id', 'url', 'title', 'prompt', 'description', 'created_at',
+          'thumbnail_url', 'download_url', 'error')
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def video_record(downloader, url, video_info):
+    """
+    Flatten extract_video_info output into one catalogue record.
+
+    Args:
+        downloader: SoraVideoDownloader (builds the proxy URLs)
+        url (str): Canonical share URL
+        video_info (dict): From extract_video_info
+
+    Returns:
+        dict: One value per FIELDS entry
+    """
+    post_info = video_info.get('post_info') or {}
+    return {
+        'post_id': video_info.get('post_id'),
+        'url': url,
+        'title': _text(video_info.get('title') or post_info.get('title')),
+        'prompt': _text(post_info.get('prompt') or video_info.get('prompt')),
+        'description': _text(video_info.get('description') or post_info.get('description')),
+        'created_at': _text(video_info.get('created_at') or post_info.get('created_at')),
+        'thumbnail_url': downloader.get_thumbnail_url(video_info),
+        'download_url': downloader.generate_download_url(video_info),
+        'error': None,
+    }
+
+
+class JsonlSink:
+    """Append records to a JSONL file; a checkpoint is a flush + fsync."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def _drop_partial_line(self):
+        # A crash mid-write leaves a line without its newline; appending after
+        # it would corrupt the next record too
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            while end > 0:
+                step = min(65536, end)
+                f.seek(end - step)
+                block = f.read(step)
+                newline = block.rfind(b'\n')
+                if newline != -1:
+                    end = end - step + newline + 1
+                    break
+                end -= step
+            f.truncate(end)
+
+    def completed(self):
+        """Yield (key, error) for every record already written."""
+        if not os.path.exists(self.path):
+            return
+        self._drop_partial_line()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                yield record.get('post_id') or record.get('url'), record.get('error')
+
+    def write(self, record):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def checkpoint(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self.checkpoint()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetSink:
+    """
+    Write records to a directory of Parquet part files, one per checkpoint.
+
+    Each part is written to a temporary name and renamed, so a crash never
+    leaves a half-written part behind.
+    """
+
+    def __init__(self, directory: str):
+        import pyarrow as pa
+
+        self.directory = directory
+        self.schema = pa.schema([(name, pa.string()) for name in FIELDS])
+        self._rows = []
+        self._next_part = len(self._parts())
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'part-*.parquet')))
+
+    def completed(self):
+        """Yield (key, error) for every record already written."""
+        import pyarrow.parquet as pq
+
+        for part in self._parts():
+            table = pq.read_table(part, columns=['post_id', 'url', 'error'])
+            for post_id, url, error in zip(*(table.column(c).to_pylist() for c in table.column_names)):
+                yield post_id or url, error
+
+    def write(self, record):
+        self._rows.append(record)
+
+    def checkpoint(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._rows:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"part-{self._next_part:06d}.parquet")
+        tmp_path = path + ".tmp"
+        pq.write_table(pa.Table.from_pylist(self._rows, schema=self.schema), tmp_path)
+        os.replace(tmp_path, path)
+        self._next_part += 1
+        self._rows = []
+
+    def close(self):
+        self.checkpoint()
+
+
+def open_sink(path: str, fmt: str = None):
+    """
+    JsonlSink or ParquetSink for a path ("parquet" for *.parquet or directories).
+    """
+    if fmt is None:
+        fmt = 'parquet' if path.endswith('.parquet') or os.path.isdir(path) else 'jsonl'
+    if fmt == 'parquet':
+        return ParquetSink(path)
+    if fmt == 'jsonl':
+        return JsonlSink(path)
+    raise ValueError(f"Unknown output format: {fmt}")
+
+
+class MetadataHarvester:
+    """
+    Fetch metadata for many URLs and stream the records into a sink.
+
+    Example:
+        harvester = MetadataHarvester(SoraVideoDownloader())
+        stats = harvester.run(iter_urls(["urls.txt"]), JsonlSink("catalogue.jsonl"))
+    """
+
+    def __init__(self, downloader=None, controller: AimdController = None,
+                 max_attempts: int = 3, retry_delay: float = 0.2):
+        """
+        Args:
+            downloader: Configured SoraVideoDownloader (endpoints, proxies...)
+            controller: Concurrency controller for API calls (default: 4 growing to 64)
+            max_attempts: Tries per URL when the failure is congestion
+            retry_delay: First backoff before a retry; doubles per attempt
+        """
+        if downloader is None:
+            try:
+                from .sora_downloader import SoraVideoDownloader
+            except ImportError:
+                from sora_downloader import SoraVideoDownloader
+            downloader = SoraVideoDownloader()
+        self.downloader = downloader
+        self.controller = controller or AimdController('metadata', initial=4, maximum=64)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def fetch(self, url):
+        """
+        One record for a URL; failures become records with `error` set.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                with self.controller.slot():
+                    video_info = self.downloader.extract_video_info(url)
+                return video_record(self.downloader, url, video_info)
+            except Exception as e:
+                if attempt < self.max_attempts and is_congestion(e):
+                    time.sleep(self.retry_delay * 2 ** (attempt - 1))
+                    continue
+                record = dict.fromkeys(FIELDS)
+                record.update(post_id=extract_post_id(url), url=url, error=str(e) or type(e).__name__)
+                return record
+
+    def resume_set(self, sink, retry_errors: bool = False):
+        """
+        Posts already in the sink, as a CompactSeenSet for iter_urls(seen=...).
+
+        Args:
+            sink: JsonlSink or ParquetSink
+            retry_errors: Leave failed posts out so they are fetched again;
+                their new rows are appended after the failed ones
+        """
+        seen = CompactSeenSet()
+        for key, error in sink.completed():
+            if key and not (error and retry_errors):
+                seen.add(key)
+        return seen
+
+    def run(self, items, sink, checkpoint_every: int = 1000, progress=None):
+        """
+        Harvest every URL into the sink, checkpointing as it goes.
+
+        Args:
+            items: Iterable of share URLs or url_ingest.IngestedURL
+            sink: JsonlSink or ParquetSink
+            checkpoint_every: Records between checkpoints
+            progress: Optional callable(stats) run at each checkpoint
+
+        Returns:
+            dict: records, errors, elapsed
+        """
+        urls = (getattr(item, 'url', item) for item in items)
+        stats = {'records': 0, 'errors': 0, 'elapsed': 0.0}
+        start = time.time()
+        try:
+            for url, record, error in bounded_map(self.fetch, urls, self.controller.maximum):
+                if error:
+                    record = dict.fromkeys(FIELDS)
+                    record.update(post_id=extract_post_id(url), url=url, error=str(error))
+                sink.write(record)
+                stats['records'] += 1
+                if record['error']:
+                    stats['errors'] += 1
+                if stats['records'] % checkpoint_every == 0:
+                    sink.checkpoint()
+                    stats['elapsed'] = time.time() - start
+                    if progress:
+                        progress(stats)
+        finally:
+            sink.close()
+            stats['elapsed'] = time.time() - start
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Harvest metadata for many Sora videos into JSONL or Parquet',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python metadata_harvest.py urls.txt -o catalogue.jsonl
+  cat urls.txt | python metadata_harvest.py - -o catalogue.parquet --max-workers 128
+  python metadata_harvest.py urls.txt -o catalogue.jsonl --retry-errors   # resume, retrying failures
+        """
+    )
+
+    parser.add_argument('sources', nargs='*', default=['-'], help='Share URL files ("-" for stdin)')
+    parser.add_argument('-o', '--output', default='catalogue.jsonl',
+                        help='JSONL file, or a *.parquet directory of part files')
+    parser.add_argument('--format', choices=['jsonl', 'parquet'],
+                        help='Output format (default: by the output name)')
+    parser.add_argument('--max-workers', type=int, default=64, help='Ceiling for concurrent API calls')
+    parser.add_argument('--attempts', type=int, default=3, help='Tries per URL on throttling/timeouts')
+    parser.add_argument('--checkpoint-every', type=int, default=1000, metavar='N',
+                        help='Records between checkpoints (default: 1000)')
+    parser.add_argument('--retry-errors', action='store_true',
+                        help='When resuming, fetch posts that failed last time again '
+                             '(appends new rows; keep the last row per post_id)')
+    parser.add_argument('--verbose', action='store_true', help='Show per-URL progress on stderr')
+    add_proxy_arguments(parser)
+    add_hedge_arguments(parser)
+
+    args = parser.parse_args()
+
+    try:
+        from .url_ingest import iter_urls
+        from .sora_downloader import SoraVideoDownloader
+    except ImportError:
+        from url_ingest import iter_urls
+        from sora_downloader import SoraVideoDownloader
+
+    try:
+        sink = open_sink(args.output, args.format)
+    except ImportError:
+        print("❌ Parquet output needs pyarrow: pip install pyarrow")
+        sys.exit(1)
+
+    proxies = proxies_from_args(args)
+    proxy_pool = ProxyPool(proxies, strategy=args.proxy_strategy) if proxies else None
+    downloader = SoraVideoDownloader(proxies=proxy_pool, hedger=hedger_from_args(args))
+    harvester = MetadataHarvester(
+        downloader,
+        AimdController('metadata', initial=min(4, args.max_workers), maximum=args.max_workers),
+        max_attempts=args.attempts
+    )
+
+    seen = harvester.resume_set(sink, args.retry_errors)
+    if len(seen):
+        print(f"↩️  Resuming: {len(seen)} posts already harvested in {args.output}")
+
+    def progress(stats):
+        rate = stats['records'] / stats['elapsed'] if stats['elapsed'] else 0
+        print(f"💾 {stats['records']} records ({stats['errors']} errors), {rate:.0f}/s", file=real_stdout,
+              flush=True)
+
+    # The downloader reports every call; keep it off the terminal unless asked
+    real_stdout = sys.stdout
+    sys.stdout = sys.stderr if args.verbose else open(os.devnull, 'w')
+    try:
+        stats = harvester.run(iter_urls(args.sources, seen=seen), sink, args.checkpoint_every, progress)
+    except KeyboardInterrupt:
+        stats = None
+    finally:
+        if sys.stdout is not sys.stderr:
+            sys.stdout.close()
+        sys.stdout = real_stdout
+
+    if stats is None:
+        print("\n⚠️  Interrupted; run the same command again to resume")
+        sys.exit(130)
+    print(f"\n📚 {stats['records']} records ({stats['errors']} errors) in {stats['elapsed']:.2f}s "
+          f"-> {args.output}")
+    if proxy_pool:
+        print_report(proxy_pool)
+    if downloader.hedger:
+        print_hedge_report(downloader.hedger)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+MP4 Probe - Duration, resolution and codecs from a few Range requests
+
+Reads only the `moov` atom of a remote MP4: the file head is fetched first
+(covering moov-first files), then the tail after `mdat` for files that keep
+their index at the end. `mvhd`, `tkhd`, `mdhd`, `hdlr` and `stsd` are parsed
+for duration, frame size and codec, so jobs can be filtered and planned
+before any media bytes are downloaded.
+
+Date: 2026-10-19
+"""
+
+import argparse
+import json
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    from .hedging import add_hedge_arguments, hedger_from_args, print_report as print_hedge_report
+    from .mp4_faststart import HEAD_BYTES, iter_boxes, parse_box_header
+except ImportError:
+    from hedging import add_hedge_arguments, hedger_from_args, print_report as print_hedge_report
+    from mp4_faststart import HEAD_BYTES, iter_boxes, parse_box_header
+
+# Largest moov we are willing to fetch (long videos have big sample tables)
+MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+VISUAL_CODECS = {b'avc1', b'avc3', b'hvc1', b'hev1', b'av01', b'vp09', b'mp4v'}
+
+
+class ProbeError(Exception):
+    """The file could not be probed with Range requests."""
+
+
+def _children(data, start, end):
+    return {btype: (offset + header, offset + size) for btype, offset, size, header
+            in iter_boxes(data, start, end)}
+
+
+def _full_box_version(data, start):
+    return data[start]
+
+
+def parse_mvhd(data, start):
+    if _full_box_version(data, start) == 1:
+        timescale, duration = struct.unpack_from('>IQ', data, start + 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', data, start + 12)
+    return timescale, duration
+
+
+def parse_tkhd(data, start, end):
+    version = _full_box_version(data, start)
+    # width/height are the last 8 bytes, 16.16 fixed point
+    width, height = struct.unpack_from('>II', data, end - 8)
+    track_id, = struct.unpack_from('>I', data, start + (20 if version == 1 else 12))
+    return track_id, width / 65536, height / 65536
+
+
+def parse_stsd(data, start):
+    entry_count, = struct.unpack_from('>I', data, start + 4)
+    if not entry_count:
+        return None, None, None
+    size, codec = struct.unpack_from('>I4s', data, start + 8)
+    entry = start + 16
+    width = height = None
+    if codec in VISUAL_CODECS or codec == b'encv':
+        width, height = struct.unpack_from('>HH', data, entry + 24)
+    return codec.decode('latin-1'), width, height
+
+
+def parse_moov(moov):
+    """
+    Extract movie and track information from a complete moov box.
+
+    Returns:
+        dict: duration (seconds), width, height, video_codec, audio_codec, tracks
+    """
+    _, btype, header_len = parse_box_header(moov)
+    if btype != b'moov':
+        raise ProbeError("Not a moov box")
+
+    info = {'duration': None, 'width': None, 'height': None,
+            'video_codec': None, 'audio_codec': None, 'tracks': []}
+    boxes = _children(moov, header_len, len(moov))
+
+    if b'mvhd' in boxes:
+        timescale, duration = parse_mvhd(moov, boxes[b'mvhd'][0])
+        if timescale:
+            info['duration'] = round(duration / timescale, 3)
+
+    for btype, offset, size, header in iter_boxes(moov, header_len, len(moov)):
+        if btype != b'trak':
+            continue
+        track = {}
+        trak = _children(moov, offset + header, offset + size)
+        if b'tkhd' in trak:
+            track['id'], track['width'], track['height'] = parse_tkhd(moov, *trak[b'tkhd'])
+        mdia = _children(moov, *trak[b'mdia']) if b'mdia' in trak else {}
+        if b'hdlr' in mdia:
+            track['type'] = moov[mdia[b'hdlr'][0] + 8:mdia[b'hdlr'][0] + 12].decode('latin-1')
+        if b'mdhd' in mdia:
+            timescale, duration = parse_mvhd(moov, mdia[b'mdhd'][0])
+            if timescale:
+                track['duration'] = round(duration / timescale, 3)
+        minf = _children(moov, *mdia[b'minf']) if b'minf' in mdia else {}
+        stbl = _children(moov, *minf[b'stbl']) if b'stbl' in minf else {}
+        if b'stsd' in stbl:
+            codec, width, height = parse_stsd(moov, stbl[b'stsd'][0])
+            track['codec'] = codec
+            if width:
+                track['width'], track['height'] = width, height
+        info['tracks'].append(track)
+
+        if track.get('type') == 'vide' and not info['video_codec']:
+            info['video_codec'] = track.get('codec')
+            info['width'] = int(track['width']) if track.get('width') else None
+            info['height'] = int(track['height']) if track.get('height') else None
+        elif track.get('type') == 'soun' and not info['audio_codec']:
+            info['audio_codec'] = track.get('codec')
+
+    return info
+
+
+def probe_url(get, url):
+    """
+    Probe a remote MP4 using only the bytes needed to read its moov.
+
+    Args:
+        get: Callable (url, headers) -> requests-style streaming response
+        url: Direct video URL (the server must honour Range)
+
+    Returns:
+        dict: parse_moov fields plus size, bitrate, moov_position and bytes_fetched
+    """
+    fetched = 0
+
+    def fetch(start, end):
+        nonlocal fetched
+        with get(url, {'Range': f"bytes={start}-{end}"}) as response:
+            if response.status_code != 206:
+                raise ProbeError(f"Range not supported (HTTP {response.status_code})")
+            total = response.headers.get('content-range', '').rpartition('/')[2]
+            data = response.content
+        fetched += len(data)
+        return data, int(total) if total.isdigit() else None
+
+    head, total = fetch(0, HEAD_BYTES - 1)
+    if total is None:
+        raise ProbeError("Unknown total size")
+
+    moov = None
+    position = 'head'
+    offset = 0
+    while offset + 8 <= len(head):
+        header = parse_box_header(head, offset)
+        if header is None:
+            break
+        size, btype, header_len = header
+        size = size if size is not None else total - offset
+        if size < header_len:
+            raise ProbeError(f"Corrupt {btype!r} box at offset {offset}")
+        if btype == b'moov':
+            if size > MAX_MOOV_BYTES:
+                raise ProbeError(f"moov too large ({size} bytes)")
+            if offset + size <= len(head):
+                moov = head[offset:offset + size]
+            else:
+                moov = head[offset:] + fetch(len(head), offset + size - 1)[0]
+            break
+        offset += size
+
+    if moov is None:
+        if offset >= total:
+            raise ProbeError("No moov box found")
+        # moov sits after mdat; fetch everything from there to the end
+        if total - offset > MAX_MOOV_BYTES:
+            raise ProbeError("Tail after mdat too large to probe")
+        tail, _ = fetch(offset, total - 1)
+        position = 'tail'
+        for btype, start, size, _ in iter_boxes(tail):
+            if btype == b'moov':
+                moov = tail[start:start + size]
+                break
+        if moov is None:
+            raise ProbeError("No moov box found")
+
+    info = parse_moov(moov)
+    info['size'] = total
+    info['bitrate'] = int(total * 8 / info['duration']) if info['duration'] else None
+    info['moov_position'] = position
+    info['bytes_fetched'] = fetched
+    return info
+
+
+def bounded_map(fn, items, workers):
+    """
+    Apply fn concurrently to a (possibly huge or endless) iterable.
+
+    At most `workers * 2` items are in flight, so input is consumed lazily.
+    Yields (item, result, error) in completion order.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def fill():
+            while len(pending) < workers * 2:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                pending[pool.submit(fn, item)] = item
+
+        fill()
+        while pending:
+            done = next(as_completed(pending))
+            item = pending.pop(done)
+            try:
+                yield item, done.result(), None
+            except Exception as e:
+                yield item, None, e
+            fill()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Probe Sora videos (duration, resolution, codec) without downloading them',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python mp4_probe.py urls.txt > probes.jsonl
+  cat urls.txt | python mp4_probe.py - --workers 32
+        """
+    )
+
+    parser.add_argument('sources', nargs='*', default=['-'], help='Share URL files ("-" for stdin)')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent probes')
+    parser.add_argument('--metadata', action='store_true',
+                        help='Resolve post IDs through the API instead of parsing them from the URL')
+    add_hedge_arguments(parser)
+
+    args = parser.parse_args()
+
+    try:
+        from .sora_downloader import SoraVideoDownloader
+        from .url_ingest import iter_urls
+    except ImportError:
+        from sora_downloader import SoraVideoDownloader
+        from url_ingest import iter_urls
+
+    downloader = SoraVideoDownloader(hedger=hedger_from_args(args))
+    lock = threading.Lock()
+
+    def probe(item):
+        video_info = None if args.metadata else downloader.local_video_info(item.url)
+        return downloader.probe_video(video_info or downloader.extract_video_info(item.url))
+
+    start = time.time()
+    count = failures = 0
+    # Progress output from the downloader goes to stderr; stdout is pure JSONL
+    real_stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        for item, info, error in bounded_map(probe, iter_urls(args.sources), args.workers):
+            record = {'url': item.url, 'post_id': item.post_id}
+            if error:
+                failures += 1
+                record['error'] = str(error)
+            else:
+                record.update(info)
+            count += 1
+            with lock:
+                real_stdout.write(json.dumps(record) + '\n')
+                real_stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stdout = real_stdout
+
+    print(f"🔎 Probed {count} videos ({failures} failed) in {time.time() - start:.2f}s", file=sys.stderr)
+    if downloader.hedger:
+        print_hedge_report(downloader.hedger, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Native Messaging Host - Let the browser extension hand downloads to Python
+
+The extension's own path goes through the browser download manager, one
+stream per video. Connected to this host (chrome.runtime.connectNative), it
+sends whole batches instead, which run through BatchDownloader: adaptive
+concurrency shared by every batch of the session, retries, and skipping
+videos already on disk so a re-sent batch resumes. Progress streams back as
+events.
+
+Protocol (both directions): a 32-bit length in native byte order, then that
+many bytes of UTF-8 JSON.
+
+  -> {"type": "ping"}
+  <- {"type": "pong", "version": "..."}
+  -> {"type": "download", "id": "b1", "urls": [...], "output_dir": "optional"}
+  <- {"type": "accepted", "id": "b1", "count": 2, "output_dir": "..."}
+  <- {"type": "progress", "id": "b1", "path": "...", "downloaded": 1048576, "total": 8388608}
+  <- {"type": "done", "id": "b1", "url": "...", "path": "..."}
+  <- {"type": "failed", "id": "b1", "url": "...", "error": "..."}
+  <- {"type": "finished", "id": "b1", "downloaded": 1, "failed": 1, "elapsed": 4.2}
+  -> {"type": "cancel", "id": "b1"}      (videos not yet queued are dropped)
+
+Register the host with the browser once:
+
+  sora-native-host install --browser chrome --extension-id <id>
+  sora-native-host install --browser firefox
+
+Date: 2026-10-19
+"""
+
+import argparse
+import io
+import json
+import os
+import stat
+import struct
+import sys
+import threading
+import time
+
+try:
+    from .aimd import AimdController
+    from .batch_download import BatchDownloader, DownloadIndex
+    from .sora_downloader import SoraVideoDownloader
+    from .url_ingest import iter_urls
+except ImportError:
+    from aimd import AimdController
+    from batch_download import BatchDownloader, DownloadIndex
+    from sora_downloader import SoraVideoDownloader
+    from url_ingest import iter_urls
+
+HOST_NAME = "sora_video_downloader.engine"
+HOST_VERSION = "1"
+FIREFOX_EXTENSION_ID = "getsora-video@enthusiadev.com"
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "Downloads", "Sora")
+
+# Browsers refuse messages from a host larger than this
+MAX_MESSAGE_BYTES = 1024 * 1024
+# At most one progress event per file per interval
+PROGRESS_INTERVAL = 0.25
+
+_HEADER = struct.Struct('@I')
+
+# Batch of the item a worker thread is downloading, for progress events
+_current = threading.local()
+
+
+def read_message(stream):
+    """
+    Read one message from a binary stream.
+
+    Returns:
+        The decoded JSON value, or None at end of stream
+    """
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (length,) = _HEADER.unpack(header)
+    body = stream.read(length)
+    if len(body) < length:
+        return None
+    return json.loads(body.decode('utf-8'))
+
+
+def encode_message(message):
+    """Length-prefixed UTF-8 JSON for one message."""
+    body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    if len(body) > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {len(body)} bytes exceeds the native messaging limit")
+    return _HEADER.pack(len(body)) + body
+
+
+class _HostBatch(BatchDownloader):
+    """A BatchDownloader whose worker threads know which batch they serve."""
+
+    def __init__(self, batch_id, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_id = batch_id
+
+    def download_one(self, url):
+        _current.batch_id = self.batch_id
+        try:
+            return super().download_one(url)
+        finally:
+            _current.batch_id = None
+
+
+class NativeHost:
+    """
+    Serve extension messages, running download batches on one shared engine.
+
+    Example:
+        NativeHost(sys.stdin.buffer, sys.stdout.buffer).serve()
+    """
+
+    def __init__(self, reader, writer, downloader=None, output_dir: str = DEFAULT_OUTPUT_DIR,
+                 metadata: AimdController = None, transfer: AimdController = None):
+        """
+        Args:
+            reader: Binary stream of incoming messages (stdin)
+            writer: Binary stream for outgoing messages (stdout)
+            downloader: Configured SoraVideoDownloader (default: a new one)
+            output_dir: Where batches go unless a message names a directory
+            metadata: Controller for API calls, shared by all batches
+            transfer: Controller for video transfers, shared by all batches
+        """
+        self.reader = reader
+        self.writer = writer
+        self.downloader = downloader or SoraVideoDownloader()
+        self.downloader.on_progress = self._on_progress
+        self.output_dir = output_dir
+        self.metadata = metadata or AimdController('metadata', initial=4, maximum=32)
+        self.transfer = transfer or AimdController('transfer', initial=2, maximum=16)
+        self._write_lock = threading.Lock()
+        self._batches = {}
+        self._indexes = {}
+        self._last_progress = {}
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        data = encode_message(message)
+        with self._write_lock:
+            self.writer.write(data)
+            self.writer.flush()
+
+    def _on_progress(self, output_path, downloaded, total):
+        batch_id = getattr(_current, 'batch_id', None)
+        if batch_id is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_progress.get(output_path, 0)
+            if now - last < PROGRESS_INTERVAL and downloaded != total:
+                return
+            if downloaded == total:
+                self._last_progress.pop(output_path, None)
+            else:
+                self._last_progress[output_path] = now
+        self.send({'type': 'progress', 'id': batch_id, 'path': output_path,
+                   'downloaded': downloaded, 'total': total})
+
+    def _index(self, output_dir):
+        """The DownloadIndex of a directory, shared by every batch writing there."""
+        key = os.path.realpath(output_dir)
+        with self._lock:
+            if key not in self._indexes:
+                self._indexes[key] = DownloadIndex(output_dir)
+            return self._indexes[key]
+
+    def _run_batch(self, batch_id, urls, output_dir, cancelled):
+        # Every click sends a new batch, usually into the same directory: a
+        # shared index keeps concurrent batches from claiming the same name
+        batch = _HostBatch(batch_id, self.downloader, output_dir, metadata=self.metadata,
+                           transfer=self.transfer, skip_existing=True, index=self._index(output_dir))
+        pending = (url for url in urls if not cancelled.is_set())
+        start = time.time()
+        done = failed = 0
+        try:
+            for url, path, error in batch.run(pending):
+                if error:
+                    failed += 1
+                    self.send({'type': 'failed', 'id': batch_id, 'url': url, 'error': str(error)})
+                else:
+                    done += 1
+                    self.send({'type': 'done', 'id': batch_id, 'url': url, 'path': path})
+        finally:
+            with self._lock:
+                self._batches.pop(batch_id, None)
+            self.downloader.fsync_policy.flush()
+            self.send({'type': 'finished', 'id': batch_id, 'downloaded': done, 'failed': failed,
+                       'cancelled': cancelled.is_set(), 'elapsed': round(time.time() - start, 3)})
+
+    def handle(self, message):
+        """Act on one incoming message."""
+        kind = message.get('type') if isinstance(message, dict) else None
+        if kind == 'ping':
+            self.send({'type': 'pong', 'version': HOST_VERSION})
+        elif kind == 'download':
+            self._start_batch(message)
+        elif kind == 'cancel':
+            with self._lock:
+                batch = self._batches.get(message.get('id'))
+            if batch:
+                batch[1].set()
+        else:
+            self.send({'type': 'error', 'error': f"Unknown message type: {kind}"})
+
+    def _start_batch(self, message):
+        batch_id = str(message.get('id') or f"batch-{time.time():.0f}")
+        raw_urls = message.get('urls') or []
+        if not isinstance(raw_urls, list):
+            self.send({'type': 'error', 'id': batch_id, 'error': "urls must be a list"})
+            return
+        # Same canonicalization and de-duplication as URL files
+        urls = [item.url for item in iter_urls(io.StringIO('\n'.join(map(str, raw_urls))))]
+        output_dir = os.path.expanduser(message.get('output_dir') or self.output_dir)
+
+        cancelled = threading.Event()
+        with self._lock:
+            if batch_id in self._batches:
+                self.send({'type': 'error', 'id': batch_id, 'error': "A batch with this id is running"})
+                return
+            thread = threading.Thread(target=self._run_batch, args=(batch_id, urls, output_dir, cancelled),
+                                      name=f"batch-{batch_id}", daemon=True)
+            self._batches[batch_id] = (thread, cancelled)
+        self.send({'type': 'accepted', 'id': batch_id, 'count': len(urls), 'output_dir': output_dir})
+        thread.start()
+
+    def serve(self):
+        """
+        Handle messages until the extension disconnects (end of input).
+
+        Batches still running at that point are cancelled and waited for.
+        """
+        while True:
+            try:
+                message = read_message(self.reader)
+            except ValueError as e:
+                self.send({'type': 'error', 'error': f"Invalid message: {e}"})
+                continue
+            if message is None:
+                break
+            self.handle(message)
+
+        with self._lock:
+            batches = list(self._batches.values())
+        for thread, cancelled in batches:
+            cancelled.set()
+        for thread, _ in batches:
+            thread.join()
+
+
+def manifest_dirs(browser):
+    """Per-user directories a browser reads native host manifests from."""
+    home = os.path.expanduser("~")
+    if sys.platform == 'darwin':
+        base = os.path.join(home, "Library", "Application Support")
+        return {
+            'chrome': [os.path.join(base, "Google", "Chrome", "NativeMessagingHosts")],
+            'chromium': [os.path.join(base, "Chromium", "NativeMessagingHosts")],
+            'firefox': [os.path.join(base, "Mozilla", "NativeMessagingHosts")],
+        }[browser]
+    if sys.platform.startswith('linux'):
+        return {
+            'chrome': [os.path.join(home, ".config", "google-chrome", "NativeMessagingHosts")],
+            'chromium': [os.path.join(home, ".config", "chromium", "NativeMessagingHosts")],
+            'firefox': [os.path.join(home, ".mozilla", "native-messaging-hosts")],
+        }[browser]
+    raise RuntimeError("Automatic install supports Linux and macOS; on Windows register "
+                       f"the manifest under HKCU\\Software\\...\\NativeMessagingHosts\\{HOST_NAME}")
+
+
+def host_manifest(browser, launcher, extension_id=None):
+    """The manifest a browser needs to start this host."""
+    manifest = {
+        'name': HOST_NAME,
+        'description': 'Sora video downloader engine',
+        'path': launcher,
+        'type': 'stdio',
+    }
+    if browser == 'firefox':
+        manifest['allowed_extensions'] = [extension_id or FIREFOX_EXTENSION_ID]
+    else:
+        if not extension_id:
+            raise ValueError("Chrome/Chromium need --extension-id (see chrome://extensions)")
+        manifest['allowed_origins'] = [f"chrome-extension://{extension_id}/"]
+    return manifest
+
+
+def install(browser, extension_id=None):
+    """
+    Write a launcher script and the host manifest for a browser.
+
+    Returns:
+        list: Paths of the written manifests
+    """
+    launcher_dir = os.path.join(os.path.expanduser("~"), ".local", "share", "sora-downloader")
+    os.makedirs(launcher_dir, exist_ok=True)
+    # Browsers start hosts without the user's shell, so pin the interpreter
+    launcher = os.path.join(launcher_dir, "native-host")
+    with open(launcher, 'w') as f:
+        f.write(f"#!/bin/sh\nexec '{sys.executable}' '{os.path.abspath(__file__)}' \"$@\"\n")
+    os.chmod(launcher, os.stat(launcher).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    manifest = host_manifest(browser, launcher, extension_id)
+    written = []
+    for directory in manifest_dirs(browser):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{HOST_NAME}.json")
+        with open(path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        written.append(path)
+    return written
+
+
+def serve(output_dir: str = DEFAULT_OUTPUT_DIR):
+    """Run the host on stdin/stdout, as the browser starts it."""
+    reader, writer = sys.stdin.buffer, sys.stdout.buffer
+    # Only protocol messages may reach stdout; progress chatter goes to stderr
+    sys.stdout = sys.stderr
+    NativeHost(reader, writer, output_dir=output_dir).serve()
+
+
+def main():
+    # Browsers start the host with the caller's origin (Chrome) or the
+    # manifest path and extension id (Firefox) as arguments
+    if len(sys.argv) < 2 or sys.argv[1] not in ('install', 'serve', '-h', '--help'):
+        serve(os.environ.get('SORA_OUTPUT_DIR') or DEFAULT_OUTPUT_DIR)
+        return
+
+    parser = argparse.ArgumentParser(
+        description='Native messaging host for the Sora downloader browser extension',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python native_host.py install --browser chrome --extension-id abcdefghijklmnopabcdefghijklmnop
+  python native_host.py install --browser firefox
+  python native_host.py serve -d ~/Videos/Sora       # what the browser runs
+        """
+    )
+    parser.add_argument('command', choices=['install', 'serve'])
+    parser.add_argument('--browser', choices=['chrome', 'chromium', 'firefox'], default='chrome')
+    parser.add_argument('--extension-id', help='Extension allowed to connect (Chrome: required)')
+    parser.add_argument('-d', '--output-dir', default=DEFAULT_OUTPUT_DIR,
+                        help='Default directory for downloads')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.output_dir)
+        return
+    try:
+        for path in install(args.browser, args.extension_id):
+            print(f"🔌 Registered {HOST_NAME} for {args.browser}: {path}")
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
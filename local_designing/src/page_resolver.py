@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Page Resolver - Find the video URL without rendering the Sora app
+
+The share page already ships everything the browser path waits for: Open
+Graph meta tags and the app's embedded JSON (Next.js data / flight payloads)
+carry the CDN MP4 URL and the title. With cookies from a saved browser
+session (see browser_session.py) one plain HTTP request is usually enough;
+the browser is only needed when this fails, e.g. on a Cloudflare challenge.
+
+Date: 2026-10-19
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from html import unescape as html_unescape
+
+try:
+    from .browser_session import DEFAULT_SESSION_DIR, BrowserSession, looks_like_challenge
+except ImportError:
+    from browser_session import DEFAULT_SESSION_DIR, BrowserSession, looks_like_challenge
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0'
+
+_META_RE = re.compile(r'<meta\s[^>]*>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_JSON_SCRIPT_RE = re.compile(
+    r'<script[^>]*type=["\']application/(?:ld\+)?json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+# URLs in raw markup, including JSON-escaped ones inside script strings
+_URL_RE = re.compile(r'https?:(?:\\?/){2}[^\s"\'<>]+')
+
+VIDEO_META = ('og:video:secure_url', 'og:video:url', 'og:video', 'twitter:player:stream')
+TITLE_META = ('og:title', 'twitter:title')
+TITLE_KEYS = ('title', 'name', 'headline')
+
+
+class ResolveError(Exception):
+    """The page did not yield a video URL without a browser."""
+
+
+def classify_video_url(url):
+    """
+    "cdn" for raw OpenAI CDN videos, "alt" for other Sora MP4s, else None.
+
+    Same rules as the browser's request interception.
+    """
+    if 'cdn.openai.com' in url and '/MP4/' in url:
+        return "cdn"
+    if 'sora' in url.lower() and '.mp4' in url.lower():
+        return "alt"
+    return None
+
+
+def _unescape(url):
+    url = url.replace('\\/', '/').replace('\\u0026', '&').replace('&amp;', '&')
+    return url.rstrip('\\')
+
+
+def _meta_tags(html):
+    tags = {}
+    for tag in _META_RE.findall(html):
+        attrs = {k.lower(): a if a or not b else b for k, a, b in _ATTR_RE.findall(tag)}
+        key = (attrs.get('property') or attrs.get('name') or '').lower()
+        if key and 'content' in attrs and key not in tags:
+            tags[key] = html_unescape(attrs['content'])
+    return tags
+
+
+def _walk_json(node, videos, titles):
+    if isinstance(node, dict):
+        # An object's own title comes before those of objects nested in it
+        nested = []
+        for key, value in node.items():
+            if isinstance(value, str):
+                if key in TITLE_KEYS and value.strip():
+                    titles.append(value.strip())
+                elif classify_video_url(value):
+                    videos.append(value)
+            else:
+                nested.append(value)
+        for value in nested:
+            _walk_json(value, videos, titles)
+    elif isinstance(node, list):
+        for value in node:
+            if isinstance(value, str):
+                if classify_video_url(value):
+                    videos.append(value)
+            else:
+                _walk_json(value, videos, titles)
+
+
+def _find_post(node, post_id, found):
+    """
+    Collect the outermost JSON objects with `post_id` as a value: the post's
+    own entry, not the page or feed around it.
+    """
+    if isinstance(node, dict):
+        if post_id in node.values():
+            found.append(node)
+            return
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return
+    for value in children:
+        _find_post(value, post_id, found)
+
+
+def _json_payloads(html):
+    payloads = []
+    for payload in _JSON_SCRIPT_RE.findall(html):
+        try:
+            payloads.append(json.loads(payload))
+        except ValueError:
+            continue
+    return payloads
+
+
+def post_videos(html, post_id):
+    """
+    Video URLs of the embedded JSON entries for one post (none if the page
+    has no entry for it).
+    """
+    posts, videos = [], []
+    _find_post(_json_payloads(html), post_id, posts)
+    _walk_json(posts, videos, [])
+    return list(dict.fromkeys(videos))
+
+
+def _best(urls, post_id=None):
+    urls = list(dict.fromkeys(urls))
+    if post_id:
+        # Raw markup also links other posts (recommendations, remixes)
+        urls = [url for url in urls if post_id in url] or urls
+    for url in urls:
+        if classify_video_url(url) == "cdn":
+            return url
+    return urls[0] if urls else None
+
+
+def parse_page(html, post_id=None):
+    """
+    Extract (video_url, title) from share page HTML.
+
+    Order: meta tags, embedded JSON scripts, then any video URL in the raw
+    markup (covers escaped flight payloads). CDN URLs win over other MP4s,
+    and URLs containing `post_id` win over both. Pages also embed feed and
+    recommended posts, so when a JSON object has `post_id` as a value the
+    video and title are taken from it alone.
+
+    Returns:
+        tuple: (video_url or None, title or None)
+    """
+    meta = _meta_tags(html)
+    title = next((meta[k] for k in TITLE_META if meta.get(k)), None)
+
+    videos = [_unescape(meta[k]) for k in VIDEO_META if meta.get(k) and classify_video_url(meta[k])]
+    video_url = _best(videos, post_id)
+    if video_url and classify_video_url(video_url) == "cdn":
+        return video_url, title
+
+    payloads = _json_payloads(html)
+    posts = []
+    if post_id:
+        _find_post(payloads, post_id, posts)
+    titles = []
+    _walk_json(posts or payloads, videos, titles)
+    video_url = _best(videos, post_id)
+
+    if not video_url or classify_video_url(video_url) != "cdn":
+        found = (u for u in map(_unescape, _URL_RE.findall(html)) if classify_video_url(u))
+        if posts and video_url:
+            # The post's entry named its video; other markup URLs are other posts'
+            found = (u for u in found if post_id in u)
+        videos.extend(found)
+        video_url = _best(videos, post_id)
+
+    return video_url, title or (titles[0] if titles else None)
+
+
+class PageResolver:
+    """
+    Resolve share URLs with plain HTTP, reusing a saved browser session.
+
+    Example:
+        resolver = PageResolver(BrowserSession())
+        video_url, title = resolver.resolve("https://sora.chatgpt.com/p/s_...")
+    """
+
+    def __init__(self, session: BrowserSession = None, timeout: float = 15, user_agent: str = None):
+        """
+        Args:
+            session: Saved browser session whose cookies (and User-Agent) to send
+            timeout: Request timeout in seconds
+            user_agent: Override the User-Agent (default: the session's, which
+                Cloudflare clearance cookies are bound to)
+        """
+        self.session = session
+        self.timeout = timeout
+        self.user_agent = user_agent or (session.user_agent if session else None) or DEFAULT_USER_AGENT
+        self._http = None
+        self._http_lock = threading.Lock()
+
+    @property
+    def http(self):
+        # One session shared by every thread resolving through this resolver
+        with self._http_lock:
+            if self._http is None:
+                import requests
+
+                http = requests.Session()
+                http.headers.update({
+                    'User-Agent': self.user_agent,
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                    'Accept-Language': 'en-US,en;q=0.9',
+                })
+                self._http = http
+                self.load_cookies()
+        return self._http
+
+    def load_cookies(self):
+        """(Re)load cookies from the browser session, e.g. after it was refreshed."""
+        if self.session is None or self._http is None:
+            return
+        for cookie in self.session.cookies():
+            self._http.cookies.set(cookie['name'], cookie['value'],
+                                   domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+    def resolve(self, sora_url, proxies=None):
+        """
+        Fetch the share page and parse the video URL and title from it.
+
+        Args:
+            sora_url: The Sora video share URL
+            proxies: Optional requests `proxies=` mapping for this request
+
+        Returns:
+            tuple: (video_url, title)
+
+        Raises:
+            ResolveError: Challenge page, HTTP error, or no video URL in the page
+        """
+        import requests
+
+        try:
+            response = self.http.get(sora_url, timeout=self.timeout, proxies=proxies)
+        except requests.RequestException as e:
+            raise ResolveError(f"Request failed: {e}") from e
+
+        html = response.text
+        if response.status_code in (403, 503) or looks_like_challenge(url=response.url, html=html[:20000]):
+            raise ResolveError(f"Cloudflare challenge (HTTP {response.status_code})")
+        if response.status_code != 200:
+            raise ResolveError(f"HTTP {response.status_code}")
+
+        try:
+            from .url_ingest import extract_post_id
+        except ImportError:
+            from url_ingest import extract_post_id
+
+        video_url, title = parse_page(html, extract_post_id(sora_url))
+        if not video_url:
+            raise ResolveError("No video URL in page markup")
+        return video_url, title
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Resolve Sora share URLs to CDN video URLs without a browser',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python page_resolver.py "https://sora.chatgpt.com/p/your-video-url"
+  python page_resolver.py URL1 URL2 --session-dir ~/.cache/sora-downloader/browser-session
+        """
+    )
+
+    parser.add_argument('urls', nargs='+', help='Sora video share URLs')
+    parser.add_argument('--session-dir', default=DEFAULT_SESSION_DIR,
+                        help='Saved browser session to take cookies from')
+    parser.add_argument('--no-session', action='store_true', help='Send no saved cookies')
+
+    args = parser.parse_args()
+
+    resolver = PageResolver(None if args.no_session else BrowserSession(args.session_dir))
+    failed = False
+    for url in args.urls:
+        start = time.time()
+        try:
+            video_url, title = resolver.resolve(url)
+        except ResolveError as e:
+            failed = True
+            print(f"❌ {url}: {e}")
+            continue
+        print(f"✅ {url} ({time.time() - start:.2f}s)")
+        print(f"   Title: {title or 'N/A'}")
+        print(f"   Video: {video_url}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
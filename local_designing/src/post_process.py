@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Post-Processing - CPU-bound work on finished downloads, off the network path
+
+Hashing, faststart rewrites, transcoding or frame extraction with a local
+binary run as hooks in a process pool fed by completed downloads, so a
+download worker hands its file over and goes straight back to the network
+while every core works through the queue. The queue is bounded: when the
+hooks fall behind, handing over blocks, which slows the download stage to
+the pace the CPUs can sustain instead of piling up unprocessed files.
+
+Hooks are given as specs, run in order per file:
+
+  sha256            write <file>.sha256 (sha256sum format)
+  faststart         move the moov atom to the front
+  exec:CMD ...      run a local binary; {path}, {stem}, {dir} and {name}
+                    are substituted per argument (no shell involved), e.g.
+                    "exec:ffmpeg -y -i {path} -vf fps=1/5 {stem}_%03d.jpg"
+  package.module:fn  call fn(path) from an importable module
+
+Per-hook timing and failures are reported after the run.
+
+Date: 2026-10-19
+"""
+
+import argparse
+import hashlib
+import importlib
+import multiprocessing
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .mp4_faststart import faststart_file
+    from .profiling import phased
+except ImportError:
+    from mp4_faststart import faststart_file
+    from profiling import phased
+
+# Seconds an exec: hook may run before it is killed
+EXEC_TIMEOUT = 3600
+
+
+def sha256_hook(path):
+    """Hash the file and write a sha256sum-compatible sidecar next to it."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    with open(path + '.sha256', 'w') as f:
+        f.write(f"{digest.hexdigest()}  {os.path.basename(path)}\n")
+    return digest.hexdigest()
+
+
+def faststart_hook(path):
+    """Rewrite the MP4 moov-first; True if it was moved."""
+    return faststart_file(path)
+
+
+HOOKS = {
+    'sha256': sha256_hook,
+    'faststart': faststart_hook,
+}
+
+
+def _exec_hook(template, path):
+    stem, _ = os.path.splitext(path)
+    fields = {'path': path, 'stem': stem, 'dir': os.path.dirname(path) or '.',
+              'name': os.path.basename(path)}
+    # Substitute per argument, so file names never pass through a shell
+    command = [arg.format(**fields) for arg in shlex.split(template)]
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, timeout=EXEC_TIMEOUT)
+    if result.returncode != 0:
+        tail = result.stderr.decode('utf-8', 'replace').strip().splitlines()[-1:] or ['']
+        raise RuntimeError(f"{command[0]} exited with {result.returncode}: {tail[0]}")
+    return result.returncode
+
+
+def resolve_hook(spec):
+    """
+    The callable for a hook spec (see the module docstring).
+
+    Raises:
+        ValueError: Unknown or unimportable hook
+    """
+    if spec in HOOKS:
+        return HOOKS[spec]
+    if spec.startswith('exec:'):
+        template = spec[5:].strip()
+        if not template:
+            raise ValueError("exec: hook needs a command")
+        return lambda path: _exec_hook(template, path)
+    module_name, _, attr = spec.partition(':')
+    if module_name and attr:
+        try:
+            return getattr(importlib.import_module(module_name), attr)
+        except (ImportError, AttributeError) as e:
+            raise ValueError(f"Cannot load hook {spec}: {e}")
+    raise ValueError(f"Unknown hook: {spec} (expected {', '.join(HOOKS)}, exec:CMD or module:function)")
+
+
+def run_hooks(specs, path):
+    """
+    Run every hook on one file, in order; a failing hook does not stop the rest.
+
+    Returns:
+        list: (spec, seconds, result, error message or None) per hook
+    """
+    outcomes = []
+    for spec in specs:
+        started = time.perf_counter()
+        try:
+            result, error = resolve_hook(spec)(path), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        outcomes.append((spec, time.perf_counter() - started, result, error))
+    return outcomes
+
+
+class _HookStats:
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_error = None
+
+
+class PostProcessor:
+    """
+    Bounded process pool running hooks on finished downloads.
+
+    Example:
+        with PostProcessor(['faststart', 'sha256']) as post:
+            for path in downloads:
+                post.submit(path)   # blocks only while the queue is full
+        print(post.report())
+    """
+
+    def __init__(self, hooks, processes: int = None, max_pending: int = None, on_done=None):
+        """
+        Args:
+            hooks: Hook specs, run in order on every file
+            processes: Pool size (default: CPU count)
+            max_pending: Files queued or running before submit() blocks
+                (default: twice the pool size)
+            on_done: Optional callable(path, outcomes) in the parent after
+                each file; outcomes as returned by run_hooks
+        """
+        self.hooks = list(hooks)
+        for spec in self.hooks:
+            resolve_hook(spec)  # fail on a typo before any download starts
+        self.processes = processes or os.cpu_count() or 1
+        self.max_pending = max_pending or self.processes * 2
+        self.on_done = on_done
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        # Not fork: submit() runs in a download thread while other threads
+        # hold locks (urllib3 pools, stdout) a forked child would inherit.
+        # The forkserver is single-threaded and starts workers faster than spawn.
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                         mp_context=multiprocessing.get_context(method))
+        self._lock = threading.Lock()
+        self._stats = {spec: _HookStats() for spec in self.hooks}
+        self.files = 0
+        self.blocked_seconds = 0.0
+        self.queue_seconds = 0.0
+
+    @phased('post-process')
+    def submit(self, path):
+        """
+        Queue a finished file for the hooks.
+
+        Blocks while max_pending files are already queued or running, which
+        is the backpressure on the download stage.
+        """
+        if not self.hooks:
+            return
+        started = time.perf_counter()
+        self._slots.acquire()
+        blocked = time.perf_counter() - started
+        submitted = time.perf_counter()
+        try:
+            future = self._pool.submit(run_hooks, self.hooks, path)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.blocked_seconds += blocked
+        future.add_done_callback(lambda f: self._finished(path, submitted, f))
+
+    def _finished(self, path, submitted, future):
+        self._slots.release()
+        try:
+            outcomes = future.result()
+        except Exception as e:
+            # The worker process died; every hook counts as failed
+            outcomes = [(spec, 0.0, None, f"{type(e).__name__}: {e}") for spec in self.hooks]
+        with self._lock:
+            self.files += 1
+            busy = sum(seconds for _, seconds, _, _ in outcomes)
+            self.queue_seconds += max(0.0, time.perf_counter() - submitted - busy)
+            for spec, seconds, _, error in outcomes:
+                stats = self._stats[spec]
+                stats.runs += 1
+                stats.seconds += seconds
+                stats.max_seconds = max(stats.max_seconds, seconds)
+                if error:
+                    stats.failures += 1
+                    stats.last_error = error
+        for spec, _, _, error in outcomes:
+            if error:
+                print(f"⚠️ Hook {spec} failed on {path}: {error}")
+        if self.on_done:
+            self.on_done(path, outcomes)
+
+    def close(self):
+        """Wait for every queued file to be processed."""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def report(self):
+        """
+        Per-hook statistics.
+
+        Returns:
+            list: dicts with hook, runs, failures, total_s, mean_ms, max_ms
+                and last_error
+        """
+        with self._lock:
+            return [{
+                'hook': spec,
+                'runs': stats.runs,
+                'failures': stats.failures,
+                'total_s': stats.seconds,
+                'mean_ms': stats.seconds / stats.runs * 1000 if stats.runs else None,
+                'max_ms': stats.max_seconds * 1000,
+                'last_error': stats.last_error,
+            } for spec, stats in self._stats.items()]
+
+
+def add_hook_arguments(parser):
+    """
+    Add --hook, --hook-processes and --hook-queue to a CLI.
+    """
+    parser.add_argument('--hook', action='append', default=[], metavar='SPEC',
+                        help='Post-process finished files in a process pool: sha256, faststart, '
+                             'exec:CMD or module:function (repeatable, run in order)')
+    parser.add_argument('--hook-processes', type=int, metavar='N',
+                        help='Processes running hooks (default: CPU count)')
+    parser.add_argument('--hook-queue', type=int, metavar='N',
+                        help='Finished files waiting for hooks before downloads pause '
+                             '(default: twice the processes)')
+
+
+def post_processor_from_args(args):
+    """A PostProcessor from add_hook_arguments options, or None without hooks."""
+    if not args.hook:
+        return None
+    return PostProcessor(args.hook, processes=args.hook_processes, max_pending=args.hook_queue)
+
+
+def print_report(post, file=None):
+    """Print per-hook timing and failures, and how long downloads waited on hooks."""
+    print(f"\n{'Hook':<24} | {'runs':>6} | {'failed':>6} | {'mean ms':>8} | {'max ms':>8} | {'total s':>8}",
+          file=file)
+    print("-" * 76, file=file)
+    for row in post.report():
+        mean = f"{row['mean_ms']:.0f}" if row['mean_ms'] is not None else '-'
+        print(f"{row['hook'][:24]:<24} | {row['runs']:>6} | {row['failures']:>6} | {mean:>8} | "
+              f"{row['max_ms']:>8.0f} | {row['total_s']:>8.2f}", file=file)
+    print(f"🧮 {post.files} files on {post.processes} processes; downloads waited "
+          f"{post.blocked_seconds:.2f}s for the queue, files queued {post.queue_seconds:.2f}s in total",
+          file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run post-download hooks over existing files in a process pool',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python post_process.py download_vids/*.mp4 --hook faststart --hook sha256
+  python post_process.py clip.mp4 --hook "exec:ffmpeg -y -i {path} -vf fps=1/5 {stem}_%03d.jpg"
+        """
+    )
+    parser.add_argument('paths', nargs='+', help='Files to process')
+    add_hook_arguments(parser)
+
+    args = parser.parse_args()
+    if not args.hook:
+        parser.error("at least one --hook is required")
+
+    try:
+        post = post_processor_from_args(args)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    with post:
+        for path in args.paths:
+            post.submit(path)
+    print_report(post)
+    if any(row['failures'] for row in post.report()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
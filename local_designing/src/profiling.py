@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Profiling - Sampling profiler with per-phase attribution
+
+`--profile` on the CLIs starts a sampler thread that snapshots every thread's
+Python stack a hundred times a second (sys._current_frames, no tracing
+hooks, so the code runs at full speed between samples). Code marks what it
+is doing with phases:
+
+    resolve       share URL -> video URL (API calls, browserless resolve)
+    navigate      browser page load
+    dom           DOM snapshot in the page
+    transfer      streaming the video
+    disk-write    syncing and renaming the output file, bulk copies (chunk
+                  writes from the transfer loop count as transfer)
+    post-process  faststart rewrites, waiting on post-download hooks
+
+Each sample is filed under the innermost phase of its thread, so time in
+requests or Playwright internals lands in the phase that called them. The
+run writes flamegraph-compatible collapsed stacks (one "frame;frame;... N"
+line per stack, the phase as the root frame) for flamegraph.pl, speedscope
+or inferno, and a per-phase summary: calls, wall and CPU seconds (inclusive
+of nested phases), share of samples, and the hottest lines of this
+project's own code in each phase.
+
+Phases cost one global lookup when profiling is off.
+
+Date: 2026-10-19
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+
+PHASES = ('resolve', 'navigate', 'dom', 'transfer', 'disk-write', 'post-process')
+
+# Samples of the main thread outside any phase
+UNPHASED = 'other'
+
+# Frames from this directory count as our own code in the hot spot lists
+_OWN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_active = None
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name):
+    """
+    Context manager marking the calling thread as being in `name`.
+
+    A no-op unless a Profiler is running.
+    """
+    profiler = _active
+    if profiler is None:
+        return _NULL_PHASE
+    return profiler.phase(name)
+
+
+def phased(name):
+    """Decorator running the whole function in a phase."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler = _active
+            if profiler is None:
+                return fn(*args, **kwargs)
+            with profiler.phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'stack', 'wall', 'cpu')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.stack = self.profiler._stack()
+        self.stack.append(self.name)
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        self.stack.pop()
+        with self.profiler._lock:
+            totals = self.profiler._totals[self.name]
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += cpu
+        return False
+
+
+class Profiler:
+    """
+    Sample all threads' stacks and attribute them to phases.
+
+    Example:
+        with Profiler() as profiler:
+            downloader.download_video(url)
+        profiler.write_collapsed("profile.collapsed")
+        print_summary(profiler)
+    """
+
+    def __init__(self, interval: float = 0.01):
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = Counter()
+        self.hot = defaultdict(Counter)
+        self.sample_count = 0
+        self.sampler_seconds = 0.0
+        self.started = None
+        self.stopped = None
+        self._lock = threading.Lock()
+        self._totals = defaultdict(lambda: [0, 0.0, 0.0])
+        self._thread_stacks = {}
+        self._labels = {}
+        self._main = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stack(self):
+        ident = threading.get_ident()
+        stack = self._thread_stacks.get(ident)
+        if stack is None:
+            stack = self._thread_stacks.setdefault(ident, [])
+        return stack
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def start(self):
+        global _active
+        _active = self
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        global _active
+        if _active is self:
+            _active = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.stopped is None:
+            self.stopped = time.perf_counter()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            self._sample()
+            self.sampler_seconds += time.perf_counter() - started
+
+    def _sample(self):
+        me = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            try:
+                name = self._thread_stacks[ident][-1]
+            except (KeyError, IndexError):
+                # Idle pool workers and helper threads are not interesting
+                if ident != self._main:
+                    continue
+                name = UNPHASED
+
+            labels = []
+            own = None
+            while frame is not None:
+                key = (frame.f_code, frame.f_lineno)
+                label = self._labels.get(key)
+                if label is None:
+                    code = frame.f_code
+                    label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    self._labels[key] = label
+                labels.append(label)
+                if own is None and frame.f_code.co_filename.startswith(_OWN_DIR):
+                    own = label
+                frame = frame.f_back
+            labels.append(f"[{name}]")
+            labels.reverse()
+
+            self.stacks[';'.join(labels)] += 1
+            self.samples[name] += 1
+            if own:
+                self.hot[name][own] += 1
+        self.sample_count += 1
+
+    def write_collapsed(self, path):
+        """Write the stacks in the collapsed format flamegraph tools read."""
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, top: int = 3):
+        """
+        Per-phase attribution.
+
+        Returns:
+            dict: duration_s, interval_s, samples, sampler_s and phases, a list
+                of dicts with phase, calls, wall_s, cpu_s (both inclusive of
+                nested phases), samples, share and hot ([label, samples] for
+                the busiest lines of this project's code)
+        """
+        with self._lock:
+            totals = {name: list(values) for name, values in self._totals.items()}
+        names = [name for name in PHASES if name in totals or name in self.samples]
+        names += sorted((set(totals) | set(self.samples)) - set(names))
+        total_samples = sum(self.samples.values())
+        end = self.stopped or time.perf_counter()
+        return {
+            'duration_s': end - self.started if self.started else 0.0,
+            'interval_s': self.interval,
+            'samples': total_samples,
+            'sampler_s': self.sampler_seconds,
+            'phases': [{
+                'phase': name,
+                'calls': totals.get(name, [0])[0],
+                'wall_s': totals.get(name, [0, 0.0])[1],
+                'cpu_s': totals.get(name, [0, 0.0, 0.0])[2],
+                'samples': self.samples[name],
+                'share': self.samples[name] / total_samples if total_samples else 0.0,
+                'hot': [list(item) for item in self.hot[name].most_common(top)],
+            } for name in names],
+        }
+
+
+def print_summary(profiler, file=None):
+    """Print the per-phase table and each phase's hot spots."""
+    summary = profiler.summary()
+    print(f"\n{'Phase':<14} | {'calls':>7} | {'wall s':>8} | {'cpu s':>8} | {'samples':>7} | {'share':>6}",
+          file=file)
+    print("-" * 66, file=file)
+    for row in summary['phases']:
+        calls = row['calls'] if row['calls'] else '-'
+        print(f"{row['phase']:<14} | {calls:>7} | {row['wall_s']:>8.2f} | {row['cpu_s']:>8.2f} | "
+              f"{row['samples']:>7} | {row['share']:>6.1%}", file=file)
+        for label, count in row['hot']:
+            print(f"   ↳ {count / row['samples']:.0%} {label}", file=file)
+    overhead = summary['sampler_s'] / summary['duration_s'] if summary['duration_s'] else 0.0
+    print(f"🔬 {summary['samples']} samples over {summary['duration_s']:.2f}s "
+          f"(sampler overhead {overhead:.1%})", file=file)
+
+
+def add_profile_arguments(parser):
+    """
+    Add --profile and --profile-out to a CLI.
+    """
+    parser.add_argument('--profile', action='store_true',
+                        help='Sample the run and attribute time to phases '
+                             '(resolve, navigate, dom, transfer, disk-write, post-process)')
+    parser.add_argument('--profile-out', default='sora-profile', metavar='PREFIX',
+                        help='With --profile: write PREFIX.collapsed (flamegraph stacks) '
+                             'and PREFIX.json (per-phase summary)')
+
+
+def profile_from_args(args):
+    """
+    Start profiling if --profile was given; the results are written and the
+    summary printed when the process exits, including on sys.exit().
+
+    Returns:
+        Profiler or None
+    """
+    if not args.profile:
+        return None
+    profiler = Profiler().start()
+
+    def finish():
+        profiler.stop()
+        profiler.write_collapsed(f"{args.profile_out}.collapsed")
+        with open(f"{args.profile_out}.json", 'w') as f:
+            json.dump(profiler.summary(), f, indent=2)
+        print_summary(profiler)
+        print(f"🔥 Stacks: {args.profile_out}.collapsed (flamegraph.pl, speedscope), "
+              f"summary: {args.profile_out}.json")
+
+    atexit.register(finish)
+    return profiler
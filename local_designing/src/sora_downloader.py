@@ -7,20 +7,59 @@ Author: Reverse Engineered
 Date: 2025-12-15
 """
 
-import requests
 import json
+import os
 import sys
 import argparse
 from urllib.parse import urlparse, quote
 import time
 import re  # Fixed: Import re at top level
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .disk_io import AtomicFileWriter, FsyncPolicy, unique_path
+    from .endpoints import EndpointPool, endpoints_from_env
+    from .hedging import add_hedge_arguments, hedger_from_args, print_report as print_hedge_report
+    from .mp4_faststart import NotFaststartable, faststart_file, stream_faststart
+    from .mp4_probe import probe_url
+    from .profiling import add_profile_arguments, phased, profile_from_args
+    from .proxy_pool import BLAME_PROXY_STATUS, ProxyPool, add_proxy_arguments, direct_lease, print_report, proxies_from_args
+    from .url_ingest import canonicalize_url, extract_post_id
+except ImportError:
+    from disk_io import AtomicFileWriter, FsyncPolicy, unique_path
+    from endpoints import EndpointPool, endpoints_from_env
+    from hedging import add_hedge_arguments, hedger_from_args, print_report as print_hedge_report
+    from mp4_faststart import NotFaststartable, faststart_file, stream_faststart
+    from mp4_probe import probe_url
+    from profiling import add_profile_arguments, phased, profile_from_args
+    from proxy_pool import BLAME_PROXY_STATUS, ProxyPool, add_proxy_arguments, direct_lease, print_report, proxies_from_args
+    from url_ingest import canonicalize_url, extract_post_id
 
 class SoraVideoDownloader:
-    def __init__(self):
-        self.api_base = "https://api.soracdn.workers.dev"
-        self.api_proxy = f"{self.api_base}/api-proxy/"
-        self.download_proxy = f"{self.api_base}/download-proxy"
-        self.thumbnail_proxy = f"{self.api_base}/thumbnail-proxy"
+    # How download_video names files and whether it waits for metadata
+    NAMING_POLICIES = ('title', 'post_id', 'background')
+    
+    # Transports for small API calls (metadata, thumbnails, connection test)
+    TRANSPORTS = ('http1', 'http2')
+    
+    def __init__(self, naming='title', transport='http1', fsync_policy='none', faststart=False,
+                 endpoints=None, proxies=None, hedger=None, on_progress=None):
+        if transport not in self.TRANSPORTS:
+            raise ValueError(f"Unknown transport: {transport}")
+        self.naming = naming
+        self.transport = transport
+        self.fsync_policy = FsyncPolicy.parse(fsync_policy)
+        self.faststart = faststart
+        self._session = None
+        self._http2 = None
+        # Equivalent API hosts; requests go to the fastest healthy one
+        self.endpoints = EndpointPool(endpoints or endpoints_from_env())
+        # Proxy URLs or a ProxyPool; each HTTP call/transfer leases one proxy
+        self.proxy_pool = ProxyPool.coerce(proxies)
+        # Optional hedging.Hedger duplicating slow small requests
+        self.hedger = hedger
+        # Optional callable(output_path, downloaded, total) fed as chunks arrive
+        self.on_progress = on_progress
         
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -30,6 +69,82 @@ class SoraVideoDownloader:
             'Referer': 'https://sorasave.app/'
         }
     
+    @property
+    def api_base(self):
+        return self.endpoints.base
+    
+    @property
+    def api_proxy(self):
+        return f"{self.api_base}/api-proxy/"
+    
+    @property
+    def download_proxy(self):
+        return f"{self.api_base}/download-proxy"
+    
+    @property
+    def thumbnail_proxy(self):
+        return f"{self.api_base}/thumbnail-proxy"
+    
+    @property
+    def session(self):
+        """Pooled requests session (HTTP/1.1 keep-alive) for API calls"""
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+        return self._session
+    
+    @property
+    def http2(self):
+        """Shared multiplexed HTTP/2 client (requires httpx[http2])"""
+        if self._http2 is None:
+            try:
+                from .http2_transport import Http2Transport
+            except ImportError:
+                from http2_transport import Http2Transport
+
+            self._http2 = Http2Transport(self.headers)
+        return self._http2
+    
+    def _proxy_lease(self):
+        """Lease a proxy from the pool (a no-op lease without one)"""
+        return self.proxy_pool.lease() if self.proxy_pool else direct_lease()
+    
+    def _send(self, url, timeout=30, stream=False, headers=None):
+        """
+        GET a small API resource over the configured transport
+        
+        Both transports raise requests exceptions and return objects with the
+        requests.Response interface used here. The HTTP/2 client keeps one
+        multiplexed connection and does not rotate through the proxy pool.
+        """
+        if self.transport == 'http2':
+            return self.http2.get(url, headers=headers, timeout=timeout, stream=stream)
+        with self._proxy_lease() as lease:
+            started = time.time()
+            response = self.session.get(url, headers=headers, timeout=timeout, stream=stream,
+                                        proxies=lease.requests_proxies)
+            if response.status_code in BLAME_PROXY_STATUS:
+                # Blocked or throttled egress IP; the caller sees the response
+                lease.failure(f"HTTP {response.status_code}")
+            else:
+                lease.success(latency=time.time() - started)
+            return response
+    
+    def _hedged(self, send, kind='api'):
+        """Run send(), duplicating it if slow when hedging is enabled"""
+        return self.hedger.call(send, kind) if self.hedger else send()
+    
+    def _get(self, url, timeout=30, stream=False, headers=None, kind='api'):
+        """_send with failover to the next endpoint on errors and 5xx, hedged if enabled"""
+        return self.endpoints.request(
+            url, lambda u: self._hedged(
+                lambda: self._send(u, timeout=timeout, stream=stream, headers=headers), kind
+            )
+        )
+    
+    @phased('resolve')
     def extract_video_info(self, sora_url):
         """
         Extract video information from Sora URL
@@ -40,6 +155,8 @@ class SoraVideoDownloader:
         Returns:
             dict: Video information including post_id and other metadata
         """
+        import requests
+
         print(f"🔍 Extracting video info from: {sora_url}")
         
         try:
@@ -47,7 +164,7 @@ class SoraVideoDownloader:
             api_url = self.api_proxy + quote(sora_url, safe='')
             print(f"📡 Calling API: {api_url}")
             
-            response = requests.get(api_url, headers=self.headers, timeout=30)
+            response = self._get(api_url, timeout=30)
             response.raise_for_status()
             
             video_data = response.json()
@@ -119,48 +236,65 @@ class SoraVideoDownloader:
         
         return cleaned if cleaned else "untitled_video"
     
-    def download_video(self, sora_url, output_path=None):
+    def local_video_info(self, sora_url):
         """
-        Download the video from Sora URL
-
+        Derive video info from the share URL itself, without an API call
+        
+        Share URLs already carry the `s_<hex>` post ID that the download
+        proxy needs, so no metadata round-trip is required to build the link.
+        
         Args:
             sora_url (str): The Sora video URL
-            output_path (str): Optional output path for the video file
-
+            
         Returns:
-            str: Path to the downloaded video file
+            dict: {'post_id': ..., 'source': 'url'} or None if the URL has no post ID
         """
-        try:
-            # Step 1: Extract video info
-            video_info = self.extract_video_info(sora_url)
-
-            # Step 2: Generate download URL
-            download_url = self.generate_download_url(video_info)
+        post_id = extract_post_id(sora_url)
+        if not post_id:
+            return None
+        return {'post_id': post_id, 'source': 'url'}
+    
+    @phased('transfer')
+    def _transfer(self, download_url, output_path):
+        """
+        Stream a download-proxy response to disk
+        
+        Args:
+            download_url (str): URL from generate_download_url
+            output_path (str): Destination file path
+            
+        Returns:
+            int: Number of bytes written
+        """
+        import requests
 
-            # Step 3: Determine output filename BEFORE download
-            if not output_path:
-                title = video_info.get('title')
-                post_id = video_info.get('post_id')
-                
-                # If title is missing or empty, try to use part of the ID or timestamp
-                if not title:
-                    title = f"sora_{post_id}"
-                
-                clean_title = self._clean_filename(title)
-                output_path = f"{clean_title}.mp4"
-                print(f"📝 Auto-naming file: {output_path}")
+        print(f"📥 Downloading video to {output_path}...")
 
-            # Step 4: Download the video
-            print(f"📥 Downloading video to {output_path}...")
+        if self.faststart:
+            written = self._transfer_faststart(download_url, output_path)
+            if written is not None:
+                return written
 
-            response = requests.get(download_url, headers=self.headers, stream=True, timeout=60)
+        with self._proxy_lease() as lease:
+            started = time.time()
+            response = self.endpoints.request(
+                download_url, lambda u: requests.get(u, headers=self.headers, stream=True, timeout=60,
+                                                     proxies=lease.requests_proxies)
+            )
+            latency = time.time() - started
             response.raise_for_status()
 
-            # Save the video
+            # The proxy answers unknown IDs with an error document, not a video
+            content_type = response.headers.get('content-type', '')
+            if content_type.startswith(('application/json', 'text/')):
+                response.close()
+                raise requests.HTTPError(f"Unexpected content type: {content_type}", response=response)
+
+            # Save the video via a temp file that is renamed into place on success
             total_size = int(response.headers.get('content-length', 0))
             downloaded = 0
 
-            with open(output_path, 'wb') as f:
+            with AtomicFileWriter(output_path, total_size or None, self.fsync_policy) as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     if chunk:
                         f.write(chunk)
@@ -169,16 +303,191 @@ class SoraVideoDownloader:
                         if total_size > 0:
                             progress = (downloaded / total_size) * 100
                             print(f"⏳ Progress: {progress:.1f}%", end='\r')
+                        if self.on_progress:
+                            self.on_progress(output_path, downloaded, total_size or None)
+
+            lease.success(nbytes=downloaded, seconds=time.time() - started, latency=latency)
+
+        print(f"\n✅ Video downloaded successfully: {output_path}")
+        if total_size > 0:
+             print(f"📊 File size: {downloaded / (1024*1024):.2f} MB")
+        
+        # Server without Range support: relocate moov as a post-download pass
+        if self.faststart and faststart_file(output_path, fsync_policy=self.fsync_policy):
+            print(f"🎞️  Moved moov atom to front: {output_path}")
+        
+        return downloaded
+    
+    def _transfer_faststart(self, download_url, output_path):
+        """
+        Download moov-first in one pass using Range requests
+        
+        Returns:
+            int: Bytes written, or None if the server/file needs the normal path
+        """
+        import requests
+
+        def progress(downloaded, total):
+            print(f"⏳ Progress: {downloaded / total * 100:.1f}%", end='\r')
+            if self.on_progress:
+                self.on_progress(output_path, downloaded, total)
+
+        # One proxy for all ranges of the file
+        with self._proxy_lease() as lease:
+            def get(url, headers):
+                return self.endpoints.request(
+                    url, lambda u: requests.get(u, headers={**self.headers, **headers}, stream=True,
+                                                timeout=60, proxies=lease.requests_proxies)
+                )
+
+            started = time.time()
+            try:
+                written = stream_faststart(get, download_url, output_path, self.fsync_policy,
+                                           chunk_size=8192, progress=progress)
+            except NotFaststartable as e:
+                print(f"ℹ️  Faststart streaming not possible ({e}), downloading normally")
+                return None
+            lease.success(nbytes=written, seconds=time.time() - started)
+
+        print(f"\n✅ Video downloaded successfully (faststart): {output_path}")
+        print(f"📊 File size: {written / (1024*1024):.2f} MB")
+        return written
+    
+    def probe_video(self, video_info):
+        """
+        Read duration, resolution and codecs with Range requests (no full download)
+        
+        Args:
+            video_info (dict): Video information (a post_id is enough)
+            
+        Returns:
+            dict: See mp4_probe.probe_url
+        """
+        with self._proxy_lease() as lease:
+            def get(url, headers):
+                return self.endpoints.request(
+                    url, lambda u: self._hedged(
+                        lambda: self.session.get(u, headers=headers, stream=True, timeout=60,
+                                                 proxies=lease.requests_proxies), 'probe'
+                    )
+                )
+            
+            return probe_url(get, self.generate_download_url(video_info))
+
+    def probe_size(self, sora_url):
+        """
+        Expected video size from a 1-byte Range request, without an API call
+
+        Args:
+            sora_url (str): The Sora video URL
+
+        Returns:
+            int: Size in bytes, or None if the URL has no post ID or the probe failed
+        """
+        try:
+            from .media_select import probe_candidate
+        except ImportError:
+            from media_select import probe_candidate
+
+        video_info = self.local_video_info(sora_url)
+        if not video_info:
+            return None
+        get = lambda url, headers: self._get(url, timeout=30, stream=True, headers=headers, kind='probe')
+        return probe_candidate(get, self.generate_download_url(video_info)).size
+
+    def _output_name(self, video_info):
+        title = video_info.get('title')
+        post_id = video_info.get('post_id')
+        
+        # If title is missing or empty, try to use part of the ID or timestamp
+        if not title:
+            title = f"sora_{post_id}" if video_info.get('source') != 'url' else post_id
+        
+        return f"{self._clean_filename(title)}.mp4"
+    
+    def download_video(self, sora_url, output_path=None, video_info=None, naming=None):
+        """
+        Download the video from Sora URL
+
+        Args:
+            sora_url (str): The Sora video URL
+            output_path (str): Optional output path for the video file
+            video_info (dict): Optional metadata already returned by extract_video_info
+            naming (str): Naming policy (default: self.naming)
+                - "title": fetch metadata first and name the file after the title
+                - "post_id": skip metadata, build the link from the URL's post ID
+                - "background": like "post_id", but fetch metadata in parallel
+                  and rename the finished file to its title
+
+        Returns:
+            str: Path to the downloaded video file
+        """
+        import requests
+
+        naming = naming or self.naming
+        if naming not in self.NAMING_POLICIES:
+            raise ValueError(f"Unknown naming policy: {naming}")
+
+        metadata = None
+        executor = None
+        try:
+            # Step 1: Get video info - locally from the URL when the policy allows it
+            if video_info is None and naming != 'title':
+                video_info = self.local_video_info(sora_url)
+                if video_info and naming == 'background':
+                    executor = ThreadPoolExecutor(max_workers=1)
+                    metadata = executor.submit(self.extract_video_info, sora_url)
+            if video_info is None:
+                video_info = self.extract_video_info(sora_url)
+
+            # Step 2: Generate download URL
+            download_url = self.generate_download_url(video_info)
+
+            # Step 3: Determine output filename BEFORE download
+            auto_named = not output_path
+            if auto_named:
+                output_path = self._output_name(video_info)
+                print(f"📝 Auto-naming file: {output_path}")
+
+            # Step 4: Download the video, verifying a local post ID if the proxy rejects it
+            try:
+                self._transfer(download_url, output_path)
+            except requests.HTTPError:
+                if video_info.get('source') != 'url':
+                    raise
+                print("⚠️  Local post ID rejected, verifying via API...")
+                verified = metadata.result() if metadata else self.extract_video_info(sora_url)
+                if verified.get('post_id') == video_info['post_id']:
+                    raise
+                video_info = verified
+                metadata = None
+                if auto_named:
+                    output_path = self._output_name(video_info)
+                self._transfer(self.generate_download_url(video_info), output_path)
 
-            print(f"\n✅ Video downloaded successfully: {output_path}")
-            if total_size > 0:
-                 print(f"📊 File size: {downloaded / (1024*1024):.2f} MB")
+            # Step 5: Apply the title once background metadata has arrived
+            if metadata is not None:
+                try:
+                    info = metadata.result()
+                except Exception:
+                    info = {}
+                title = info.get('title')
+                if auto_named and title and info.get('post_id') == video_info['post_id']:
+                    titled_path = os.path.join(os.path.dirname(output_path), self._output_name(info))
+                    # Never replace another video that already has this title
+                    titled_path = unique_path(titled_path, info['post_id'])
+                    os.replace(output_path, titled_path)
+                    print(f"📝 Renamed to title: {titled_path}")
+                    output_path = titled_path
             
             return output_path
 
         except Exception as e:
             print(f"❌ Download failed: {e}")
             raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
 
     def get_thumbnail_url(self, video_info):
         """
@@ -198,18 +507,24 @@ class SoraVideoDownloader:
         print(f"🖼️  Thumbnail URL: {thumbnail_url}")
         return thumbnail_url
     
-    def test_connection(self):
+    def start_health_probe(self, interval=30):
+        """Keep endpoint latency/health fresh from a background thread"""
+        self.endpoints.probe_interval = interval
+        self.endpoints.start_prober(self._send)
+    
+    def test_connection(self, rounds=1):
         """
-        Test if the API is accessible
+        Probe every configured API endpoint
         
+        Args:
+            rounds (int): Probe rounds (more rounds give steadier percentiles)
+            
         Returns:
-            bool: True if API is accessible
+            bool: True if at least one endpoint is accessible
         """
-        try:
-            response = requests.get(self.api_base, headers=self.headers, timeout=10)
-            return response.status_code == 200
-        except:
-            return False
+        for _ in range(rounds):
+            self.endpoints.probe_once(self._send)
+        return any(row['healthy'] for row in self.endpoints.report())
 
 
 def main():
@@ -221,6 +536,8 @@ Examples:
   python sora_downloader.py "https://sora.chatgpt.com/p/your-video-url"
   python sora_downloader.py "https://sora.chatgpt.com/p/your-video-url" -o my_video.mp4
   python sora_downloader.py "https://sora.chatgpt.com/p/your-video-url" --info-only
+  python sora_downloader.py "https://sora.chatgpt.com/p/your-video-url" --info-only --probe
+  python sora_downloader.py "https://sora.chatgpt.com/p/your-video-url" --profile
         """
     )
     
@@ -240,6 +557,12 @@ Examples:
         help='Only extract video information without downloading'
     )
     
+    parser.add_argument(
+        '--probe',
+        action='store_true',
+        help='With --info-only: read duration, resolution and codec via Range requests'
+    )
+    
     parser.add_argument(
         '--thumbnail',
         action='store_true',
@@ -252,6 +575,14 @@ Examples:
         help='Test API connection'
     )
     
+    parser.add_argument(
+        '--endpoint',
+        action='append',
+        metavar='URL',
+        help='API base URL; repeat for failover between equivalent hosts '
+             '(default: $SORA_API_ENDPOINTS or the public worker)'
+    )
+    
     parser.add_argument(
         '--method',
         choices=['proxy', 'playwright'],
@@ -259,14 +590,52 @@ Examples:
         help='Download method: proxy (uses CDN worker) or playwright (independent, requires camoufox)'
     )
     
+    parser.add_argument(
+        '--naming',
+        choices=SoraVideoDownloader.NAMING_POLICIES,
+        default='title',
+        help='File naming: title (fetch metadata first), post_id (no metadata round-trip), '
+             'background (start immediately, rename to title when metadata arrives)'
+    )
+    
+    parser.add_argument(
+        '--http2',
+        action='store_true',
+        help='Multiplex metadata and thumbnail requests over HTTP/2 (requires httpx[http2])'
+    )
+    
+    parser.add_argument(
+        '--fsync',
+        default='none',
+        type=FsyncPolicy.parse,
+        metavar='POLICY',
+        help='Durability of finished files: none, file, or batch:N (default: none)'
+    )
+    
+    parser.add_argument(
+        '--faststart',
+        action='store_true',
+        help='Write MP4s with the moov atom first so web playback starts immediately'
+    )
+    
+    add_proxy_arguments(parser)
+    add_hedge_arguments(parser)
+    add_profile_arguments(parser)
+    
     args = parser.parse_args()
+    profile_from_args(args)
+    
+    proxy_pool = None
+    proxies = proxies_from_args(args)
+    if proxies:
+        proxy_pool = ProxyPool(proxies, strategy=args.proxy_strategy)
     
     # Use Playwright method if requested
     if args.method == 'playwright':
         try:
             from sora_playwright_downloader import SoraPlaywrightDownloader
             print("🎭 Using Playwright method (independent, no CDN worker)")
-            downloader = SoraPlaywrightDownloader()
+            downloader = SoraPlaywrightDownloader(proxy=proxy_pool)
             output_path = downloader.download(args.url, args.output)
             print(f"✅ Downloaded: {output_path}")
             return
@@ -278,17 +647,42 @@ Examples:
             sys.exit(1)
     
     # Initialize downloader
-    downloader = SoraVideoDownloader()
+    downloader = SoraVideoDownloader(
+        naming=args.naming,
+        transport='http2' if args.http2 else 'http1',
+        fsync_policy=args.fsync,
+        faststart=args.faststart,
+        endpoints=args.endpoint,
+        proxies=proxy_pool,
+        hedger=hedger_from_args(args)
+    )
     
     # Test connection if requested
     if args.test:
         print("🧪 Testing API connection...")
-        if downloader.test_connection():
-            print("✅ API connection successful!")
+        ok = downloader.test_connection(rounds=3)
+        print(f"\n{'Endpoint':<40} | {'Up':<3} | {'p50 ms':>7} | {'p99 ms':>7} | {'ok/fail':>7}")
+        print("-" * 76)
+        for row in downloader.endpoints.report():
+            p50 = f"{row['p50_ms']:.0f}" if row['p50_ms'] is not None else '-'
+            p99 = f"{row['p99_ms']:.0f}" if row['p99_ms'] is not None else '-'
+            up = '✅' if row['healthy'] else '❌'
+            print(f"{row['base']:<40} | {up:<2} | {p50:>7} | {p99:>7} | {row['successes']:>3}/{row['failures']:<3}")
+            if row['last_error'] and not row['healthy']:
+                print(f"   ↳ {row['last_error']}")
+        if ok:
+            print("\n✅ API connection successful!")
         else:
-            print("❌ API connection failed!")
+            print("\n❌ API connection failed!")
+            sys.exit(1)
         return
     
+    if len(downloader.endpoints.endpoints) > 1:
+        downloader.start_health_probe()
+    
+    # Normalize pasted variants (www., tracking params, trailing punctuation)
+    args.url = canonicalize_url(args.url) or args.url
+    
     # Validate URL format
     if not args.url.startswith('https://sora.chatgpt.com/p/'):
         print("❌ Error: URL must be a valid Sora video URL starting with 'https://sora.chatgpt.com/p/'")
@@ -315,26 +709,44 @@ Examples:
             if thumbnail_url:
                 print(f"\n🖼️  Thumbnail URL:")
                 print(f"   {thumbnail_url}")
+            
+            if args.probe:
+                probe = downloader.probe_video(video_info)
+                print(f"\n🎞️  Media:")
+                print(f"   Duration: {probe['duration']} s")
+                print(f"   Resolution: {probe['width']}x{probe['height']}")
+                print(f"   Codecs: {probe['video_codec'] or 'N/A'} / {probe['audio_codec'] or 'N/A'}")
+                print(f"   Size: {probe['size'] / (1024*1024):.2f} MB")
+                print(f"   (probed {probe['bytes_fetched']} bytes, moov at {probe['moov_position']})")
         else:
-            # Download the video (includes extraction)
-            output_path = downloader.download_video(args.url, args.output)
+            # Extract once and reuse it for both the video and the thumbnail
+            video_info = None
+            if args.naming == 'title':
+                video_info = downloader.extract_video_info(args.url)
+            output_path = downloader.download_video(args.url, args.output, video_info=video_info)
+            downloader.fsync_policy.flush()
+            if proxy_pool:
+                print_report(proxy_pool)
+            if downloader.hedger:
+                print_hedge_report(downloader.hedger)
             
             # Download thumbnail if requested
             if args.thumbnail:
-                video_info = downloader.extract_video_info(args.url) # Re-extract or cached? Better to just get it. 
-                # Optimization: extract_video_info calls API. download_video ALSO calls extract_video_info.
-                # Ideally download_video should return info or we reuse it. 
-                # But for now, sticking to user's logic structure to simply fix the reported bug.
+                try:
+                    from .thumbnails import ThumbnailFetcher
+                except ImportError:
+                    from thumbnails import ThumbnailFetcher
                 
-                thumbnail_url = downloader.get_thumbnail_url(video_info)
-                if thumbnail_url:
-                    print(f"\n📥 Downloading thumbnail...")
-                    response = requests.get(thumbnail_url, headers=downloader.headers)
-                    if response.status_code == 200:
-                        thumbnail_path = output_path.replace('.mp4', '_thumbnail.jpg')
-                        with open(thumbnail_path, 'wb') as f:
-                            f.write(response.content)
-                        print(f"✅ Thumbnail saved: {thumbnail_path}")
+                print(f"\n📥 Downloading thumbnail...")
+                fetcher = ThumbnailFetcher(downloader, os.path.dirname(output_path) or '.', workers=1)
+                thumbnail_path, status = fetcher.fetch(
+                    video_info or downloader.local_video_info(args.url), output_path.replace('.mp4', '_thumbnail.jpg')
+                )
+                fetcher.save_index()
+                if status == "downloaded":
+                    print(f"✅ Thumbnail saved: {thumbnail_path}")
+                elif status == "not-modified":
+                    print(f"✅ Thumbnail unchanged: {thumbnail_path}")
         
     except KeyboardInterrupt:
         print("\n⚠️  Download interrupted by user")
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Sora Thumbnail Fetcher - Concurrent, cached thumbnail downloads
+
+Fetches thumbnails from the thumbnail-proxy for whole batches at once,
+streaming each image to disk. Validators (ETag / Last-Modified) are kept in a
+small JSON index next to the images so repeat runs only re-download
+thumbnails that changed. Resized derivatives and a contact sheet can be
+built afterwards in a process pool (requires Pillow).
+
+Date: 2026-10-19
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    from .disk_io import AtomicFileWriter
+    from .hedging import add_hedge_arguments, hedger_from_args, print_report as print_hedge_report
+    from .sora_downloader import SoraVideoDownloader
+except ImportError:
+    from disk_io import AtomicFileWriter
+    from hedging import add_hedge_arguments, hedger_from_args, print_report as print_hedge_report
+    from sora_downloader import SoraVideoDownloader
+
+INDEX_FILENAME = ".thumbnails.json"
+
+
+class ThumbnailFetcher:
+    """
+    Downloads thumbnails for many videos concurrently with conditional requests.
+    """
+
+    def __init__(self, downloader: SoraVideoDownloader = None, output_dir: str = "thumbnails",
+                 workers: int = 16):
+        """
+        Args:
+            downloader: SoraVideoDownloader supplying headers and thumbnail URLs
+            output_dir: Directory for images and the validator index
+            workers: Number of concurrent thumbnail requests
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.downloader = downloader or SoraVideoDownloader()
+        self.output_dir = output_dir
+        self.workers = workers
+
+        if self.downloader.transport == 'http2':
+            # All workers share one multiplexed connection
+            self.session = self.downloader.http2
+        else:
+            self.session = requests.Session()
+            self.session.headers.update(self.downloader.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+
+        self.index_path = os.path.join(output_dir, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with self._lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def fetch(self, video_info, output_path: str = None):
+        """
+        Download one thumbnail unless the server reports it unchanged.
+
+        Args:
+            video_info (dict): Video information with a post_id
+            output_path (str): Optional image path (default: <output_dir>/<post_id>.jpg)
+
+        Returns:
+            tuple: (path, status) where status is "downloaded", "not-modified" or "failed"
+        """
+        import requests
+
+        post_id = video_info.get('post_id')
+        thumbnail_url = self.downloader.get_thumbnail_url(video_info)
+        if not thumbnail_url:
+            return None, "failed"
+
+        output_path = output_path or os.path.join(self.output_dir, f"{post_id}.jpg")
+
+        headers = {'Accept': 'image/*'}
+        with self._lock:
+            cached = self.index.get(post_id)
+        if cached and cached.get('path') == output_path and os.path.exists(output_path):
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        try:
+            with self.downloader._proxy_lease() as lease:
+                kwargs = {'headers': headers, 'stream': True, 'timeout': 30}
+                if self.downloader.transport != 'http2':
+                    kwargs['proxies'] = lease.requests_proxies
+                response = self.downloader.endpoints.request(
+                    thumbnail_url,
+                    lambda u: self.downloader._hedged(lambda: self.session.get(u, **kwargs), 'thumbnail')
+                )
+                # Inside the lease, so a 403/407/429 from raise_for_status is
+                # charged to the proxy instead of counting as a success
+                with response:
+                    if response.status_code == 304:
+                        return output_path, "not-modified"
+                    response.raise_for_status()
+
+                    size = int(response.headers.get('content-length', 0)) or None
+                    with AtomicFileWriter(output_path, size, self.downloader.fsync_policy) as f:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            if chunk:
+                                f.write(chunk)
+
+                    with self._lock:
+                        self.index[post_id] = {
+                            'path': output_path,
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                        }
+            return output_path, "downloaded"
+
+        except requests.RequestException as e:
+            print(f"❌ Thumbnail failed for {post_id}: {e}")
+            return None, "failed"
+
+    def fetch_many(self, video_infos):
+        """
+        Download thumbnails for a batch of videos concurrently.
+
+        Returns:
+            list: (path, status) per video, in input order
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(self.fetch, video_infos))
+        self.save_index()
+        return results
+
+
+def _resize_one(path, sizes, output_dir):
+    """
+    Write one resized copy of an image per size (longest edge, aspect kept).
+    """
+    from PIL import Image
+
+    name, _ = os.path.splitext(os.path.basename(path))
+    outputs = []
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        for size in sizes:
+            out = os.path.join(output_dir, f"{name}_{size}.jpg")
+            resized = img.copy()
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+            resized.save(out, "JPEG", quality=85)
+            outputs.append(out)
+    return outputs
+
+
+def _contact_sheet(paths, output_path, tile, columns):
+    """
+    Tile images into one grid image.
+    """
+    from PIL import Image
+
+    rows = math.ceil(len(paths) / columns)
+    sheet = Image.new("RGB", (columns * tile, rows * tile), "black")
+    for i, path in enumerate(paths):
+        try:
+            with Image.open(path) as img:
+                img = img.convert("RGB")
+                img.thumbnail((tile, tile), Image.Resampling.LANCZOS)
+                x = (i % columns) * tile + (tile - img.width) // 2
+                y = (i // columns) * tile + (tile - img.height) // 2
+                sheet.paste(img, (x, y))
+        except OSError as e:
+            print(f"⚠️ Skipping {path} in contact sheet: {e}")
+    sheet.save(output_path, "JPEG", quality=85)
+    return output_path
+
+
+def make_derivatives(paths, sizes=(320,), output_dir=None, contact_sheet=None,
+                     tile=160, columns=10, processes=None):
+    """
+    Build resized derivatives and an optional contact sheet in a process pool.
+
+    Args:
+        paths: Source image paths
+        sizes: Longest-edge sizes to produce for every image
+        output_dir: Where derivatives go (default: next to each source)
+        contact_sheet: Optional path for a grid of all images
+        tile: Contact sheet cell size in pixels
+        columns: Contact sheet columns
+        processes: Pool size (default: CPU count)
+
+    Returns:
+        list: Paths of every derivative written
+    """
+    import PIL  # noqa: F401 - fail before starting the pool if Pillow is missing
+
+    paths = [p for p in paths if p]
+    written = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(_resize_one, path, sizes, output_dir or os.path.dirname(path) or '.')
+            for path in paths
+        ] if sizes else []
+        sheet = None
+        if contact_sheet and paths:
+            sheet = pool.submit(_contact_sheet, paths, contact_sheet, tile, columns)
+
+        for path, future in zip(paths, futures):
+            try:
+                written.extend(future.result())
+            except Exception as e:
+                print(f"⚠️ Could not resize {path}: {e}")
+        if sheet:
+            written.append(sheet.result())
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Download thumbnails for many Sora videos concurrently',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python thumbnails.py urls.txt
+  python thumbnails.py urls.txt -d thumbs --sizes 160 320 --contact-sheet sheet.jpg
+        """
+    )
+
+    parser.add_argument('urls_file', help='File with one Sora share URL per line')
+    parser.add_argument('-d', '--output-dir', default='thumbnails', help='Output directory')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent requests')
+    parser.add_argument('--sizes', type=int, nargs='*', default=[], help='Resized derivative sizes (needs Pillow)')
+    parser.add_argument('--http2', action='store_true', help='Multiplex requests over HTTP/2 (requires httpx[http2])')
+    parser.add_argument('--contact-sheet', help='Write a contact sheet of all thumbnails (needs Pillow)')
+    add_hedge_arguments(parser)
+
+    args = parser.parse_args()
+
+    with open(args.urls_file, 'r') as f:
+        urls = [line.strip() for line in f if line.strip()]
+
+    downloader = SoraVideoDownloader(transport='http2' if args.http2 else 'http1',
+                                     hedger=hedger_from_args(args))
+    fetcher = ThumbnailFetcher(downloader, args.output_dir, workers=args.workers)
+
+    start = time.time()
+
+    def info(url):
+        try:
+            return downloader.extract_video_info(url)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        video_infos = [i for i in pool.map(info, urls) if i]
+
+    results = fetcher.fetch_many(video_infos)
+    counts = {}
+    for _, status in results:
+        counts[status] = counts.get(status, 0) + 1
+    print(f"🖼️  Thumbnails: {counts} in {time.time() - start:.2f}s")
+    if downloader.hedger:
+        print_hedge_report(downloader.hedger)
+
+    if args.sizes or args.contact_sheet:
+        paths = [path for path, status in results if status != "failed"]
+        try:
+            written = make_derivatives(paths, args.sizes, contact_sheet=args.contact_sheet)
+        except ImportError:
+            print("❌ Derivatives require Pillow: pip install Pillow")
+            sys.exit(1)
+        print(f"✅ Wrote {len(written)} derivative images")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Sora URL Ingestion - Streaming normalization and dedup for large URL lists
+
+Reads share URLs from files, stdin or a followed (tail -f style) file one
+line at a time, canonicalizes them, extracts the `s_<id>` post key and drops
+duplicates. Memory grows only with the number of distinct posts, at 16 bytes
+per slot in a flat open-addressing table.
+
+Date: 2026-10-19
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+import time
+from collections import namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+SORA_HOST = "sora.chatgpt.com"
+
+POST_ID_RE = re.compile(r'(?<![0-9A-Za-z])s_([0-9a-fA-F]{8,64})(?![0-9A-Za-z])')
+
+# Characters that commonly trail a URL pasted from chat, CSV or Markdown
+TRAILING_JUNK = ' \t\r\n,.;:!?)]}>"\'`'
+LEADING_JUNK = ' \t\r\n([{<"\'`'
+
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid',
+                   'ref', 'ref_src', 'si', 'source', 'share', 'from'}
+
+IngestedURL = namedtuple('IngestedURL', ['url', 'post_id'])
+
+
+def extract_post_id(url):
+    """
+    Extract the `s_<hex>` post identifier from a share URL.
+
+    Args:
+        url (str): Sora share URL (raw or canonical)
+
+    Returns:
+        str: Lower-cased post ID such as "s_693b...", or None
+    """
+    if not url:
+        return None
+    match = POST_ID_RE.search(url)
+    return f"s_{match.group(1).lower()}" if match else None
+
+
+def canonicalize_url(raw):
+    """
+    Normalize a share URL so equivalent spellings compare equal.
+
+    Strips surrounding junk, lower-cases scheme and host, drops `www.`,
+    fragments and tracking parameters, and rewrites Sora post URLs to the
+    canonical `https://sora.chatgpt.com/p/s_<id>` form.
+
+    Args:
+        raw (str): One line of input
+
+    Returns:
+        str: Canonical URL, or None if the line is not an http(s) URL
+    """
+    url = raw.strip().lstrip(LEADING_JUNK).rstrip(TRAILING_JUNK)
+    if not url or url.startswith('#'):
+        return None
+    if '://' not in url and url.lower().startswith(('sora.chatgpt.com', 'www.sora.chatgpt.com')):
+        url = 'https://' + url
+
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if parts.scheme.lower() not in ('http', 'https') or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+
+    if host == SORA_HOST:
+        post_id = extract_post_id(parts.path)
+        if post_id:
+            return f"https://{SORA_HOST}/p/{post_id}"
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS
+    ]
+    netloc = host if parts.port is None else f"{host}:{parts.port}"
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https' if parts.scheme.lower() == 'https' else 'http',
+                       netloc, path, urlencode(sorted(query)), ''))
+
+
+class CompactSeenSet:
+    """
+    Set of keys stored as 16-byte digests in one bytearray.
+
+    Post IDs that are 32 hex digits are stored as their raw 16 bytes (no
+    hashing, no false positives); anything else is hashed with BLAKE2b-128.
+    Uses linear probing and doubles at 70% load, so memory stays around
+    16-32 bytes per distinct key instead of ~100 for a set of str.
+    """
+
+    SLOT = 16
+    _EMPTY = bytes(SLOT)
+
+    def __init__(self, capacity=1 << 16):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._table = bytearray(size * self.SLOT)
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return len(self._table)
+
+    def _digest(self, key):
+        if key.startswith('s_') and len(key) == 34:
+            try:
+                digest = bytes.fromhex(key[2:])
+            except ValueError:
+                digest = None
+            if digest and digest != self._EMPTY:
+                return digest
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=self.SLOT).digest()
+
+    def _find(self, table, mask, digest):
+        """Return (slot_index, found)."""
+        # Raw post IDs share timestamp-like prefixes, so mix before probing
+        i = hash(digest) & mask
+        while True:
+            offset = i * self.SLOT
+            slot = table[offset:offset + self.SLOT]
+            if slot == digest:
+                return i, True
+            if slot == self._EMPTY:
+                return i, False
+            i = (i + 1) & mask
+
+    def _grow(self):
+        old = self._table
+        size = (self._mask + 1) * 2
+        table = bytearray(size * self.SLOT)
+        mask = size - 1
+        for offset in range(0, len(old), self.SLOT):
+            digest = bytes(old[offset:offset + self.SLOT])
+            if digest != self._EMPTY:
+                i, _ = self._find(table, mask, digest)
+                table[i * self.SLOT:(i + 1) * self.SLOT] = digest
+        self._table = table
+        self._mask = mask
+
+    def __contains__(self, key):
+        return self._find(self._table, self._mask, self._digest(key))[1]
+
+    def add(self, key):
+        """
+        Add a key.
+
+        Returns:
+            bool: True if the key was new, False if it was already present
+        """
+        digest = self._digest(key)
+        i, found = self._find(self._table, self._mask, digest)
+        if found:
+            return False
+        self._table[i * self.SLOT:(i + 1) * self.SLOT] = digest
+        self._count += 1
+        if self._count * 10 > (self._mask + 1) * 7:
+            self._grow()
+        return True
+
+
+def iter_lines(source, follow=False, poll_interval=1.0):
+    """
+    Yield lines from a path, "-" for stdin, or an open file object.
+
+    With follow=True the file is tailed: at EOF the generator waits for
+    more data instead of stopping (like `tail -f`).
+    """
+    if hasattr(source, 'readline'):
+        f, close = source, False
+    elif source == '-':
+        f, close = sys.stdin, False
+    else:
+        f, close = open(source, 'r', encoding='utf-8', errors='replace'), True
+
+    try:
+        pending = ''
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    if pending:
+                        yield pending
+                    return
+                time.sleep(poll_interval)
+                continue
+            if not line.endswith('\n') and follow:
+                # Partial line from a writer mid-append; wait for the rest
+                pending += line
+                continue
+            yield pending + line
+            pending = ''
+    finally:
+        if close:
+            f.close()
+
+
+def iter_urls(sources, follow=False, dedup=True, seen=None, stats=None):
+    """
+    Stream canonical, de-duplicated share URLs from one or more sources.
+
+    Args:
+        sources: Iterable of paths / "-" / file objects (a single str is accepted)
+        follow: Tail the last source instead of stopping at EOF
+        dedup: Drop URLs whose post (or canonical URL) was already seen
+        seen: Optional CompactSeenSet shared across calls
+        stats: Optional dict updated with lines/invalid/duplicates/yielded counts
+
+    Yields:
+        IngestedURL(url, post_id) - post_id is None for non-post URLs
+    """
+    if isinstance(sources, str) or hasattr(sources, 'readline'):
+        sources = [sources]
+    sources = list(sources)
+    seen = seen if seen is not None else CompactSeenSet()
+    stats = stats if stats is not None else {}
+    for key in ('lines', 'invalid', 'duplicates', 'yielded'):
+        stats.setdefault(key, 0)
+
+    for n, source in enumerate(sources):
+        tail = follow and n == len(sources) - 1
+        for line in iter_lines(source, follow=tail):
+            stats['lines'] += 1
+            url = canonicalize_url(line)
+            if not url:
+                if line.strip() and not line.lstrip().startswith('#'):
+                    stats['invalid'] += 1
+                continue
+
+            post_id = extract_post_id(url)
+            if dedup and not seen.add(post_id or url):
+                stats['duplicates'] += 1
+                continue
+
+            stats['yielded'] += 1
+            yield IngestedURL(url, post_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Normalize and de-duplicate Sora share URLs from files or stdin',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python url_ingest.py urls.txt > clean_urls.txt
+  cat *.txt | python url_ingest.py - --with-ids
+  python url_ingest.py --follow incoming.txt
+        """
+    )
+
+    parser.add_argument('sources', nargs='*', default=['-'], help='URL files ("-" for stdin)')
+    parser.add_argument('--follow', action='store_true', help='Keep reading the last file as it grows')
+    parser.add_argument('--with-ids', action='store_true', help='Print "post_id<TAB>url"')
+    parser.add_argument('--keep-duplicates', action='store_true', help='Do not drop repeated posts')
+
+    args = parser.parse_args()
+
+    stats = {}
+    try:
+        for item in iter_urls(args.sources, follow=args.follow,
+                              dedup=not args.keep_duplicates, stats=stats):
+            if args.with_ids:
+                print(f"{item.post_id or '-'}\t{item.url}")
+            else:
+                print(item.url)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        sys.stderr.close()
+        return
+
+    print(f"📊 {stats['lines']} lines, {stats['yielded']} unique, "
+          f"{stats['duplicates']} duplicates, {stats['invalid']} invalid", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
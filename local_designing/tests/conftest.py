@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Shared local servers for the tests.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pytest
+
+
+class FakeSoraApi:
+    """
+    The worker's api-proxy and download-proxy for a fixed set of posts.
+
+    `posts` maps the post ID in a share URL to {'post_id', 'title', 'video'};
+    the API may answer with a different post_id than the URL carries. The
+    download proxy answers unknown IDs (and posts whose video is None) with a
+    JSON error document, like the real one. The API answers share URLs in
+    `throttled` with a 429.
+    """
+
+    def __init__(self):
+        self.posts = {}
+        self.api_delay = 0.0
+        self.download_delay = 0.0
+        self.throttled = set()
+        self.requests = []
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def add(self, url_id, title, video, post_id=None):
+        self.posts[url_id] = {'post_id': post_id or url_id, 'title': title, 'video': video}
+        return f"https://sora.chatgpt.com/p/{url_id}"
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def log(self, kind, post_id):
+        with self._lock:
+            self.requests.append((kind, post_id))
+
+    def start(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path.startswith('/api-proxy/'):
+                    match = re.search(r's_[0-9a-f]+', unquote(parsed.path))
+                    url_id = match.group(0) if match else None
+                    api.log('api', url_id)
+                    time.sleep(api.api_delay)
+                    if url_id in api.throttled:
+                        return self._send(429, b'', 'text/plain')
+                    post = api.posts.get(url_id)
+                    if post is None:
+                        return self._send(404, b'{"error": "not found"}', 'application/json')
+                    body = json.dumps({'post_id': post['post_id'], 'title': post['title']}).encode()
+                    return self._send(200, body, 'application/json')
+                if parsed.path == '/download-proxy':
+                    post_id = parse_qs(parsed.query)['id'][0]
+                    api.log('download', post_id)
+                    time.sleep(api.download_delay)
+                    for post in api.posts.values():
+                        if post['post_id'] == post_id and post['video'] is not None:
+                            return self._send(200, post['video'], 'video/mp4')
+                    return self._send(200, b'{"error": "Post not found"}', 'application/json')
+                self._send(404, b'', 'text/plain')
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class RangeServer:
+    """
+    Serves `data` at /video.mp4, honouring single Range requests unless
+    `honour_range` is off; `served` counts the body bytes sent.
+    """
+
+    def __init__(self):
+        self.data = b''
+        self.honour_range = True
+        self.served = 0
+        self._httpd = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}/video.mp4"
+
+    @staticmethod
+    def get(url, headers):
+        """The `get(url, headers)` callable the MP4 helpers take."""
+        import requests
+        return requests.get(url, headers=headers, stream=True, timeout=10)
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                data = server.data
+                byte_range = self.headers.get('Range')
+                if byte_range and server.honour_range:
+                    start, _, end = byte_range[len('bytes='):].partition('-')
+                    start, end = int(start), min(int(end or len(data) - 1), len(data) - 1)
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+                    data = data[start:end + 1]
+                else:
+                    self.send_response(200)
+                server.served += len(data)
+                self.send_header('Content-Type', 'video/mp4')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def range_server():
+    server = RangeServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def sora_api():
+    pytest.importorskip('requests')
+    api = FakeSoraApi().start()
+    yield api
+    api.stop()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+A local imitation of a Sora share page for exercising the browser path.
+
+The share page is an SPA shell: its markup carries no video URL, so the
+browserless resolver gives up and a browser is needed. After a delay the app
+fetches the post JSON and only then starts the `/MP4/` video, while decoys
+(stylesheet, font, images, a promo loop video) and a tracker that keeps
+beaconing compete for the network like on the real site.
+
+Every response is logged with the time its first byte was sent and the
+bytes sent, split by client: "transfer" for requests carrying BENCH_HEADER
+(the downloader's own requests), "browser" for everything else.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+try:
+    from .mp4_fixtures import make_mp4
+except ImportError:
+    from mp4_fixtures import make_mp4
+
+BENCH_HEADER = 'X-Sora-Bench'
+
+SHELL_HTML = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>Sora</title>
+  <link rel="stylesheet" href="/static/app.css">
+  <link rel="preload" href="/static/font.woff2" as="font" crossorigin>
+  <script src="/trackers/analytics.js" async></script>
+  <script src="/static/app.js" defer></script>
+</head>
+<body>
+  <div id="root"><img src="/static/hero-1.jpg"><img src="/static/hero-2.jpg"></div>
+  <video src="/static/promo-loop.mp4" autoplay muted loop></video>
+</body>
+</html>
+"""
+
+APP_JS = """
+(() => {
+  const postId = location.pathname.split('/').pop();
+  setTimeout(async () => {
+    const post = await (await fetch(`/backend/project_y/post/${postId}`)).json();
+    document.title = `${post.title} | Sora`;
+    const h1 = document.createElement('h1');
+    h1.textContent = post.title;
+    const video = document.createElement('video');
+    video.src = post.video_url;
+    video.autoplay = true;
+    video.muted = true;
+    document.getElementById('root').append(h1, video);
+  }, %(media_delay_ms)d);
+})();
+"""
+
+ANALYTICS_JS = """
+(() => {
+  let sent = 0;
+  const beacon = () => {
+    fetch(`/trackers/collect?n=${sent}`, {method: 'POST', body: 'event'}).catch(() => {});
+    new Image().src = `/trackers/pixel.gif?n=${sent}`;
+    if (++sent < %(tracker_beacons)d) setTimeout(beacon, %(tracker_interval_ms)d);
+  };
+  beacon();
+})();
+"""
+
+PIXEL_GIF = b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    site = None
+
+    def _route(self, path):
+        site = self.site
+        if path.startswith('/sora/p/'):
+            return 'page', 'text/html', SHELL_HTML.encode(), 0
+        if path == '/static/app.js':
+            return 'asset', 'application/javascript', site.app_js, 0
+        if path == '/trackers/analytics.js':
+            return 'tracker', 'application/javascript', site.analytics_js, 0
+        if path.startswith('/trackers/'):
+            return 'tracker', 'image/gif', PIXEL_GIF, 0
+        if path == '/static/promo-loop.mp4':
+            return 'decoy', 'video/mp4', site.decoy, 0
+        if path.startswith('/static/'):
+            content_type = {'.css': 'text/css', '.woff2': 'font/woff2'}.get(path[path.rfind('.'):], 'image/jpeg')
+            return 'asset', content_type, site.asset, 0
+        if path.startswith('/backend/project_y/post/'):
+            post_id = path.rsplit('/', 1)[1]
+            body = json.dumps({
+                'post_id': post_id,
+                'title': f"Fixture clip {post_id}",
+                'video_url': site.media_url(post_id),
+            }).encode()
+            return 'api', 'application/json', body, site.api_delay
+        if '/cdn.openai.com/MP4/' in path:
+            return 'media', 'video/mp4', site.video, 0
+        return None
+
+    def _serve(self, send_body):
+        path = urlsplit(self.path).path
+        route = self._route(path)
+        if route is None:
+            self.send_error(404)
+            return
+        kind, content_type, body, delay = route
+        if delay:
+            time.sleep(delay)
+
+        status, start, end = 200, 0, len(body) - 1
+        range_header = self.headers.get('Range', '')
+        if kind in ('media', 'decoy') and range_header.startswith('bytes='):
+            first, _, last = range_header[6:].partition('-')
+            start = int(first or 0)
+            end = min(int(last), end) if last else end
+            status = 206
+        chunk = body[start:end + 1] if send_body else b''
+
+        first_byte = time.perf_counter()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(body)}")
+        self.end_headers()
+        sent = 0
+        try:
+            for offset in range(0, len(chunk), 65536):
+                self.wfile.write(chunk[offset:offset + 65536])
+                sent += len(chunk[offset:offset + 65536])
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the browser cancels media requests it no longer needs
+        finally:
+            client = 'transfer' if self.headers.get(BENCH_HEADER) else 'browser'
+            self.site.log(kind, client, first_byte, sent, range_header)
+
+    def do_GET(self):
+        self._serve(True)
+
+    def do_HEAD(self):
+        self._serve(False)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self.site.log('tracker', 'browser', time.perf_counter(), 0, '')
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureSite:
+    """
+    Serve the fixture share page, its assets and its video on 127.0.0.1.
+
+    Example:
+        with FixtureSite(media_delay=0.5) as site:
+            downloader.download(site.share_url('s_0123abcd'), 'out.mp4')
+            print(site.summary())
+    """
+
+    def __init__(self, media_delay: float = 0.5, api_delay: float = 0.05, video_bytes: int = 2_000_000,
+                 tracker_beacons: int = 8, tracker_interval: float = 0.25):
+        """
+        Args:
+            media_delay: Seconds after the app script runs before it loads the video
+            api_delay: Seconds the post JSON takes to answer
+            video_bytes: Approximate size of the served MP4
+            tracker_beacons: Beacons the tracker sends per page view
+            tracker_interval: Seconds between beacons (keeps the network busy)
+        """
+        self.api_delay = api_delay
+        self.video, _ = make_mp4(chunks=[bytes(video_bytes // 4)] * 4)
+        self.decoy, _ = make_mp4(chunks=[bytes(50_000)] * 2, width=640, height=360)
+        self.asset = bytes(20_000)
+        self.app_js = (APP_JS % {'media_delay_ms': media_delay * 1000}).encode()
+        self.analytics_js = (ANALYTICS_JS % {'tracker_beacons': tracker_beacons,
+                                             'tracker_interval_ms': tracker_interval * 1000}).encode()
+        self._lock = threading.Lock()
+        self.events = []
+        self._httpd = None
+
+    def start(self):
+        handler = type('FixtureHandler', (_Handler,), {'site': self})
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def share_url(self, post_id: str):
+        return f"{self.base_url}/sora/p/{post_id}"
+
+    def media_url(self, post_id: str):
+        # Classified as a raw CDN video by the same rules as the real CDN
+        return f"{self.base_url}/cdn.openai.com/MP4/{post_id}.mp4?se=2099-01-01&sig=fixture"
+
+    def log(self, kind, client, first_byte, nbytes, range_header):
+        with self._lock:
+            self.events.append({'kind': kind, 'client': client, 'first_byte': first_byte,
+                                'bytes': nbytes, 'range': range_header})
+
+    def reset(self):
+        with self._lock:
+            self.events = []
+
+    def summary(self, since: float = None):
+        """
+        Traffic since `since` (a time.perf_counter() value; default: since reset).
+
+        Returns:
+            dict: browser_bytes, transfer_bytes, requests, tracker_requests,
+                media_first_byte (first video byte the browser got) and
+                transfer_first_byte (first byte of the download itself)
+        """
+        with self._lock:
+            events = [e for e in self.events if since is None or e['first_byte'] >= since]
+
+        def first(client, kind):
+            times = [e['first_byte'] for e in events if e['client'] == client and e['kind'] == kind
+                     and e['range'] != 'bytes=0-0']
+            return min(times) if times else None
+
+        return {
+            'browser_bytes': sum(e['bytes'] for e in events if e['client'] == 'browser'),
+            'transfer_bytes': sum(e['bytes'] for e in events if e['client'] == 'transfer'),
+            'requests': len(events),
+            'tracker_requests': sum(1 for e in events if e['kind'] == 'tracker'),
+            'media_first_byte': first('browser', 'media'),
+            'transfer_first_byte': first('transfer', 'media'),
+        }
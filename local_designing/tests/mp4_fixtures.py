@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Generate small but structurally valid MP4 files for tests.
+
+Boxes carry real mvhd/tkhd/mdhd/hdlr/stsd/stco fields so both the
+faststart rewriter and the probe can be exercised without media files.
+"""
+
+import struct
+
+
+def box(btype, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), btype) + payload
+
+
+def full_box(btype, payload, version=0, flags=0):
+    return box(btype, struct.pack('>I', (version << 24) | flags) + payload)
+
+
+def mvhd(timescale, duration):
+    return full_box(b'mvhd', struct.pack('>IIII', 0, 0, timescale, duration)
+                    + struct.pack('>IH10x', 0x00010000, 0x0100) + bytes(36) + bytes(24)
+                    + struct.pack('>I', 3))
+
+
+def tkhd(track_id, duration, width, height):
+    return full_box(b'tkhd', struct.pack('>IIIII', 0, 0, track_id, 0, duration) + bytes(8)
+                    + struct.pack('>hhhH', 0, 0, 0, 0) + bytes(36)
+                    + struct.pack('>II', width << 16, height << 16), flags=3)
+
+
+def mdhd(timescale, duration):
+    return full_box(b'mdhd', struct.pack('>IIIIHH', 0, 0, timescale, duration, 0x55c4, 0))
+
+
+def hdlr(handler):
+    return full_box(b'hdlr', struct.pack('>I4s12x', 0, handler) + b'fixture\x00')
+
+
+def stsd(codec, width=0, height=0):
+    if codec in (b'avc1', b'hvc1', b'hev1', b'av01'):
+        entry = bytes(6) + struct.pack('>H', 1) + bytes(16) + struct.pack('>HH', width, height) + bytes(50)
+    else:
+        entry = bytes(6) + struct.pack('>H', 1) + bytes(20)
+    return full_box(b'stsd', struct.pack('>I', 1) + box(codec, entry))
+
+
+def stco(offsets, large=False):
+    fmt = '>%dQ' if large else '>%dI'
+    return full_box(b'co64' if large else b'stco', struct.pack('>I', len(offsets)) + struct.pack(fmt % len(offsets), *offsets))
+
+
+def trak(track_id, handler, codec, offsets, timescale, duration, width=0, height=0):
+    stbl = box(b'stbl', stsd(codec, width, height) + stco(offsets))
+    minf = box(b'minf', stbl)
+    mdia = box(b'mdia', mdhd(timescale, duration) + hdlr(handler) + minf)
+    return box(b'trak', tkhd(track_id, duration, width, height) + mdia)
+
+
+def make_mp4(chunks=None, moov_first=False, width=1280, height=720, timescale=1000,
+             duration=5000, codec=b'avc1', audio=True, trailing=b''):
+    """
+    Build an MP4 and return (data, chunks).
+
+    Each chunk is referenced by one stco entry; video and audio tracks
+    alternate chunks so both tables need patching.
+    """
+    chunks = chunks or [bytes([i]) * (100 + i) for i in range(1, 9)]
+    ftyp = box(b'ftyp', b'isom' + struct.pack('>I', 512) + b'isomiso2avc1mp41')
+
+    def build(mdat_start):
+        offsets, pos = [], mdat_start + 8
+        for chunk in chunks:
+            offsets.append(pos)
+            pos += len(chunk)
+        traks = trak(1, b'vide', codec, offsets[0::2], timescale, duration, width, height)
+        if audio:
+            traks += trak(2, b'soun', b'mp4a', offsets[1::2], 44100, duration * 44)
+        return box(b'moov', mvhd(timescale, duration) + traks)
+
+    mdat = box(b'mdat', b''.join(chunks))
+    if moov_first:
+        moov = build(0)
+        moov = build(len(ftyp) + len(moov))
+        return ftyp + moov + mdat + trailing, chunks
+    moov = build(len(ftyp))
+    return ftyp + mdat + moov + trailing, chunks
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the async downloader's page limit and browserless fallback, with a
+stub resolver and a stub browser in place of Playwright.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.async_playwright_downloader import AsyncSoraPlaywrightDownloader
+from src.page_resolver import ResolveError
+
+
+class StubResolver:
+    """Resolves post IDs ending in an even digit; the rest need the browser."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def load_cookies(self):
+        pass
+
+    def resolve(self, sora_url, proxies=None):
+        with self._lock:
+            self.calls.append(sora_url)
+        if int(sora_url[-1]) % 2:
+            raise ResolveError("Cloudflare challenge (HTTP 403)")
+        return f"https://cdn.openai.com/MP4/{sora_url[-10:]}.mp4", "from html"
+
+
+class StubHandle:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    async def json_value(self):
+        return self.snapshot
+
+
+class StubPage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.url = None
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def goto(self, url, wait_until=None):
+        self.url = url
+        self.browser.open += 1
+        self.browser.peak = max(self.browser.peak, self.browser.open)
+        await asyncio.sleep(0.05)
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+    async def wait_for_function(self, script, arg=None, timeout=None):
+        post_id = self.url.rsplit('/', 1)[1]
+        return StubHandle({'videos': [f"https://cdn.openai.com/MP4/{post_id}.mp4"], 'og_title': 'from page'})
+
+
+class StubContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def new_page(self):
+        return StubPage(self.browser)
+
+    async def close(self):
+        self.browser.open -= 1
+
+
+class StubBrowser:
+    def __init__(self):
+        self.open = 0
+        self.peak = 0
+        self.navigations = 0
+
+    async def new_context(self, **options):
+        self.navigations += 1
+        return StubContext(self)
+
+
+def _downloader(tmp_path, max_pages, cookies=True):
+    downloader = AsyncSoraPlaywrightDownloader(max_pages=max_pages, session_dir=str(tmp_path))
+    if cookies:
+        downloader.session.save_state({'cookies': [
+            {'name': 'cf_clearance', 'value': 'ok', 'domain': '.chatgpt.com', 'path': '/', 'expires': -1},
+        ], 'origins': []}, user_agent='TestAgent/1.0')
+    downloader._page_resolver = StubResolver()
+    downloader._browser = StubBrowser()
+    downloader._uses_camoufox = True
+    return downloader
+
+
+def test_browserless_first_then_bounded_pages(tmp_path):
+    downloader = _downloader(tmp_path, max_pages=3)
+    urls = [f"https://sora.chatgpt.com/p/s_{i:08d}" for i in range(20)]
+
+    async def run():
+        return await asyncio.gather(*(downloader.resolve(url) for url in urls))
+
+    results = asyncio.run(run())
+
+    assert len(downloader._page_resolver.calls) == 20
+    for url, (video_url, title) in zip(urls, results):
+        assert video_url.endswith(f"{url[-10:]}.mp4")
+        assert title == ('from page' if int(url[-1]) % 2 else 'from html')
+    # Only the challenged half went to the browser, never more than 3 pages at once
+    assert downloader._browser.navigations == 10
+    assert downloader._browser.peak == 3
+    assert downloader._browser.open == 0
+
+
+def test_no_plain_http_attempt_without_session_cookies(tmp_path):
+    downloader = _downloader(tmp_path, max_pages=3, cookies=False)
+    urls = [f"https://sora.chatgpt.com/p/s_{i:08d}" for i in range(4)]
+
+    async def run():
+        return await asyncio.gather(*(downloader.resolve(url) for url in urls))
+
+    results = asyncio.run(run())
+
+    assert downloader._page_resolver.calls == []
+    assert [title for _, title in results] == ['from page'] * 4
+    assert downloader._browser.navigations == 4
+
+
+def test_download_many_claims_distinct_paths(tmp_path):
+    downloader = _downloader(tmp_path / 'session', max_pages=4)
+    # Loop-bound primitives wait for the loop asyncio.run() starts
+    assert downloader._pages is None and downloader._start_lock is None
+
+    def fake_download(video_url, output_path):
+        time.sleep(0.05)  # transfers overlap
+        with open(output_path, 'w') as f:
+            f.write(video_url)
+        return output_path
+
+    downloader._download_video = fake_download
+    urls = [f"https://sora.chatgpt.com/p/s_{i:08d}" for i in range(6)]
+    out = tmp_path / 'out'
+    results = asyncio.run(downloader.download_many(urls, str(out)))
+
+    # Three posts per title ("from html"/"from page"), one file each
+    assert len(set(results)) == 6 and len(os.listdir(out)) == 6
+    for url, path in zip(urls, results):
+        assert open(path).read().endswith(f"{url[-10:]}.mp4")
+    # The first to claim a title keeps it; the others carry their post ID
+    names = [os.path.basename(path) for path in results]
+    assert sorted(name for name in names if 'nowatermark.mp4' in name) == \
+        ['from_html_nowatermark.mp4', 'from_page_nowatermark.mp4']
+    for url, name in zip(urls, names):
+        assert name.endswith('nowatermark.mp4') or name.endswith(f"_{url[-10:]}.mp4")
+
+
+def test_concurrent_resolves_share_one_resolver_session():
+    pytest.importorskip('requests')
+    downloader = AsyncSoraPlaywrightDownloader()
+    resolver = downloader._page_resolver
+    assert resolver is not None
+
+    sessions = []
+    barrier = threading.Barrier(8)
+
+    def grab():
+        barrier.wait()
+        sessions.append(resolver.http)
+
+    threads = [threading.Thread(target=grab) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(session) for session in sessions}) == 1
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Tests for AIMD concurrency control against a server with capacity limits.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.aimd import AimdController, is_congestion
+
+API_CAPACITY = 4        # concurrent api-proxy calls before 429s
+TRANSFER_CAPACITY = 3   # concurrent downloads the "link" carries at full speed
+VIDEO = b'\x00' * 50_000
+
+
+class CapacityHandler(BaseHTTPRequestHandler):
+    """Worker with a hard API concurrency cap and a shared, throttled link."""
+    lock = threading.Lock()
+    active = {'api': 0, 'download': 0}
+    peak = {'api': 0, 'download': 0}
+    throttled = {'api': 0, 'download': 0}
+
+    def _enter(self, kind, cap):
+        with self.lock:
+            self.active[kind] += 1
+            self.peak[kind] = max(self.peak[kind], self.active[kind])
+            return self.active[kind] <= cap
+
+    def _leave(self, kind):
+        with self.lock:
+            self.active[kind] -= 1
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        kind = 'api' if self.path.startswith('/api-proxy/') else 'download'
+        try:
+            if kind == 'api':
+                if not self._enter(kind, API_CAPACITY):
+                    self.throttled[kind] += 1
+                    return self._send(429, b'{"error": "slow down"}', 'application/json')
+                time.sleep(0.02)
+                post_id = self.path.rsplit('s_', 1)[1][:8]
+                body = json.dumps({'post_id': f"s_{post_id}", 'title': f"clip {post_id}"}).encode()
+                return self._send(200, body, 'application/json')
+
+            within = self._enter(kind, TRANSFER_CAPACITY * 2)
+            if not within:
+                self.throttled[kind] += 1
+                return self._send(429, b'throttled', 'text/plain')
+            # Bandwidth is shared: each extra transfer over capacity slows all of them
+            with self.lock:
+                share = max(1.0, self.active[kind] / TRANSFER_CAPACITY)
+            time.sleep(0.03 * share)
+            assert parse_qs(urlparse(self.path).query)['id']
+            return self._send(200, VIDEO, 'video/mp4')
+        finally:
+            self._leave(kind)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    for counters in (CapacityHandler.active, CapacityHandler.peak, CapacityHandler.throttled):
+        counters.update(api=0, download=0)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), CapacityHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_congestion_classification():
+    class Response:
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    class HTTPError(OSError):
+        def __init__(self, status):
+            self.response = Response(status)
+
+    assert is_congestion(HTTPError(429)) and is_congestion(HTTPError(503))
+    assert not is_congestion(HTTPError(404))
+    assert is_congestion(TimeoutError())
+    assert not is_congestion(ValueError("bad json"))
+
+
+def test_grows_when_saturated_and_halves_on_congestion():
+    controller = AimdController('test', initial=2, maximum=8, min_window=2)
+    slots = [controller.acquire() for _ in range(2)]
+    for slot in slots:
+        controller.release(slot)
+    assert controller.limit == 3
+
+    slot = controller.acquire()
+    controller.release(slot, error=ConnectionResetError())
+    assert controller.limit == 1.5
+
+    # A straggler started before the cut does not cut again
+    late = controller.acquire()
+    late.started = 0
+    controller.release(late, error=ConnectionResetError())
+    assert controller.limit == 1.5
+
+
+def test_latency_inflation_without_gain_backs_off():
+    controller = AimdController('test', initial=2, maximum=8, min_window=2)
+    slots = [controller.acquire() for _ in range(2)]
+    time.sleep(0.02)
+    for slot in slots:
+        controller.release(slot)
+    assert controller.limit == 3
+
+    # Ten times slower, lower throughput: the extra slot only queued work
+    slots = [controller.acquire() for _ in range(3)]
+    time.sleep(0.2)
+    for slot in slots:
+        controller.release(slot)
+    assert controller.limit == 1.5
+    assert controller.report()['decreases'] == 1
+
+
+def test_batch_settles_under_capacity(server, tmp_path):
+    pytest.importorskip('requests')
+    from src.batch_download import BatchDownloader
+    from src.sora_downloader import SoraVideoDownloader
+
+    downloader = SoraVideoDownloader(endpoints=[server])
+    batch = BatchDownloader(
+        downloader, str(tmp_path),
+        metadata=AimdController('metadata', initial=1, maximum=16),
+        transfer=AimdController('transfer', initial=1, maximum=16),
+        max_attempts=6, retry_delay=0.01,
+    )
+    urls = [f"https://sora.chatgpt.com/p/s_{i:08x}" for i in range(60)]
+    results = list(batch.run(urls))
+
+    assert [error for _, _, error in results if error] == []
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.mp4')]) == 60
+
+    metadata, transfer = batch.report()
+    # Both stages probed beyond their starting point...
+    assert metadata['peak_limit'] > 1 and transfer['peak_limit'] > 1
+    # ...and settled near the server's limits instead of the 16 ceiling
+    assert metadata['limit'] <= API_CAPACITY * 2
+    assert transfer['limit'] <= TRANSFER_CAPACITY * 2 + 2
+    assert CapacityHandler.peak['api'] <= API_CAPACITY * 2
+    if CapacityHandler.throttled['api']:
+        assert metadata['decreases'] >= 1
+
+
+def test_waiting_items_are_admitted_by_priority():
+    controller = AimdController('test', initial=1, maximum=1)
+    held = controller.acquire()
+    admitted = []
+
+    def wait_for_slot(priority):
+        with controller.slot(priority):
+            admitted.append(priority)
+
+    threads = []
+    for priority in (3, 1, 2):
+        thread = threading.Thread(target=wait_for_slot, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    controller.release(held)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert admitted == [1, 2, 3]
+
+
+def test_finished_downloads_feed_the_hooks(server, tmp_path):
+    pytest.importorskip('requests')
+    from src.batch_download import BatchDownloader
+    from src.post_process import PostProcessor
+    from src.sora_downloader import SoraVideoDownloader
+
+    urls = [f"https://sora.chatgpt.com/p/s_{i:08x}" for i in range(6)]
+    with PostProcessor(['sha256'], processes=2, max_pending=2) as post:
+        batch = BatchDownloader(SoraVideoDownloader(endpoints=[server]), str(tmp_path),
+                                max_attempts=6, retry_delay=0.01, post_processor=post)
+        assert [error for _, _, error in batch.run(urls) if error] == []
+    assert post.report()[0]['runs'] == 6
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.sha256')]) == 6
+
+    # Files kept from an earlier run are not processed again
+    with PostProcessor(['sha256'], processes=1) as post:
+        batch = BatchDownloader(SoraVideoDownloader(endpoints=[server]), str(tmp_path),
+                                skip_existing=True, post_processor=post)
+        list(batch.run(urls))
+    assert post.files == 0
+
+
+def test_same_title_posts_get_distinct_files(sora_api, tmp_path):
+    from src.batch_download import BatchDownloader
+    from src.sora_downloader import SoraVideoDownloader
+
+    urls = [sora_api.add('s_aaaaaaaa', 'A cat', b'first cat'),
+            sora_api.add('s_bbbbbbbb', 'A cat', b'second cat')]
+    batch = BatchDownloader(SoraVideoDownloader(endpoints=[sora_api.base]), str(tmp_path))
+    results = list(batch.run(urls))
+
+    assert [error for _, _, error in results if error] == []
+    paths = {url: path for url, path, _ in results}
+    assert len(set(paths.values())) == 2
+    # Whichever post claims the title first keeps the plain name
+    assert {os.path.basename(path) for path in paths.values()} in (
+        {'A_cat.mp4', 'A_cat_s_aaaaaaaa.mp4'}, {'A_cat.mp4', 'A_cat_s_bbbbbbbb.mp4'})
+    assert open(paths[urls[0]], 'rb').read() == b'first cat'
+    assert open(paths[urls[1]], 'rb').read() == b'second cat'
+
+
+def test_resume_matches_files_by_post_id(sora_api, tmp_path):
+    from src.batch_download import BatchDownloader
+    from src.sora_downloader import SoraVideoDownloader
+
+    def run(urls):
+        batch = BatchDownloader(SoraVideoDownloader(endpoints=[sora_api.base]), str(tmp_path),
+                                skip_existing=True)
+        results = list(batch.run(urls))
+        assert [error for _, _, error in results if error] == []
+        return {url: path for url, path, _ in results}
+
+    # A same-title file from before the index, of some other post
+    (tmp_path / 'A_cat.mp4').write_bytes(b'unknown cat')
+    first = sora_api.add('s_aaaaaaaa', 'A cat', b'first cat')
+    paths = run([first])
+    assert open(paths[first], 'rb').read() == b'first cat'
+
+    # The second post has the same title: it is not "done" through the first's file
+    second = sora_api.add('s_bbbbbbbb', 'A cat', b'second cat')
+    sora_api.requests.clear()
+    paths = run([first, second])
+    assert ('download', 's_aaaaaaaa') not in sora_api.requests
+    assert ('download', 's_bbbbbbbb') in sora_api.requests
+    assert open(paths[first], 'rb').read() == b'first cat'
+    assert open(paths[second], 'rb').read() == b'second cat'
+    assert (tmp_path / 'A_cat.mp4').read_bytes() == b'unknown cat'
+
+    # Both are found on the next run
+    sora_api.requests.clear()
+    assert run([first, second]) == paths
+    assert [kind for kind, _ in sora_api.requests] == ['api', 'api']
+
+
+def test_index_never_maps_two_posts_to_one_file(tmp_path):
+    from src.batch_download import DownloadIndex
+
+    index = DownloadIndex(str(tmp_path))
+    (tmp_path / 'A_cat.mp4').write_bytes(b'cat')
+    index.set('s_aaaaaaaa', str(tmp_path / 'A_cat.mp4'))
+    index.save()
+    # The file was later written for another post
+    index.set('s_bbbbbbbb', str(tmp_path / 'A_cat.mp4'))
+    index.save()
+
+    reloaded = DownloadIndex(str(tmp_path))
+    assert reloaded.get('s_aaaaaaaa') is None
+    assert reloaded.get('s_bbbbbbbb') == str(tmp_path / 'A_cat.mp4')
+    # Claims by one batch are seen by another sharing the index
+    assert reloaded.claim(str(tmp_path / 'A_dog.mp4'), 's_cccccccc') == str(tmp_path / 'A_dog.mp4')
+    assert reloaded.claim(str(tmp_path / 'A_dog.mp4'), 's_dddddddd') == str(tmp_path / 'A_dog_s_dddddddd.mp4')
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm browser daemon's lifecycle and client-side discovery.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import browser_daemon
+from src.browser_daemon import STATE_FILENAME, running_daemon, serve, touch
+from src.sora_playwright_downloader import SoraPlaywrightDownloader
+
+
+def write_state(directory, **state):
+    with open(os.path.join(directory, STATE_FILENAME), 'w') as f:
+        json.dump(state, f)
+
+
+def test_stale_state_is_removed(tmp_path):
+    assert running_daemon(str(tmp_path)) is None
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    write_state(str(tmp_path), pid=dead.pid, port=1)
+    assert running_daemon(str(tmp_path)) is None
+    assert not os.path.exists(tmp_path / STATE_FILENAME)
+
+
+def test_live_daemon_is_found_and_used_only_when_compatible(tmp_path):
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        port = listener.getsockname()[1]
+        write_state(str(tmp_path), pid=os.getpid(), port=port, engine='playwright',
+                    ws_endpoint=f"ws://127.0.0.1:{port}/x")
+        assert running_daemon(str(tmp_path))['port'] == port
+
+        assert SoraPlaywrightDownloader(daemon_dir=str(tmp_path)).warm_daemon()['engine'] == 'playwright'
+        assert SoraPlaywrightDownloader(daemon_dir=None).warm_daemon() is None
+        assert SoraPlaywrightDownloader(daemon_dir=str(tmp_path), headless=False).warm_daemon() is None
+        assert SoraPlaywrightDownloader(daemon_dir=str(tmp_path),
+                                        proxy="http://10.0.0.1:3128").warm_daemon() is None
+
+
+def test_serve_publishes_state_and_stops_when_idle(tmp_path, monkeypatch):
+    # Any loopback server stands in for the browser's websocket server
+    def fake_server(engine, port, ws_path, headless, proxy):
+        return [sys.executable, '-m', 'http.server', str(port), '--bind', '127.0.0.1'], dict(os.environ)
+
+    monkeypatch.setattr(browser_daemon, '_server_command', fake_server)
+    seen = []
+
+    def watch():
+        deadline = time.time() + 10
+        while time.time() < deadline and not seen:
+            state = running_daemon(str(tmp_path))
+            if state:
+                seen.append(state)
+            time.sleep(0.1)
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    started = time.time()
+    serve(str(tmp_path), engine='playwright', idle_timeout=1.5)
+    watcher.join()
+
+    assert seen and seen[0]['ws_endpoint'].startswith(f"ws://127.0.0.1:{seen[0]['port']}/")
+    assert 1.5 <= time.time() - started < 10
+    # Shut down: state removed, server gone
+    assert running_daemon(str(tmp_path)) is None
+    assert not browser_daemon._port_open(seen[0]['port'])
+
+
+def test_touch_resets_idle_timer(tmp_path):
+    touch(str(tmp_path))
+    assert browser_daemon._idle_seconds(str(tmp_path)) < 1
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the browser worker pool's supervisor, with stand-in workers that
+resolve, crash or hang instead of driving a browser.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import browser_pool
+from src.browser_pool import BrowserWorkerPool, available_memory, default_worker_count
+
+
+def fake_worker(worker_id, jobs, results, options):
+    """
+    Behaves like _worker_main; options['mode'] picks the failure:
+      crash-once  exit on the first job handed to any worker (marker file)
+      crash       exit on every job
+      hang        never answer
+      no-start    exit before reporting ready
+      untitled    resolve without a title
+    """
+    mode = options.get('mode')
+    if mode == 'no-start':
+        os._exit(3)
+    results.send(('ready', worker_id, None))
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, sora_url = job
+        if mode == 'crash' or (mode == 'crash-once' and not os.path.exists(options['marker'])):
+            open(options['marker'], 'w').close()
+            os._exit(1)
+        if mode == 'hang':
+            time.sleep(3600)
+        title = None if mode == 'untitled' else f"title {job_id}"
+        results.send(('done', worker_id, (job_id, f"{sora_url}.mp4", title, None)))
+
+
+class FakePool(BrowserWorkerPool):
+    worker_target = staticmethod(fake_worker)
+
+
+def _pool(tmp_path, mode, **kwargs):
+    pool = FakePool(workers=1, **kwargs)
+    pool.options.update(mode=mode, marker=str(tmp_path / 'crashed'))
+    return pool
+
+
+def test_jobs_resolve_in_order(tmp_path):
+    with _pool(tmp_path, None) as pool:
+        results = list(pool.map(['a', 'b', 'c']))
+    assert results == [('a.mp4', 'title 0'), ('b.mp4', 'title 1'), ('c.mp4', 'title 2')]
+    assert pool.restarts == 0
+
+
+def test_crashed_worker_is_restarted_and_its_job_requeued(tmp_path):
+    with _pool(tmp_path, 'crash-once', max_attempts=2) as pool:
+        future = pool.submit('a')
+        assert future.result(timeout=30) == ('a.mp4', 'title 0')
+    assert pool.restarts == 1
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    with _pool(tmp_path, 'crash', max_attempts=2) as pool:
+        future = pool.submit('a')
+        with pytest.raises(RuntimeError, match='crashed'):
+            future.result(timeout=30)
+    assert pool.restarts == 2
+
+
+def test_hung_worker_is_killed(tmp_path):
+    with _pool(tmp_path, 'hang', job_timeout=0.5, max_attempts=1) as pool:
+        future = pool.submit('a')
+        with pytest.raises(RuntimeError, match='hung'):
+            future.result(timeout=30)
+    assert pool.restarts == 1
+
+
+def test_pool_aborts_when_workers_never_start(tmp_path):
+    pool = _pool(tmp_path, 'no-start')
+    pool.start()
+    future = pool.submit('a')
+    with pytest.raises(RuntimeError, match='failed to start'):
+        future.result(timeout=30)
+    pool.close()
+    assert pool.restarts == BrowserWorkerPool.MAX_STARTUP_FAILURES - 1
+
+
+def test_worker_count_uses_available_memory(monkeypatch):
+    assert available_memory() is None or available_memory() > 0
+    monkeypatch.setattr(browser_pool, 'available_memory', lambda: 1300 * 1024 * 1024)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 8)
+    assert default_worker_count(memory_per_worker_mb=600) == 2
+    monkeypatch.setattr(browser_pool, 'available_memory', lambda: None)
+    assert default_worker_count() == 8
+
+
+def test_cli_downloads_untitled_posts_to_distinct_files(tmp_path, monkeypatch):
+    from src.sora_playwright_downloader import SoraPlaywrightDownloader
+
+    class UntitledPool(FakePool):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.options['mode'] = 'untitled'
+
+    def fake_download(self, video_url, output_path):
+        with open(output_path, 'w') as f:
+            f.write(video_url)
+        return output_path
+
+    urls = [f"https://sora.chatgpt.com/p/s_{i:08x}" for i in range(3)]
+    urls_file = tmp_path / 'urls.txt'
+    urls_file.write_text('\n'.join(urls) + '\n')
+    out = tmp_path / 'out'
+    monkeypatch.setattr(browser_pool, 'BrowserWorkerPool', UntitledPool)
+    monkeypatch.setattr(SoraPlaywrightDownloader, '_download_video', fake_download)
+    monkeypatch.setattr(sys, 'argv', ['browser_pool.py', str(urls_file), '--workers', '1',
+                                      '--no-session', '--download-dir', str(out)])
+    browser_pool.main()
+
+    assert sorted(os.listdir(out)) == ['sora_video_nowatermark.mp4',
+                                       'sora_video_nowatermark_s_00000001.mp4',
+                                       'sora_video_nowatermark_s_00000002.mp4']
+    assert sorted((out / name).read_text() for name in os.listdir(out)) == [f"{url}.mp4" for url in urls]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for persisted browser session state.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import browser_session
+from src.browser_session import BrowserSession, looks_like_challenge
+from src.sora_playwright_downloader import SoraPlaywrightDownloader
+
+UA = 'Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0'
+
+
+def state(expires):
+    return {
+        'cookies': [
+            {'name': 'cf_clearance', 'value': 'abc', 'domain': '.chatgpt.com', 'path': '/', 'expires': expires},
+            {'name': 'other', 'value': 'x', 'domain': 'example.com', 'path': '/', 'expires': -1},
+        ],
+        'origins': [],
+    }
+
+
+def test_challenge_detection():
+    assert looks_like_challenge(title="Just a moment...")
+    assert looks_like_challenge(url="https://sora.chatgpt.com/p/x?__cf_chl_rt_tk=1")
+    assert looks_like_challenge(html='<div class="cf-turnstile"></div>')
+    assert not looks_like_challenge(title="A cat on a skateboard", url="https://sora.chatgpt.com/p/s_1")
+
+
+def test_saved_state_is_reused_until_stale(tmp_path):
+    session = BrowserSession(str(tmp_path), min_save_interval=0)
+    assert session.storage_state(UA) is None
+
+    assert session.save_state(state(time.time() + 3600), UA)
+    assert session.storage_state(UA) == session.state_path
+    assert session.storage_state() == session.state_path
+    assert session.user_agent == UA
+    assert [c['name'] for c in session.cookies('sora.chatgpt.com')] == ['cf_clearance']
+
+    # Clearance is bound to the user agent that earned it
+    assert session.storage_state('SomeOtherAgent/1.0') is None
+
+    session.save_state(state(time.time() - 1), UA)
+    assert session.storage_state(UA) is None
+
+
+def test_max_age_and_invalidate(tmp_path):
+    session = BrowserSession(str(tmp_path), max_age=60, min_save_interval=0)
+    session.save_state(state(-1), UA)
+    assert session.storage_state(UA)
+
+    old = time.time() - 120
+    os.utime(session.state_path, (old, old))
+    assert session.storage_state(UA) is None
+
+    session.save_state(state(-1), UA)
+    session.invalidate()
+    assert session.storage_state(UA) is None
+    assert session.cookies() == []
+
+
+def test_saves_are_throttled(tmp_path):
+    session = BrowserSession(str(tmp_path), min_save_interval=3600)
+    assert session.save_state(state(-1), UA)
+    assert not session.save_state(state(-1), UA)
+    assert session.save_state(state(-1), UA, force=True)
+
+
+@pytest.mark.skipif(browser_session.fcntl is None, reason="needs flock")
+def test_profile_is_used_by_one_run_at_a_time(tmp_path):
+    first = SoraPlaywrightDownloader(session_dir=str(tmp_path), daemon_dir=None)
+    second = SoraPlaywrightDownloader(session_dir=str(tmp_path), daemon_dir=None)
+
+    with first._profile() as persistent:
+        assert persistent
+        # Firefox would refuse the locked profile; fall back to saved state
+        with second._profile() as persistent:
+            assert not persistent
+    with second._profile() as persistent:
+        assert persistent
+
+    with SoraPlaywrightDownloader(session_dir=None)._profile() as persistent:
+        assert not persistent
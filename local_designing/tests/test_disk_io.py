@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the atomic, preallocating write layer.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.disk_io import AtomicFileWriter, FsyncPolicy
+
+
+def test_commit_renames_into_place_and_trims_preallocation(tmp_path):
+    path = tmp_path / "video.mp4"
+    with AtomicFileWriter(str(path), expected_size=1000, fsync_policy="file") as f:
+        f.write(b"x" * 600)
+        assert not path.exists()
+    assert path.read_bytes() == b"x" * 600
+    assert os.listdir(tmp_path) == ["video.mp4"]
+
+
+def test_failure_leaves_no_partial_file(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"previous")
+    with pytest.raises(RuntimeError):
+        with AtomicFileWriter(str(path), expected_size=100) as f:
+            f.write(b"half")
+            raise RuntimeError("connection dropped")
+    assert path.read_bytes() == b"previous"
+    assert os.listdir(tmp_path) == ["video.mp4"]
+
+
+def test_batch_policy_syncs_every_n_files(tmp_path):
+    policy = FsyncPolicy.parse("batch:3")
+    assert str(policy) == "batch:3"
+    for i in range(4):
+        with AtomicFileWriter(str(tmp_path / f"{i}.mp4"), fsync_policy=policy) as f:
+            f.write(b"data")
+    assert policy._pending == [str(tmp_path / "3.mp4")]
+    policy.flush()
+    assert policy._pending == []
+
+
+def test_parse_rejects_unknown_policies():
+    for spec in ("sometimes", "batch:x", "batch:0"):
+        with pytest.raises(ValueError):
+            FsyncPolicy.parse(spec)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for endpoint failover and latency-based routing.
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.endpoints import EndpointPool, LatencyHistogram
+
+
+def start_server(status=200, delay=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        hits = 0
+
+        def do_GET(self):
+            type(self).hits += 1
+            time.sleep(delay)
+            body = self.path.encode()
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, Handler, f"http://127.0.0.1:{httpd.server_port}"
+
+
+def closed_port_url():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def _get(url, timeout=5):
+    import requests
+    return requests.get(url, timeout=timeout)
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.record(0.010)
+    for _ in range(10):
+        histogram.record(1.0)
+    assert 0.010 <= histogram.percentile(50) < 0.015
+    assert 1.0 <= histogram.percentile(99) < 1.5
+
+
+def test_fails_over_on_connection_error_and_5xx():
+    pytest.importorskip('requests')
+    broken, broken_handler, broken_url = start_server(status=503)
+    good, good_handler, good_url = start_server()
+    pool = EndpointPool([closed_port_url(), broken_url, good_url])
+    try:
+        response = pool.request(f"{pool.endpoints[0].base}/api-proxy/x?id=1", _get)
+        assert response.status_code == 200
+        assert response.text == "/api-proxy/x?id=1"
+        assert broken_handler.hits == 1
+
+        # After enough failures the broken endpoints are tried last
+        for _ in range(EndpointPool.FAILURE_THRESHOLD):
+            pool.request(f"{pool.endpoints[0].base}/api-proxy/x", _get)
+        assert pool.base == good_url
+    finally:
+        broken.shutdown()
+        good.shutdown()
+
+
+def test_probe_routes_to_fastest_endpoint():
+    pytest.importorskip('requests')
+    slow, _, slow_url = start_server(delay=0.05)
+    fast, _, fast_url = start_server()
+    pool = EndpointPool([slow_url, fast_url])
+    try:
+        assert pool.base == slow_url  # configured order until measured
+        for _ in range(3):
+            pool.probe_once(_get)
+        assert pool.base == fast_url
+        assert [row['healthy'] for row in pool.report()] == [True, True]
+    finally:
+        slow.shutdown()
+        fast.shutdown()
+
+
+def test_foreign_urls_are_sent_unchanged():
+    pool = EndpointPool(["https://a.example"])
+    assert pool.request("https://cdn.example/video.mp4", lambda url: url) == "https://cdn.example/video.mp4"
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline share-page fixture used by scripts/benchmark_browser.py,
+and the browser path against it when a browser stack is installed.
+"""
+
+import json
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fixture_site import BENCH_HEADER, FixtureSite
+from src.page_resolver import classify_video_url, parse_page
+
+
+@pytest.fixture
+def site():
+    with FixtureSite(media_delay=0.2, video_bytes=200_000) as site:
+        yield site
+
+
+def _get(url, headers=None):
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=5) as response:
+        return response.status, dict(response.headers), response.read()
+
+
+def test_share_page_needs_a_browser(site):
+    _, _, html = _get(site.share_url('s_0123abcd'))
+    # Nothing in the markup resolves to the video; only the app script finds it
+    assert parse_page(html.decode())[0] is None
+    assert classify_video_url(site.share_url('s_0123abcd')) is None
+
+    _, _, post = _get(f"{site.base_url}/backend/project_y/post/s_0123abcd")
+    post = json.loads(post)
+    assert post['video_url'] == site.media_url('s_0123abcd')
+    assert classify_video_url(post['video_url']) == "cdn"
+    assert classify_video_url(f"{site.base_url}/static/promo-loop.mp4") is None
+
+
+def test_traffic_is_attributed_by_client(site):
+    status, headers, body = _get(site.media_url('s_0123abcd'), {'Range': 'bytes=0-0'})
+    assert status == 206 and headers['Content-Range'].endswith(f"/{len(site.video)}") and len(body) == 1
+
+    _get(f"{site.base_url}/static/app.css")
+    _, _, video = _get(site.media_url('s_0123abcd'), {BENCH_HEADER: '1'})
+    assert video == site.video
+
+    summary = site.summary()
+    assert summary['transfer_bytes'] == len(site.video)
+    assert summary['browser_bytes'] == 1 + len(site.asset)
+    assert summary['transfer_first_byte'] is not None
+    # The 1-byte probe is not the browser starting the video
+    assert summary['media_first_byte'] is None
+
+
+def test_browser_captures_late_video(site, tmp_path):
+    from src.sora_playwright_downloader import CAMOUFOX_AVAILABLE, PLAYWRIGHT_AVAILABLE, SoraPlaywrightDownloader
+    if not (CAMOUFOX_AVAILABLE or PLAYWRIGHT_AVAILABLE):
+        pytest.skip("No browser stack installed")
+
+    downloader = SoraPlaywrightDownloader(browserless=False, daemon_dir=None, timeout=30)
+    path = downloader.download(site.share_url('s_0123abcd'), str(tmp_path / 'video.mp4'))
+
+    assert downloader.captured_video_url == site.media_url('s_0123abcd')
+    with open(path, 'rb') as f:
+        assert f.read() == site.video
+    assert site.summary()['tracker_requests'] > 0
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for hedged requests: delay from recent latency, budget, first answer wins.
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.hedging import Hedger
+
+
+class Response:
+    def __init__(self, name):
+        self.name = name
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+def warm(hedger, n=20):
+    for _ in range(n):
+        hedger.call(lambda: Response('fast'))
+
+
+def test_no_hedging_without_history():
+    hedger = Hedger(min_samples=5)
+    assert hedger.delay() is None
+    assert hedger.call(lambda: time.sleep(0.1) or 'ok') == 'ok'
+    assert hedger.report()[0]['hedges'] == 0
+
+
+def test_slow_request_is_hedged_and_loser_closed():
+    hedger = Hedger(budget=0.5, min_delay=0.01)
+    warm(hedger)
+    calls = itertools.count()
+    slow = Response('slow')
+
+    def send():
+        if next(calls) == 0:
+            time.sleep(0.5)
+            return slow
+        return Response('hedge')
+
+    start = time.time()
+    assert hedger.call(send).name == 'hedge'
+    assert time.time() - start < 0.4
+    assert slow.closed.wait(2)
+
+    row = hedger.report()[0]
+    assert (row['requests'], row['hedges'], row['hedge_wins']) == (21, 1, 1)
+    assert row['win_rate'] == 1.0
+
+
+def test_budget_caps_duplicates():
+    hedger = Hedger(budget=0.01, min_delay=0.01)
+    warm(hedger, 200)
+    sends = itertools.count()
+
+    def send():
+        next(sends)
+        time.sleep(0.05)
+        return Response('slow')
+
+    for _ in range(10):
+        hedger.call(send)
+    # 210 requests at a 1% budget allow 2 duplicates
+    assert next(sends) == 12
+    assert hedger.report()[0]['hedges'] == 2
+
+
+def test_failed_attempt_falls_back_to_the_other():
+    hedger = Hedger(budget=1, min_delay=0.01)
+    warm(hedger)
+    calls = itertools.count()
+
+    def send():
+        if next(calls) == 0:
+            time.sleep(0.1)
+            raise ConnectionError("reset")
+        time.sleep(0.2)
+        return Response('hedge')
+
+    assert hedger.call(send).name == 'hedge'
+
+    def always_fails():
+        time.sleep(0.05)
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        hedger.call(always_fails)
+
+
+def test_kinds_have_separate_latency():
+    hedger = Hedger(min_samples=1)
+    hedger.call(lambda: 'x', kind='api')
+    assert hedger.delay('api') is not None
+    assert hedger.delay('thumbnail') is None
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the requests-compatible wrapper around httpx responses.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+requests = pytest.importorskip('requests')
+httpx = pytest.importorskip('httpx')
+
+from src.http2_transport import Http2Response
+
+
+class StubHttpxResponse:
+    """The parts of httpx.Response that Http2Response touches."""
+
+    def __init__(self, status_code=200, body=b'', headers=None, fail_after=None):
+        self.status_code = status_code
+        self.headers = httpx.Headers(headers or {})
+        self.url = httpx.URL('https://sora.example/video')
+        self.http_version = 'HTTP/2'
+        self.encoding = 'utf-8'
+        self.content = body
+        self.fail_after = fail_after
+        self.closed = False
+
+    def read(self):
+        return self.content
+
+    def iter_bytes(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            if self.fail_after is not None and start >= self.fail_after:
+                raise httpx.ReadError("connection reset")
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def test_raise_for_status_maps_to_requests_errors():
+    Http2Response(StubHttpxResponse(204)).raise_for_status()
+
+    response = Http2Response(StubHttpxResponse(429))
+    with pytest.raises(requests.HTTPError) as excinfo:
+        response.raise_for_status()
+    assert excinfo.value.response is response
+    assert '429' in str(excinfo.value) and 'https://sora.example/video' in str(excinfo.value)
+
+
+def test_iter_content_chunks_and_maps_errors():
+    body = bytes(range(256)) * 10
+    assert b''.join(Http2Response(StubHttpxResponse(body=body), stream=True).iter_content(1000)) == body
+    assert [len(c) for c in Http2Response(StubHttpxResponse(body=body)).iter_content(1000)] == [1000, 1000, 560]
+
+    broken = Http2Response(StubHttpxResponse(body=body, fail_after=1000), stream=True)
+    with pytest.raises(requests.ConnectionError):
+        list(broken.iter_content(1000))
+
+
+def test_context_manager_closes_and_headers_are_case_insensitive():
+    stub = StubHttpxResponse(body=b'{"post_id": "s_aaaaaaaa"}',
+                             headers={'Content-Type': 'application/json', 'ETag': '"abc"'})
+    with Http2Response(stub) as response:
+        assert response.headers['content-type'] == 'application/json'
+        assert response.headers.get('etag') == '"abc"'
+        assert response.http_version == 'HTTP/2'
+        assert response.url == 'https://sora.example/video'
+        assert response.json() == {'post_id': 's_aaaaaaaa'}
+        assert response.text == '{"post_id": "s_aaaaaaaa"}'
+    assert stub.closed
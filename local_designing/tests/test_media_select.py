@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for probing captured renditions and choosing one by policy.
+"""
+
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.media_select import MediaPolicy, select_media
+from mp4_fixtures import make_mp4
+
+
+def clip(nbytes):
+    """A 2-second MP4 of roughly `nbytes`."""
+    return make_mp4(chunks=[bytes(nbytes // 2)] * 2, duration=2000, moov_first=True)[0]
+
+
+# Same clip at three sizes, plus a watermarked copy and an HTML error page
+RENDITIONS = {
+    '/MP4/master.mp4': clip(2_000_000),
+    '/MP4/720.mp4': clip(500_000),
+    '/MP4/480.mp4': clip(150_000),
+    # Another post autoplaying in the feed
+    '/MP4/feed/autoplay.mp4': clip(3_000_000),
+}
+WATERMARKED = clip(5_000_000)
+
+
+class RenditionHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/sora/watermarked.mp4':
+            body, content_type = WATERMARKED, 'video/mp4'
+        elif path in RENDITIONS:
+            body, content_type = RENDITIONS[path], 'video/mp4'
+        else:
+            body, content_type = b'<html>expired</html>', 'text/html'
+        start, end = 0, len(body) - 1
+        range_header = self.headers.get('Range')
+        if range_header:
+            first, _, last = range_header.split('=')[1].partition('-')
+            start, end = int(first), min(int(last or end), end)
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(body)}")
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(body[start:end + 1])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def candidates():
+    requests = pytest.importorskip('requests')
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RenditionHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    # 127.0.0.1 is not the CDN, so dress the paths up for classify_video_url
+    base = f"http://127.0.0.1:{httpd.server_port}"
+    cdn = lambda path: f"{base}{path}?h=cdn.openai.com"
+
+    def get(url, headers):
+        return requests.get(url, headers=headers, stream=True, timeout=5)
+
+    urls = [cdn('/MP4/720.mp4'), cdn('/MP4/master.mp4'), cdn('/MP4/480.mp4'),
+            f"{base}/sora/watermarked.mp4", cdn('/MP4/gone.mp4')]
+    yield urls, get
+    httpd.shutdown()
+
+
+def test_policy_parsing():
+    assert str(MediaPolicy.parse('bitrate:2.5')) == 'bitrate:2.5'
+    assert MediaPolicy.parse(None).mode == 'best'
+    with pytest.raises(ValueError):
+        MediaPolicy.parse('bitrate:fast')
+    with pytest.raises(ValueError):
+        MediaPolicy.parse('largest')
+
+
+def test_best_and_smallest_ignore_watermarked_and_broken(candidates):
+    urls, get = candidates
+    assert '/MP4/master.mp4' in select_media(urls, get, 'best')
+    assert '/MP4/480.mp4' in select_media(urls, get, 'smallest')
+
+
+def test_bitrate_cap(candidates):
+    urls, get = candidates
+    # 2 s clips: master ~8 Mbit/s, 720 ~2 Mbit/s, 480 ~0.6 Mbit/s
+    assert '/MP4/720.mp4' in select_media(urls, get, 'bitrate:4')
+    assert '/MP4/480.mp4' in select_media(urls, get, 'bitrate:0.1')
+
+
+def test_single_candidate_is_not_probed():
+    def get(url, headers):
+        raise AssertionError("probed")
+    assert select_media(['https://cdn.openai.com/MP4/a.mp4'] * 2, get) == 'https://cdn.openai.com/MP4/a.mp4'
+    assert select_media([], get) is None
+
+
+def test_only_the_requested_posts_renditions_compete(candidates):
+    urls, get = candidates
+    feed = urls[0].replace('/MP4/720.mp4', '/MP4/feed/autoplay.mp4')
+    assert select_media([feed] + urls, get, 'best') == feed
+    # The player shows the 720p rendition; its siblings compete, the feed does not
+    assert '/MP4/master.mp4' in select_media([feed] + urls, get, 'best', anchors=[urls[0]])
+
+    def get_unprobed(url, headers):
+        raise AssertionError("probed")
+    mine = 'https://cdn.openai.com/MP4/s_693b0000/src.mp4'
+    other = 'https://cdn.openai.com/MP4/s_0ther000/src.mp4'
+    assert select_media([other, mine], get_unprobed, post_id='s_693b0000') == mine
+    # Nothing tied to the post: the first CDN capture, as before probing
+    assert select_media([other, mine], get_unprobed, post_id='s_ffffffff') == other
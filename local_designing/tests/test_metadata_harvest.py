@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk metadata harvester: records, checkpoints and resuming.
+"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.metadata_harvest import FIELDS, JsonlSink, MetadataHarvester, open_sink
+from src.url_ingest import iter_urls
+
+
+class MetadataHandler(BaseHTTPRequestHandler):
+    """api-proxy answering for any post, except ones ending in "dead" until revived."""
+    lock = threading.Lock()
+    calls = []
+    revived = set()
+
+    def do_GET(self):
+        post_id = 's_' + self.path.rsplit('s_', 1)[1]
+        with self.lock:
+            self.calls.append(post_id)
+        if post_id.endswith('dead') and post_id not in self.revived:
+            body, status = b'{"error": "not found"}', 404
+        else:
+            body, status = json.dumps({
+                'post_id': post_id,
+                'created_at': 1760000000,
+                'post_info': {'title': f"clip {post_id}", 'prompt': f"a cat, take {post_id[-2:]}"},
+            }).encode(), 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def harvester():
+    pytest.importorskip('requests')
+    from src.sora_downloader import SoraVideoDownloader
+
+    MetadataHandler.calls.clear()
+    MetadataHandler.revived.clear()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), MetadataHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield MetadataHarvester(SoraVideoDownloader(endpoints=[f"http://127.0.0.1:{httpd.server_port}"]))
+    httpd.shutdown()
+
+
+def _urls(ids):
+    return [f"https://sora.chatgpt.com/p/s_{i}" for i in ids]
+
+
+def _read(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_harvest_writes_flat_records(harvester, tmp_path):
+    path = str(tmp_path / 'catalogue.jsonl')
+    ids = [f"{i:08x}" for i in range(20)] + ['0000dead']
+    stats = harvester.run(_urls(ids), JsonlSink(path), checkpoint_every=5)
+
+    assert stats['records'] == 21 and stats['errors'] == 1
+    records = {r['post_id']: r for r in _read(path)}
+    assert set(records) == {f"s_{i}" for i in ids}
+    assert all(set(r) == set(FIELDS) for r in records.values())
+
+    record = records['s_00000003']
+    assert record['title'] == 'clip s_00000003'
+    assert record['prompt'] == 'a cat, take 03'
+    assert record['created_at'] == '1760000000'
+    assert 'id=s_00000003' in record['download_url'] and 'id=s_00000003' in record['thumbnail_url']
+    assert record['error'] is None
+    assert '404' in records['s_0000dead']['error']
+
+
+def test_interrupted_harvest_resumes(harvester, tmp_path):
+    path = tmp_path / 'catalogue.jsonl'
+    ids = [f"{i:08x}" for i in range(10)] + ['0000dead']
+    harvester.run(_urls(ids[:6]), JsonlSink(str(path)))
+    # A crash in the middle of a write leaves half a line
+    with open(path, 'a') as f:
+        f.write('{"post_id": "s_000000')
+
+    source = tmp_path / 'urls.txt'
+    source.write_text('\n'.join(_urls(ids)) + '\n')
+    sink = JsonlSink(str(path))
+    seen = harvester.resume_set(sink)
+    assert len(seen) == 6
+
+    MetadataHandler.calls.clear()
+    harvester.run(iter_urls([str(source)], seen=seen), sink)
+    assert sorted(MetadataHandler.calls) == sorted(f"s_{i}" for i in ids[6:])
+    assert sorted(r['post_id'] for r in _read(path)) == sorted(f"s_{i}" for i in ids)
+
+    # Failures are kept unless retrying them was asked for
+    assert len(harvester.resume_set(JsonlSink(str(path)))) == len(ids)
+    assert 's_0000dead' not in harvester.resume_set(JsonlSink(str(path)), retry_errors=True)
+
+    # A retry appends a row after the failed one; the last row per post is current
+    MetadataHandler.revived.add('s_0000dead')
+    sink = JsonlSink(str(path))
+    seen = harvester.resume_set(sink, retry_errors=True)
+    harvester.run(iter_urls([str(source)], seen=seen), sink)
+    rows = [r for r in _read(path) if r['post_id'] == 's_0000dead']
+    assert len(rows) == 2 and rows[0]['error'] and rows[-1]['error'] is None
+    assert 's_0000dead' in harvester.resume_set(JsonlSink(str(path)), retry_errors=True)
+
+
+def test_parquet_parts_per_checkpoint(harvester, tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    directory = str(tmp_path / 'catalogue.parquet')
+    sink = open_sink(directory)
+    harvester.run(_urls(f"{i:08x}" for i in range(12)), sink, checkpoint_every=5)
+
+    parts = sorted(os.listdir(directory))
+    assert parts == ['part-000000.parquet', 'part-000001.parquet', 'part-000002.parquet']
+    table = pq.read_table(directory)
+    assert table.num_rows == 12 and table.column_names == list(FIELDS)
+    assert len(harvester.resume_set(open_sink(directory))) == 12
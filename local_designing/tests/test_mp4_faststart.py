@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for moov relocation, on disk and fused with a Range download.
+"""
+
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from mp4_fixtures import box, make_mp4, stco
+from src.mp4_faststart import (
+    NotFaststartable, faststart_file, iter_boxes, relocate_moov, stream_faststart,
+)
+
+
+def chunk_offsets(data):
+    """Collect stco/co64 entries from every track of a file image."""
+    offsets = []
+
+    def walk(start, end):
+        for btype, offset, size, header in iter_boxes(data, start, end):
+            if btype in (b'moov', b'trak', b'mdia', b'minf', b'stbl'):
+                walk(offset + header, offset + size)
+            elif btype in (b'stco', b'co64'):
+                count, = struct.unpack_from('>I', data, offset + header + 4)
+                fmt = '>%dI' if btype == b'stco' else '>%dQ'
+                offsets.extend(struct.unpack_from(fmt % count, data, offset + header + 8))
+
+    walk(0, len(data))
+    return offsets
+
+
+def assert_faststart(data, chunks):
+    types = [b[0] for b in iter_boxes(data)]
+    assert types.index(b'moov') < types.index(b'mdat')
+    offsets = sorted(chunk_offsets(data))
+    assert [data[o:o + len(c)] for o, c in zip(offsets, chunks)] == chunks
+
+
+def test_faststart_file_moves_moov_and_patches_offsets(tmp_path):
+    data, chunks = make_mp4(trailing=box(b'free', b'\0' * 10))
+    path = tmp_path / "video.mp4"
+    path.write_bytes(data)
+
+    assert faststart_file(str(path)) is True
+    out = path.read_bytes()
+    assert len(out) == len(data)
+    assert_faststart(out, chunks)
+    assert os.listdir(tmp_path) == ["video.mp4"]
+
+
+def test_already_faststart_is_left_alone(tmp_path):
+    data, chunks = make_mp4(moov_first=True)
+    assert_faststart(data, chunks)
+    path = tmp_path / "video.mp4"
+    path.write_bytes(data)
+
+    assert faststart_file(str(path)) is False
+    assert path.read_bytes() == data
+
+
+def test_stco_upgraded_to_co64_when_offsets_overflow():
+    moov = box(b'moov', box(b'trak', box(b'mdia', box(b'minf', box(b'stbl', stco([0xFFFFFFF0, 50]))))))
+    patched = relocate_moov(moov, insert_at=0, moov_offset=0xFFFFFFFF + 10)
+
+    assert b'co64' in patched and b'stco' not in patched
+    # The upgrade grew the moov, and the shift must use the final size
+    assert sorted(chunk_offsets(patched)) == [50 + len(patched), 0xFFFFFFF0 + len(patched)]
+
+
+def test_stream_faststart_matches_on_disk_rewrite(tmp_path, range_server):
+    pytest.importorskip('requests')
+    # A large mdat so it does not fit in the head request
+    data, chunks = make_mp4(chunks=[bytes([i % 256]) * 40000 for i in range(1, 7)])
+    range_server.data, range_server.honour_range = data, True
+
+    streamed = tmp_path / "streamed.mp4"
+    written = stream_faststart(range_server.get, range_server.url, str(streamed))
+    on_disk = tmp_path / "on_disk.mp4"
+    on_disk.write_bytes(data)
+    faststart_file(str(on_disk))
+
+    assert written == len(data)
+    assert streamed.read_bytes() == on_disk.read_bytes()
+    assert_faststart(streamed.read_bytes(), chunks)
+
+
+def test_stream_faststart_refuses_without_range(tmp_path, range_server):
+    pytest.importorskip('requests')
+    range_server.data, range_server.honour_range = make_mp4()[0], False
+    with pytest.raises(NotFaststartable):
+        stream_faststart(range_server.get, range_server.url, str(tmp_path / "x.mp4"))
+    assert not os.listdir(tmp_path)
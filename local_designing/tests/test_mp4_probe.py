@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the Range-based MP4 probe.
+"""
+
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from mp4_fixtures import make_mp4
+from src.mp4_probe import ProbeError, bounded_map, parse_moov, probe_url
+from src.mp4_faststart import iter_boxes
+
+
+def _moov(data):
+    for btype, offset, size, _ in iter_boxes(data):
+        if btype == b'moov':
+            return data[offset:offset + size]
+
+
+def test_parse_moov_reads_duration_resolution_and_codecs():
+    data, _ = make_mp4(width=1920, height=1080, timescale=600, duration=6000, codec=b'hvc1')
+    info = parse_moov(_moov(data))
+
+    assert info['duration'] == 10.0
+    assert (info['width'], info['height']) == (1920, 1080)
+    assert (info['video_codec'], info['audio_codec']) == ('hvc1', 'mp4a')
+    assert [t['type'] for t in info['tracks']] == ['vide', 'soun']
+
+
+@pytest.mark.parametrize('moov_first', [True, False])
+def test_probe_fetches_only_the_index(range_server, moov_first):
+    pytest.importorskip('requests')
+    # 1 MB of media data that the probe must not download
+    data, _ = make_mp4(chunks=[bytes([i]) * 125000 for i in range(1, 9)], moov_first=moov_first)
+    range_server.data, range_server.honour_range = data, True
+
+    info = probe_url(range_server.get, range_server.url)
+
+    assert info['size'] == len(data)
+    assert info['duration'] == 5.0
+    assert (info['width'], info['height'], info['video_codec']) == (1280, 720, 'avc1')
+    assert info['moov_position'] == ('head' if moov_first else 'tail')
+    assert range_server.served == info['bytes_fetched'] < 128 * 1024
+
+
+def test_probe_refuses_without_range(range_server):
+    pytest.importorskip('requests')
+    range_server.data, range_server.honour_range = make_mp4()[0], False
+    with pytest.raises(ProbeError):
+        probe_url(range_server.get, range_server.url)
+
+
+def test_probe_rejects_zero_sized_box(range_server):
+    pytest.importorskip('requests')
+    # 64-bit header with largesize 0 would otherwise never advance
+    range_server.data = struct.pack('>I4sQ', 1, b'free', 0) + make_mp4()[0]
+    with pytest.raises(ProbeError, match='Corrupt'):
+        probe_url(range_server.get, range_server.url)
+
+
+def test_bounded_map_consumes_input_lazily():
+    consumed = []
+
+    def source():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    results = bounded_map(lambda x: 1 // (x % 10), source(), workers=2)
+    first = next(results)
+    assert len(consumed) <= 5
+    rest = [first] + list(results)
+    assert sorted(item for item, _, _ in rest) == list(range(100))
+    assert sum(1 for _, _, error in rest if isinstance(error, ZeroDivisionError)) == 10
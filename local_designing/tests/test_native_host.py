@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests for the native-messaging host, driven by a stub extension client.
+"""
+
+import json
+import os
+import struct
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.native_host import encode_message, host_manifest, read_message
+
+HOST = os.path.join(os.path.dirname(__file__), '..', 'src', 'native_host.py')
+VIDEO = b'\x00' * 300_000
+
+
+class EngineHandler(BaseHTTPRequestHandler):
+    """api-proxy and download-proxy for any post; "dead" posts 404."""
+
+    def do_GET(self):
+        if self.path.startswith('/api-proxy/'):
+            post_id = 's_' + self.path.rsplit('s_', 1)[1]
+            status = 404 if post_id.endswith('dead') else 200
+            body = json.dumps({'post_id': post_id, 'title': f"clip {post_id[-4:]}"}).encode()
+            content_type = 'application/json'
+        else:
+            assert parse_qs(urlparse(self.path).query)['id']
+            status, body, content_type = 200, VIDEO, 'video/mp4'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubClient:
+    """What the extension does: spawn the host and exchange framed JSON."""
+
+    def __init__(self, api_base, output_dir):
+        env = dict(os.environ, SORA_API_ENDPOINTS=api_base, SORA_OUTPUT_DIR=output_dir)
+        # Browsers pass the extension origin as the only argument
+        self.process = subprocess.Popen([sys.executable, HOST, 'chrome-extension://stub/'], env=env,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL)
+
+    def send(self, message):
+        self.process.stdin.write(encode_message(message))
+        self.process.stdin.flush()
+
+    def receive(self):
+        return read_message(self.process.stdout)
+
+    def until(self, kind, batch_id):
+        events = []
+        while True:
+            event = self.receive()
+            assert event is not None, f"host exited before {kind}: {events}"
+            events.append(event)
+            if event['type'] == kind and event.get('id') == batch_id:
+                return events
+
+    def close(self):
+        self.process.stdin.close()
+        return self.process.wait(timeout=10)
+
+
+@pytest.fixture
+def client(tmp_path):
+    pytest.importorskip('requests')
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), EngineHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    client = StubClient(f"http://127.0.0.1:{httpd.server_port}", str(tmp_path))
+    yield client
+    if client.process.poll() is None:
+        client.process.kill()
+    httpd.shutdown()
+
+
+def test_framing_round_trip():
+    import io
+
+    data = encode_message({'type': 'ping', 'text': 'ü'})
+    assert struct.unpack('@I', data[:4])[0] == len(data) - 4
+    stream = io.BytesIO(data + data[:6])
+    assert read_message(stream) == {'type': 'ping', 'text': 'ü'}
+    # A truncated frame reads as end of input
+    assert read_message(stream) is None
+
+
+def test_manifests():
+    chrome = host_manifest('chrome', '/opt/host', 'abcdefghijklmnopabcdefghijklmnop')
+    assert chrome['allowed_origins'] == ['chrome-extension://abcdefghijklmnopabcdefghijklmnop/']
+    assert chrome['type'] == 'stdio' and chrome['path'] == '/opt/host'
+    assert host_manifest('firefox', '/opt/host')['allowed_extensions'] == ['getsora-video@enthusiadev.com']
+    with pytest.raises(ValueError):
+        host_manifest('chrome', '/opt/host')
+
+
+def test_batch_streams_progress_and_resumes(client, tmp_path):
+    client.send({'type': 'ping'})
+    assert client.receive()['type'] == 'pong'
+
+    urls = [f"https://sora.chatgpt.com/p/s_{i:08x}" for i in range(4)]
+    # Duplicates are dropped, dead posts fail without stopping the batch
+    client.send({'type': 'download', 'id': 'b1', 'urls': urls + [urls[0], 'https://sora.chatgpt.com/p/s_0000dead']})
+    events = client.until('finished', 'b1')
+
+    accepted = events[0]
+    assert accepted == {'type': 'accepted', 'id': 'b1', 'count': 5, 'output_dir': str(tmp_path)}
+    done = [e for e in events if e['type'] == 'done']
+    assert sorted(e['url'] for e in done) == urls
+    assert [e['url'] for e in events if e['type'] == 'failed'] == ['https://sora.chatgpt.com/p/s_0000dead']
+    finished = events[-1]
+    assert finished['downloaded'] == 4 and finished['failed'] == 1 and not finished['cancelled']
+
+    progress = [e for e in events if e['type'] == 'progress']
+    assert {e['path'] for e in progress} == {e['path'] for e in done}
+    assert all(e['id'] == 'b1' and e['total'] == len(VIDEO) for e in progress)
+    for path in {e['path'] for e in done}:
+        assert os.path.getsize(path) == len(VIDEO)
+
+    # Sending the batch again finds everything on disk
+    client.send({'type': 'download', 'id': 'b2', 'urls': urls})
+    events = client.until('finished', 'b2')
+    assert [e for e in events if e['type'] == 'progress'] == []
+    assert events[-1]['downloaded'] == 4
+
+    client.send({'type': 'bogus'})
+    assert client.receive()['type'] == 'error'
+    assert client.close() == 0
+
+
+def test_concurrent_batches_share_one_index(sora_api, tmp_path):
+    import io
+
+    from src.native_host import NativeHost
+    from src.sora_downloader import SoraVideoDownloader
+
+    sora_api.download_delay = 0.2
+    urls = [sora_api.add('s_aaaaaaaa', 'A cat', b'first cat'),
+            sora_api.add('s_bbbbbbbb', 'A cat', b'second cat')]
+    host = NativeHost(None, io.BytesIO(), SoraVideoDownloader(endpoints=[sora_api.base]), str(tmp_path))
+
+    # Two clicks, two batches into the same directory at the same time
+    batches = [threading.Thread(target=host._run_batch, args=(f"b{i}", [url], str(tmp_path), threading.Event()))
+               for i, url in enumerate(urls)]
+    for batch in batches:
+        batch.start()
+    for batch in batches:
+        batch.join()
+
+    index = json.loads((tmp_path / '.downloads.json').read_text())
+    assert len(set(index.values())) == 2
+    assert (tmp_path / index['s_aaaaaaaa']).read_bytes() == b'first cat'
+    assert (tmp_path / index['s_bbbbbbbb']).read_bytes() == b'second cat'
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for resolving video URLs from share page HTML without a browser.
+"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.browser_session import BrowserSession
+from src.page_resolver import PageResolver, ResolveError, parse_page
+
+CDN = "https://cdn.openai.com/MP4/s_693b/video.mp4?sig=a&exp=1"
+
+
+def test_meta_tags():
+    html = f'''<html><head>
+        <meta property="og:title" content="Otter &amp; friends">
+        <meta content="{CDN.replace('&', '&amp;')}" property='og:video' />
+    </head></html>'''
+    video_url, title = parse_page(html)
+    assert video_url == CDN
+    assert title == "Otter & friends"
+
+
+def test_embedded_json_prefers_cdn_over_other_mp4():
+    data = {'props': {'pageProps': {'post': {
+        'title': 'A cat on a skateboard',
+        'preview': 'https://videos.sora.example/preview.mp4',
+        'attachments': [{'encodings': {'source': {'path': CDN}}}],
+    }}}}
+    html = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script>'
+    assert parse_page(html) == (CDN, 'A cat on a skateboard')
+
+
+def test_escaped_flight_payload():
+    escaped = json.dumps(CDN)[1:-1].replace('/', '\\/').replace('&', '\\u0026')
+    html = f'<script>self.__next_f.push([1,"{escaped}"])</script><title>Sora</title>'
+    assert parse_page(html) == (CDN, None)
+
+
+def test_markup_scan_prefers_the_requested_post():
+    other = "https://cdn.openai.com/MP4/s_0ther000/video.mp4"
+    mine = "https://cdn.openai.com/MP4/s_693b0000/video.mp4"
+    html = f'<script>self.__next_f.push([1,"{other}","{mine}"])</script>'
+    assert parse_page(html)[0] == other
+    assert parse_page(html, 's_693b0000')[0] == mine
+    # No candidate for the post: fall back to the usual choice
+    assert parse_page(html, 's_ffffffff')[0] == other
+
+
+def test_embedded_json_takes_video_and_title_from_the_requested_post():
+    other = "https://cdn.openai.com/MP4/s_0ther000/video.mp4"
+    mine = "https://videos.sora.example/s_693b0000/master.mp4"
+    data = {'props': {'pageProps': {
+        'title': 'Sora',
+        'feed': [{'id': 's_0ther000', 'title': 'Someone else', 'video': other}],
+        'post': {
+            'remix_of': {'id': 's_0ther000', 'name': 'Original'},
+            'id': 's_693b0000',
+            'attachments': [{'url': "https://videos.sora.example/preview.mp4"}],
+            'title': 'A cat on a skateboard',
+            'video': mine,
+        },
+    }}}
+    html = (f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script>'
+            f'<script>self.__next_f.push([1,"{other}"])</script>')
+    # Without a post ID the first CDN video on the page wins, as before
+    assert parse_page(html)[0] == other
+    assert parse_page(html, 's_693b0000') == (mine, 'A cat on a skateboard')
+
+
+def test_meta_tags_prefer_the_requested_post():
+    other = "https://cdn.openai.com/MP4/s_0ther000/video.mp4"
+    mine = "https://cdn.openai.com/MP4/s_693b0000/video.mp4"
+    html = (f'<meta property="og:video" content="{other}">'
+            f'<meta property="twitter:player:stream" content="{mine}">')
+    assert parse_page(html)[0] == other
+    assert parse_page(html, 's_693b0000')[0] == mine
+
+
+def test_nothing_found():
+    assert parse_page('<html><body>no video</body></html>') == (None, None)
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    cookies_seen = []
+
+    def do_GET(self):
+        type(self).cookies_seen.append(self.headers.get('Cookie', ''))
+        if 'cf_clearance=ok' in self.headers.get('Cookie', ''):
+            status, body = 200, f'<meta property="og:video" content="{CDN}">'
+        else:
+            status, body = 403, '<title>Just a moment...</title><div class="cf-turnstile"></div>'
+        body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/p/s_693b"
+    httpd.shutdown()
+
+
+def test_resolve_uses_session_cookies(tmp_path, server):
+    pytest.importorskip('requests')
+    with pytest.raises(ResolveError, match='challenge'):
+        PageResolver().resolve(server)
+
+    session = BrowserSession(str(tmp_path))
+    session.save_state({'cookies': [
+        {'name': 'cf_clearance', 'value': 'ok', 'domain': '127.0.0.1', 'path': '/', 'expires': -1},
+    ], 'origins': []}, user_agent='TestAgent/1.0')
+
+    resolver = PageResolver(session)
+    assert resolver.user_agent == 'TestAgent/1.0'
+    assert resolver.resolve(server) == (CDN, None)
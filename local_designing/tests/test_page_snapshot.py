@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for single-evaluation DOM extraction in the browser downloader.
+"""
+
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.sora_playwright_downloader import (
+    PAGE_SNAPSHOT_SCRIPT, SNAPSHOT_TIMEOUT_MS, SoraPlaywrightDownloader,
+)
+
+CDN = "https://cdn.openai.com/MP4/s_693b/video.mp4?sig=a"
+
+
+class Handle:
+    def __init__(self, value):
+        self.value = value
+
+    def json_value(self):
+        return self.value
+
+
+class Page:
+    """Records evaluations; any locator use would fail loudly."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.calls = []
+
+    def wait_for_function(self, script, arg=None, timeout=None):
+        self.calls.append((script, arg, timeout))
+        if isinstance(self.snapshot, Exception):
+            raise self.snapshot
+        return Handle(self.snapshot)
+
+
+def test_one_round_trip_with_hard_timeout():
+    page = Page({'videos': ['blob:https://sora.chatgpt.com/x', CDN], 'og_title': 'Otters'})
+    downloader = SoraPlaywrightDownloader(session_dir=None)
+    snapshot = downloader._page_snapshot(page)
+
+    assert downloader._video_from_snapshot(snapshot) == CDN
+    assert downloader._title_from_snapshot(snapshot) == 'Otters'
+    [(script, arg, timeout)] = page.calls
+    assert script == PAGE_SNAPSHOT_SCRIPT and timeout == SNAPSHOT_TIMEOUT_MS
+    assert arg['selectors'] == SoraPlaywrightDownloader.VIDEO_SELECTORS
+
+
+def test_title_precedence():
+    pick = SoraPlaywrightDownloader._title_from_snapshot
+    assert pick({'document_title': 'Sora', 'h1': 'Heading'}) == 'Heading'
+    assert pick({'document_title': 'Walk in the rain', 'h1': 'Heading'}) == 'Walk in the rain'
+    assert pick({'document_title': 'Sora', 'h1': ''}) is None
+
+
+def test_failed_snapshot_yields_nothing():
+    downloader = SoraPlaywrightDownloader(session_dir=None)
+    snapshot = downloader._page_snapshot(Page(TimeoutError("deadline")))
+    assert snapshot == {}
+    assert downloader._video_from_snapshot(snapshot) is None
+    assert downloader._title_from_snapshot(snapshot) is None
+
+
+def test_post_videos_come_from_meta_player_and_json_entry():
+    mine = "https://cdn.openai.com/MP4/s_693b0000/src.mp4"
+    feed = {'id': 's_0ther000', 'video': "https://cdn.openai.com/MP4/s_0ther000/src.mp4"}
+    data = {'feed': [feed], 'post': {'id': 's_693b0000', 'video': mine}}
+    snapshot = {
+        'post_videos': ['blob:https://sora.chatgpt.com/1', CDN],
+        'json': f'<script type="application/json">{json.dumps(data)}</script>',
+    }
+    pick = SoraPlaywrightDownloader._post_videos_from_snapshot
+    assert pick(snapshot, 's_693b0000') == [CDN, mine]
+    assert pick(snapshot, None) == [CDN]
+    assert pick({}, 's_693b0000') == []
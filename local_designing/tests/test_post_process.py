@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for post-download hooks in a bounded process pool.
+"""
+
+import hashlib
+import os
+import shlex
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.post_process import PostProcessor, resolve_hook, run_hooks
+
+PYTHON = shlex.quote(sys.executable)
+
+
+def _files(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"clip_{i}.mp4"
+        path.write_bytes(os.urandom(1000 + i))
+        paths.append(str(path))
+    return paths
+
+
+# Set by the test in the parent only; a forked worker would inherit it
+_PARENT_STATE = {}
+
+
+def inherited_state(path):
+    """module:fn hook reporting whether the worker saw the parent's memory."""
+    return _PARENT_STATE.get('set_in_parent', False)
+
+
+def test_sha256_hook_writes_sidecar(tmp_path):
+    path, = _files(tmp_path, 1)
+    (spec, seconds, digest, error), = run_hooks(['sha256'], path)
+
+    assert error is None and seconds >= 0
+    with open(path, 'rb') as f:
+        assert digest == hashlib.sha256(f.read()).hexdigest()
+    assert open(path + '.sha256').read() == f"{digest}  clip_0.mp4\n"
+
+
+def test_unknown_hooks_fail_before_the_pool_starts():
+    with pytest.raises(ValueError):
+        resolve_hook('sha1')
+    with pytest.raises(ValueError):
+        resolve_hook('exec:')
+    with pytest.raises(ValueError):
+        PostProcessor(['sha256', 'no_such_module:hook'], processes=1)
+
+
+def test_exec_hook_substitutes_paths_and_reports_failures(tmp_path):
+    paths = _files(tmp_path, 3)
+    copy = f"exec:{PYTHON} -c \"import shutil, sys; shutil.copy(sys.argv[1], sys.argv[2])\" {{path}} {{stem}}.copy"
+    fail = f"exec:{PYTHON} -c \"import sys; sys.exit('no decoder for ' + sys.argv[1])\" {{name}}"
+
+    with PostProcessor([copy, fail, 'sha256'], processes=2) as post:
+        for path in paths:
+            post.submit(path)
+
+    for path in paths:
+        assert open(os.path.splitext(path)[0] + '.copy', 'rb').read() == open(path, 'rb').read()
+        # A failing hook does not stop the ones after it
+        assert os.path.exists(path + '.sha256')
+
+    copied, failed, hashed = post.report()
+    assert post.files == 3
+    assert (copied['runs'], copied['failures']) == (3, 0)
+    assert (failed['runs'], failed['failures']) == (3, 3)
+    assert 'no decoder for clip_' in failed['last_error']
+    assert hashed['failures'] == 0 and hashed['mean_ms'] is not None
+
+
+def test_full_queue_blocks_the_submitter(tmp_path):
+    paths = _files(tmp_path, 4)
+    slow = f"exec:{PYTHON} -c \"import time; time.sleep(0.3)\""
+    done = []
+
+    post = PostProcessor([slow], processes=1, max_pending=1, on_done=lambda path, outcomes: done.append(path))
+    started = time.perf_counter()
+    for path in paths:
+        post.submit(path)
+    handed_over = time.perf_counter() - started
+    post.close()
+
+    # Only one file may be queued or running, so handing over the fourth
+    # waited for the first three to finish
+    assert handed_over >= 0.8
+    assert post.blocked_seconds >= 0.8
+    assert sorted(done) == paths
+    hook, = post.report()
+    assert hook['runs'] == 4 and hook['max_ms'] >= 250
+
+
+def test_hooks_use_several_processes(tmp_path):
+    paths = _files(tmp_path, 4)
+    slow = f"exec:{PYTHON} -c \"import time; time.sleep(0.4)\""
+
+    started = time.perf_counter()
+    with PostProcessor([slow], processes=4) as post:
+        for path in paths:
+            post.submit(path)
+    elapsed = time.perf_counter() - started
+
+    assert post.blocked_seconds < 0.2
+    assert elapsed < 1.2  # serially it would take 1.6s
+
+
+def test_workers_are_not_forked_from_the_parent(tmp_path):
+    outcomes = []
+    _PARENT_STATE['set_in_parent'] = True
+    with PostProcessor(['test_post_process:inherited_state'], processes=1,
+                       on_done=lambda path, result: outcomes.extend(result)) as post:
+        post.submit(_files(tmp_path, 1)[0])
+
+    (_, _, result, error), = outcomes
+    assert error is None and result is False
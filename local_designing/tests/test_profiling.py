@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the sampling profiler and its phase attribution.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import profiling
+from src.disk_io import AtomicFileWriter
+from src.profiling import Profiler, phase, phased
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_phases_are_free_when_not_profiling():
+    assert profiling._active is None
+    assert phase('transfer') is phase('resolve')
+
+    @phased('resolve')
+    def resolve(url):
+        """Resolve a URL."""
+        return url.upper()
+
+    assert resolve('x') == 'X' and resolve.__name__ == 'resolve'
+
+
+def test_samples_are_attributed_to_the_innermost_phase(tmp_path):
+    def worker():
+        with phase('resolve'):
+            _spin(0.1)
+
+    with Profiler(interval=0.002) as profiler:
+        thread = threading.Thread(target=worker)
+        thread.start()
+        with phase('transfer'):
+            _spin(0.1)
+            with phase('disk-write'):
+                _spin(0.2)
+        thread.join()
+        # Idle helper threads are not sampled
+        time.sleep(0.05)
+
+    summary = profiler.summary()
+    rows = {row['phase']: row for row in summary['phases']}
+    assert [row['phase'] for row in summary['phases']][:3] == ['resolve', 'transfer', 'disk-write']
+    assert rows['transfer']['calls'] == 1 and rows['disk-write']['calls'] == 1
+    # Wall and CPU time include nested phases; samples do not
+    assert rows['transfer']['wall_s'] >= 0.3 and rows['transfer']['cpu_s'] >= 0.1
+    assert rows['disk-write']['samples'] > rows['transfer']['samples'] > 0
+    assert rows['resolve']['samples'] > 0
+    assert abs(sum(row['share'] for row in summary['phases']) - 1) < 1e-9
+    # Hot spots list only the project's own code
+    assert rows['disk-write']['hot'] == []
+
+    path = tmp_path / 'run.collapsed'
+    profiler.write_collapsed(path)
+    lines = path.read_text().splitlines()
+    assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any(line.startswith('[disk-write];') and '_spin (test_profiling.py:' in line for line in lines)
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == summary['samples']
+
+
+def test_writer_tags_disk_writes(tmp_path):
+    with Profiler(interval=0.001) as profiler:
+        with phase('transfer'):
+            with AtomicFileWriter(str(tmp_path / 'clip.mp4')) as f:
+                for _ in range(500):
+                    f.write(b'\x00' * 65536)
+
+    rows = {row['phase']: row for row in profiler.summary()['phases']}
+    # Only the commit: chunk writes stay in the transfer phase
+    assert rows['disk-write']['calls'] == 1
+    assert rows['transfer']['wall_s'] >= rows['disk-write']['wall_s']
+    for label, _ in rows['disk-write']['hot']:
+        assert '(disk_io.py:' in label
+
+
+def test_cli_flag_writes_stacks_and_summary(tmp_path):
+    prefix = str(tmp_path / 'profile')
+    script = (
+        "import sys, argparse, time\n"
+        "from profiling import add_profile_arguments, phase, profile_from_args\n"
+        "parser = argparse.ArgumentParser()\n"
+        "add_profile_arguments(parser)\n"
+        "profile_from_args(parser.parse_args(sys.argv[1:]))\n"
+        "with phase('transfer'):\n"
+        "    end = time.perf_counter() + 0.2\n"
+        "    while time.perf_counter() < end: pass\n"
+        "sys.exit(3)\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script, '--profile', '--profile-out', prefix],
+                            cwd=SRC_DIR, capture_output=True, text=True, timeout=60)
+
+    # Written on the way out, even when the CLI exits with an error
+    assert result.returncode == 3, result.stderr
+    assert 'transfer' in result.stdout
+    summary = json.load(open(prefix + '.json'))
+    assert summary['phases'][0]['phase'] == 'transfer' and summary['phases'][0]['samples'] > 0
+    assert open(prefix + '.collapsed').read().startswith('[')
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for size-aware batch ordering and the makespan report.
+"""
+
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.scheduling import SizeCache, makespan_lower_bound, order_by_size
+
+JOBS = [('a', 10), ('b', 500), ('c', None), ('d', 40), ('e', 200)]
+
+
+def test_order_policies():
+    assert order_by_size(JOBS, 'input') == ['a', 'b', 'c', 'd', 'e']
+    # The unknown size counts as the median known size (200); ties keep input order
+    assert order_by_size(JOBS, 'longest-first') == ['b', 'c', 'e', 'd', 'a']
+    assert order_by_size(JOBS, 'shortest-first') == ['a', 'd', 'c', 'e', 'b']
+    assert order_by_size(JOBS, 'interleave') == ['b', 'a', 'c', 'd', 'e']
+    with pytest.raises(ValueError):
+        order_by_size(JOBS, 'random')
+
+
+def test_makespan_lower_bound():
+    assert makespan_lower_bound([], 4) == 0.0
+    # Total work dominates...
+    assert makespan_lower_bound([2, 2, 2, 2], 2) == 4
+    # ...unless one job is longer than the even share
+    assert makespan_lower_bound([9, 1, 1, 1], 2) == 9
+
+
+def test_size_cache_round_trip(tmp_path):
+    cache = SizeCache(str(tmp_path))
+    cache.set('s_1', 1234)
+    cache.set('s_2', None)
+    cache.save()
+
+    assert SizeCache(str(tmp_path)).sizes == {'s_1': 1234}
+    (tmp_path / '.video_sizes.json').write_text('not json')
+    assert SizeCache(str(tmp_path)).sizes == {}
+
+
+class SizedHandler(BaseHTTPRequestHandler):
+    """Videos whose size is encoded in the post ID; records transfer order."""
+    lock = threading.Lock()
+    probes = []
+    transfers = []
+
+    def _send(self, status, body, content_type, extra=()):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in extra:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith('/api-proxy/'):
+            post_id = 's_' + self.path.rsplit('s_', 1)[1][:8]
+            return self._send(200, f'{{"post_id": "{post_id}"}}'.encode(), 'application/json')
+
+        post_id = parse_qs(urlparse(self.path).query)['id'][0]
+        size = int(post_id[2:], 16)
+        if self.headers.get('Range') == 'bytes=0-0':
+            with self.lock:
+                self.probes.append(post_id)
+            return self._send(206, b'\x00', 'video/mp4', [('Content-Range', f'bytes 0-0/{size}')])
+        with self.lock:
+            self.transfers.append(post_id)
+        return self._send(200, b'\x00' * size, 'video/mp4')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    SizedHandler.probes.clear()
+    SizedHandler.transfers.clear()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), SizedHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def _batch(server, tmp_path, **kwargs):
+    from src.aimd import AimdController
+    from src.batch_download import BatchDownloader
+    from src.sora_downloader import SoraVideoDownloader
+
+    return BatchDownloader(
+        SoraVideoDownloader(endpoints=[server]), str(tmp_path),
+        metadata=AimdController('metadata', initial=1, maximum=1),
+        transfer=AimdController('transfer', initial=1, maximum=1),
+        size_cache=SizeCache(str(tmp_path)), **kwargs
+    )
+
+
+def test_batch_runs_longest_first_and_reuses_sizes(server, tmp_path):
+    pytest.importorskip('requests')
+    sizes = [100, 30000, 500, 20000, 7000]
+    urls = [f"https://sora.chatgpt.com/p/s_{size:08x}" for size in sizes]
+
+    batch = _batch(server, tmp_path, order='longest-first')
+    results = list(batch.run(urls))
+    assert [error for _, _, error in results if error] == []
+    assert SizedHandler.transfers == [f"s_{size:08x}" for size in sorted(sizes, reverse=True)]
+    assert len(SizedHandler.probes) == len(sizes)
+
+    report = batch.schedule_report()
+    assert report['items'] == len(sizes) and report['sized'] == len(sizes)
+    assert report['makespan'] >= report['lower_bound'] > 0
+
+    # A second run orders from the cache without probing
+    SizedHandler.probes.clear()
+    SizedHandler.transfers.clear()
+    batch = _batch(server, tmp_path, order='shortest-first')
+    list(batch.run(urls))
+    assert SizedHandler.probes == []
+    assert SizedHandler.transfers == [f"s_{size:08x}" for size in sorted(sizes)]
+
+
+def test_deadline_skips_unstarted_items(server, tmp_path):
+    pytest.importorskip('requests')
+    from src.batch_download import DeadlineExceeded
+
+    urls = [f"https://sora.chatgpt.com/p/s_{size:08x}" for size in (100, 200, 300)]
+    batch = _batch(server, tmp_path, deadline=0)
+    errors = [error for _, _, error in batch.run(urls)]
+    assert all(isinstance(error, DeadlineExceeded) for error in errors)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the naming policies and the post ID verification fallback,
+against a local api-proxy/download-proxy (see conftest.py).
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.sora_downloader import SoraVideoDownloader
+
+
+def test_title_policy_fetches_metadata_first(sora_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = sora_api.add('s_aaaaaaaa', 'A cat', b'cat video')
+
+    path = SoraVideoDownloader(endpoints=[sora_api.base], naming='title').download_video(url)
+
+    assert path == 'A_cat.mp4' and open(path, 'rb').read() == b'cat video'
+    assert sora_api.requests == [('api', 's_aaaaaaaa'), ('download', 's_aaaaaaaa')]
+
+
+def test_post_id_policy_skips_metadata(sora_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = sora_api.add('s_aaaaaaaa', 'A cat', b'cat video')
+
+    path = SoraVideoDownloader(endpoints=[sora_api.base], naming='post_id').download_video(url)
+
+    assert path == 's_aaaaaaaa.mp4' and open(path, 'rb').read() == b'cat video'
+    assert sora_api.requests == [('download', 's_aaaaaaaa')]
+
+
+def test_background_policy_renames_without_overwriting(sora_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sora_api.api_delay = 0.2
+    url = sora_api.add('s_bbbbbbbb', 'A cat', b'second cat')
+    # An earlier, different video with the same title
+    (tmp_path / 'A_cat.mp4').write_bytes(b'first cat')
+
+    path = SoraVideoDownloader(endpoints=[sora_api.base], naming='background').download_video(url)
+
+    assert sorted(sora_api.requests) == [('api', 's_bbbbbbbb'), ('download', 's_bbbbbbbb')]
+    assert path == 'A_cat_s_bbbbbbbb.mp4'
+    assert open(path, 'rb').read() == b'second cat'
+    assert (tmp_path / 'A_cat.mp4').read_bytes() == b'first cat'
+    assert not os.path.exists('s_bbbbbbbb.mp4')
+
+
+def test_rejected_local_post_id_is_verified_via_api(sora_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # The share URL carries an ID the download proxy does not know
+    url = sora_api.add('s_11111111', 'Renamed post', b'real video', post_id='s_22222222')
+
+    path = SoraVideoDownloader(endpoints=[sora_api.base], naming='post_id').download_video(url)
+
+    assert path == 'Renamed_post.mp4' and open(path, 'rb').read() == b'real video'
+    assert sora_api.requests == [('download', 's_11111111'), ('api', 's_11111111'), ('download', 's_22222222')]
+
+
+def test_rejection_confirmed_by_api_is_raised(sora_api, tmp_path, monkeypatch):
+    import requests
+
+    monkeypatch.chdir(tmp_path)
+    url = sora_api.add('s_cccccccc', 'Gone', None)
+
+    with pytest.raises(requests.HTTPError):
+        SoraVideoDownloader(endpoints=[sora_api.base], naming='post_id').download_video(url)
+    assert sora_api.requests == [('download', 's_cccccccc'), ('api', 's_cccccccc')]
+    assert os.listdir(tmp_path) == []
+
+
+def test_throttled_api_call_is_charged_to_the_proxy(sora_api):
+    import requests
+
+    from src.proxy_pool import ProxyPool
+
+    pool = ProxyPool(['direct'])
+    downloader = SoraVideoDownloader(endpoints=[sora_api.base], proxies=pool)
+    sora_api.throttled.add('s_ffff0000')
+    throttled = sora_api.add('s_ffff0000', 'Throttled', b'')
+    ok = sora_api.add('s_aaaaaaaa', 'A cat', b'cat video')
+
+    with pytest.raises(requests.HTTPError):
+        downloader.extract_video_info(throttled)
+    assert downloader.extract_video_info(ok)['post_id'] == 's_aaaaaaaa'
+    row = pool.report()[0]
+    assert row['failures'] >= 1 and row['successes'] == 1
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Cold-start checks for the CLIs.
+
+The CLIs are spawned many times a day by orchestration, so `--help` and
+plain module imports must not pull in requests, Playwright, Camoufox or
+Pillow. Import cost is measured with `python -X importtime`; raise the
+budget with SORA_STARTUP_BUDGET_MS on slow machines.
+"""
+
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+BUDGET_MS = float(os.environ.get('SORA_STARTUP_BUDGET_MS', 50))
+HEAVY_MODULES = {'requests', 'urllib3', 'playwright', 'camoufox', 'PIL'}
+CLI_MODULES = ['sora_downloader', 'sora_playwright_downloader']
+
+
+def _importtime(*args):
+    """Run Python with -X importtime and return {module: cumulative_us}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=SRC_DIR, capture_output=True, text=True, timeout=60,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return result, modules
+
+
+def test_help_does_not_import_heavy_dependencies():
+    for module in CLI_MODULES:
+        result, modules = _importtime(f'{module}.py', '--help')
+        assert result.returncode == 0, result.stderr
+        heavy = {name.split('.')[0] for name in modules} & HEAVY_MODULES
+        assert not heavy, f"{module} --help imported {sorted(heavy)}"
+
+
+def test_cli_import_time_within_budget():
+    for module in CLI_MODULES:
+        # Best of three to keep scheduler noise out of the measurement
+        timings = []
+        for _ in range(3):
+            _, modules = _importtime('-c', f'import {module}')
+            timings.append(modules[module] / 1000)
+        assert min(timings) < BUDGET_MS, f"{module} import took {min(timings):.1f} ms (budget {BUDGET_MS} ms)"
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for conditional thumbnail fetches and their validator index.
+"""
+
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip('requests')
+
+from src.proxy_pool import ProxyPool
+from src.sora_downloader import SoraVideoDownloader
+from src.thumbnails import INDEX_FILENAME, ThumbnailFetcher
+
+
+class ThumbnailHandler(BaseHTTPRequestHandler):
+    """thumbnail-proxy with ETags; post IDs starting with s_block get a 429."""
+    images = {}
+    requests = []
+
+    def do_GET(self):
+        post_id = parse_qs(urlparse(self.path).query)['id'][0]
+        self.requests.append((post_id, self.headers.get('If-None-Match')))
+        if post_id.startswith('s_block'):
+            self.send_response(429)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = self.images[post_id]
+        etag = f'"{hash(body) & 0xffffffff:08x}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', 'Mon, 19 Oct 2026 10:00:00 GMT')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    ThumbnailHandler.images = {'s_aaaaaaaa': b'\xff\xd8first', 's_bbbbbbbb': b'\xff\xd8second'}
+    ThumbnailHandler.requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), ThumbnailHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def _fetcher(server, tmp_path, proxies=None):
+    downloader = SoraVideoDownloader(endpoints=[server], proxies=proxies)
+    return ThumbnailFetcher(downloader, str(tmp_path), workers=4)
+
+
+def test_unchanged_thumbnails_are_not_downloaded_again(server, tmp_path):
+    infos = [{'post_id': 's_aaaaaaaa'}, {'post_id': 's_bbbbbbbb'}]
+    first = _fetcher(server, tmp_path).fetch_many(infos)
+    assert [status for _, status in first] == ['downloaded', 'downloaded']
+    assert (tmp_path / 's_aaaaaaaa.jpg').read_bytes() == b'\xff\xd8first'
+    assert os.path.exists(tmp_path / INDEX_FILENAME)
+
+    # A new fetcher reads the validators back from the index
+    ThumbnailHandler.images['s_bbbbbbbb'] = b'\xff\xd8changed'
+    ThumbnailHandler.requests = []
+    second = _fetcher(server, tmp_path).fetch_many(infos)
+    assert dict(zip(['a', 'b'], [status for _, status in second])) == {'a': 'not-modified', 'b': 'downloaded'}
+    assert all(etag for _, etag in ThumbnailHandler.requests)
+    assert (tmp_path / 's_bbbbbbbb.jpg').read_bytes() == b'\xff\xd8changed'
+
+    # Without the image on disk the validators are not sent
+    os.unlink(tmp_path / 's_aaaaaaaa.jpg')
+    ThumbnailHandler.requests = []
+    assert _fetcher(server, tmp_path).fetch(infos[0]) == (str(tmp_path / 's_aaaaaaaa.jpg'), 'downloaded')
+    assert ThumbnailHandler.requests == [('s_aaaaaaaa', None)]
+
+
+def test_throttled_thumbnail_is_charged_to_the_proxy(server, tmp_path):
+    pool = ProxyPool(['direct'])
+    fetcher = _fetcher(server, tmp_path, proxies=pool)
+
+    assert fetcher.fetch({'post_id': 's_blocked0'}) == (None, 'failed')
+    assert fetcher.fetch({'post_id': 's_aaaaaaaa'})[1] == 'downloaded'
+    row = pool.report()[0]
+    assert (row['successes'], row['failures']) == (1, 1)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming URL ingestion: canonicalization, post IDs and dedup.
+"""
+
+import io
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.url_ingest import CompactSeenSet, canonicalize_url, extract_post_id, iter_urls
+
+POST = "s_693b10946d588191b354320369fbf4e3"
+CANONICAL = f"https://sora.chatgpt.com/p/{POST}"
+
+
+def test_canonicalize_share_url_variants():
+    variants = [
+        f"{CANONICAL}",
+        f"  {CANONICAL},\n",
+        f"{CANONICAL}.",
+        f"https://www.Sora.ChatGPT.com/p/{POST.upper().replace('S_', 's_')}/",
+        f"http://sora.chatgpt.com/p/{POST}?utm_source=x&fbclid=y#t=3",
+        f"<{CANONICAL}>)",
+        f"sora.chatgpt.com/p/{POST}",
+    ]
+    for raw in variants:
+        assert canonicalize_url(raw) == CANONICAL, raw
+
+
+def test_canonicalize_rejects_non_urls_and_keeps_real_params():
+    assert canonicalize_url("") is None
+    assert canonicalize_url("# comment") is None
+    assert canonicalize_url("not a url") is None
+    assert canonicalize_url("https://Example.com/a/?b=2&utm_medium=z&a=1") == "https://example.com/a?a=1&b=2"
+
+
+def test_extract_post_id():
+    assert extract_post_id(CANONICAL) == POST
+    assert extract_post_id("https://sora.chatgpt.com/explore") is None
+
+
+def test_iter_urls_drops_duplicates_and_counts():
+    text = "\n".join([CANONICAL, f"{CANONICAL},", "garbage", "", "https://example.com/x", CANONICAL + "."])
+    stats = {}
+    items = list(iter_urls(io.StringIO(text), stats=stats))
+    assert [i.url for i in items] == [CANONICAL, "https://example.com/x"]
+    assert items[0].post_id == POST
+    assert stats == {'lines': 6, 'invalid': 1, 'duplicates': 2, 'yielded': 2}
+
+
+def test_compact_seen_set_grows_without_losing_keys():
+    seen = CompactSeenSet(capacity=4)
+    keys = [f"s_{i:032x}" for i in range(1, 5000)] + [f"https://example.com/{i}" for i in range(500)]
+    assert all(seen.add(k) for k in keys)
+    assert not any(seen.add(k) for k in keys)
+    assert len(seen) == len(keys)
+    assert seen.nbytes <= len(keys) * CompactSeenSet.SLOT * 4